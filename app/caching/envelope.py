@@ -0,0 +1,27 @@
+import json
+import time
+from dataclasses import dataclass
+
+
+@dataclass
+class CacheEntry:
+    value: str
+    stale: bool
+
+
+def encode(value: str, soft_ttl: int) -> str:
+    """Wrap a value with the time after which it should be revalidated."""
+    return json.dumps({"value": value, "soft_expires_at": time.time() + soft_ttl})
+
+
+def decode(raw: str | None) -> CacheEntry | None:
+    """Unwrap a stored value; values written without an envelope are never stale."""
+    if raw is None:
+        return None
+    try:
+        envelope = json.loads(raw)
+    except ValueError:
+        return CacheEntry(value=raw, stale=False)
+    if not isinstance(envelope, dict) or envelope.keys() != {"value", "soft_expires_at"}:
+        return CacheEntry(value=raw, stale=False)
+    return CacheEntry(value=envelope["value"], stale=envelope["soft_expires_at"] <= time.time())
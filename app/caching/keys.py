@@ -0,0 +1,68 @@
+import random
+
+from app.config import settings
+
+
+def namespace_of(key: str) -> str:
+    """Return the namespace of a cache key, i.e. the part before the first ':'."""
+    return key.split(":", 1)[0]
+
+
+def cache_ttl(key: str) -> int:
+    """Return the jittered Redis expiration (seconds) for the key's namespace."""
+    return _jitter(key, settings.CACHE_TTLS.get(namespace_of(key), settings.CACHE_DEFAULT_TTL))
+
+
+def cache_soft_ttl(key: str, ttl: int) -> int:
+    """Return the jittered time (seconds) after which a value is served stale and refreshed.
+
+    Both TTLs are jittered independently, so the result is clamped below ``ttl``,
+    the value's jittered expiration, or it could expire before it is ever stale.
+    A ``ttl`` of 0 means the value does not expire and leaves the soft TTL as is.
+    """
+    soft_ttl = _jitter(key, settings.CACHE_SOFT_TTLS.get(namespace_of(key), settings.CACHE_DEFAULT_SOFT_TTL))
+    if ttl <= 0:
+        return soft_ttl
+    return max(0, min(soft_ttl, ttl - 1))
+
+
+def _jitter(key: str, ttl: int) -> int:
+    # Spread out the expiry of keys that were populated together
+    jitter = settings.CACHE_TTL_JITTER.get(namespace_of(key), settings.CACHE_DEFAULT_TTL_JITTER)
+    return int(ttl * (1 + random.uniform(0, jitter)))
+
+
+def tag_key(tag: str) -> str:
+    return f"tag:{tag}"
+
+
+def user_by_id_key(user_id: int) -> str:
+    return f"users:get_user_by_id:{user_id}"
+
+
+def token_validation_key(digest: str) -> str:
+    return f"auth:token:{digest}"
+
+
+def revoked_token_key(digest: str) -> str:
+    return f"auth:revoked:{digest}"
+
+
+def pending_token_key(digest: str) -> str:
+    return f"auth:pending:{digest}"
+
+
+def lease_key(key: str) -> str:
+    return f"lease:{key}"
+
+
+def user_tag(user_id: int) -> str:
+    return f"user:{user_id}"
+
+
+def role_tag(role_id: int) -> str:
+    return f"role:{role_id}"
+
+
+def permission_tag(permission_id: int) -> str:
+    return f"permission:{permission_id}"
@@ -0,0 +1,69 @@
+import time
+from collections import OrderedDict
+
+from app.caching.keys import namespace_of
+
+
+class LocalCache:
+    """In-process LRU cache bounded by entry count and total value size.
+
+    Entries expire after a per-namespace TTL; a TTL of 0 disables local caching
+    for that namespace.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, default_ttl: int, ttls: dict[str, int] | None = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.ttls = ttls or {}
+        self._entries: OrderedDict[str, tuple[str, float, int]] = OrderedDict()
+        self._bytes = 0
+
+    def ttl_for(self, key: str) -> int:
+        return self.ttls.get(namespace_of(key), self.default_ttl)
+
+    def get(self, key: str) -> str | None:
+        """Get a value by key, dropping it if it has expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        value, expires_at, _ = entry
+        if expires_at <= time.monotonic():
+            self.delete(key)
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        """Store a value, evicting least recently used entries to stay within bounds."""
+        ttl = self.ttl_for(key)
+        size = len(value.encode("utf-8"))
+        self.delete(key)
+        if ttl <= 0 or size > self.max_bytes:
+            return
+
+        self._entries[key] = (value, time.monotonic() + ttl, size)
+        self._bytes += size
+
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            _, (_, _, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+
+    def delete(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+        }
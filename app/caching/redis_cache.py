@@ -1,26 +1,273 @@
-from redis.asyncio import Redis
+import uuid
+
+from opentelemetry.metrics import CallbackOptions, Observation
+from redis.asyncio import BlockingConnectionPool, Redis
+
+from app.caching import envelope
+from app.caching.envelope import CacheEntry
+from app.caching.keys import lease_key, tag_key
+from app.config import settings
+from app.instrumentation.metrics import get_meter
+
+# Stores a value and records it in each tag set. A tag set never expires before
+# the longest-lived key it references.
+SET_WITH_TAGS_SCRIPT = """
+local expire = tonumber(ARGV[2])
+if expire > 0 then
+    redis.call('SET', KEYS[1], ARGV[1], 'EX', expire)
+else
+    redis.call('SET', KEYS[1], ARGV[1])
+end
+for i = 2, #KEYS do
+    local existed = redis.call('EXISTS', KEYS[i]) == 1
+    redis.call('SADD', KEYS[i], KEYS[1])
+    if expire <= 0 then
+        redis.call('PERSIST', KEYS[i])
+    else
+        local ttl = redis.call('TTL', KEYS[i])
+        if not existed or (ttl >= 0 and ttl < expire) then
+            redis.call('EXPIRE', KEYS[i], expire)
+        end
+    end
+end
+"""
+
+# Releases a lease only if it is still held by the caller's token.
+RELEASE_LEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# Moves up to ARGV[1] values from the head of one list to the tail of another,
+# or every value when ARGV[1] is 0, and returns the moved values.
+MOVE_MANY_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local moved = {}
+while limit == 0 or #moved < limit do
+    local value = redis.call('LMOVE', KEYS[1], KEYS[2], 'LEFT', 'RIGHT')
+    if not value then
+        break
+    end
+    table.insert(moved, value)
+end
+return moved
+"""
+
+# Removes one occurrence of each value from KEYS[1] and appends it to KEYS[2].
+REQUEUE_SCRIPT = """
+for i = 1, #ARGV do
+    if redis.call('LREM', KEYS[1], 1, ARGV[i]) > 0 then
+        redis.call('RPUSH', KEYS[2], ARGV[i])
+    end
+end
+"""
+
+# Deletes every key referenced by the given tag sets, and the sets themselves.
+INVALIDATE_TAGS_SCRIPT = """
+local deleted = {}
+for i = 1, #KEYS do
+    local members = redis.call('SMEMBERS', KEYS[i])
+    for _, key in ipairs(members) do
+        redis.call('UNLINK', key)
+        table.insert(deleted, key)
+    end
+    redis.call('UNLINK', KEYS[i])
+end
+return deleted
+"""
+
 
 class RedisCache:
     def __init__(self):
         self.client: Redis | None = None
+        self.pool: BlockingConnectionPool | None = None
+
+    async def init_cache(self, redis_url: str = settings.REDIS_URL) -> None:
+        """Initialize the shared Redis connection pool and client."""
+        self.pool = BlockingConnectionPool.from_url(
+            redis_url,
+            decode_responses=True,
+            max_connections=settings.REDIS_MAX_CONNECTIONS,
+            timeout=settings.REDIS_POOL_TIMEOUT,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=settings.REDIS_SOCKET_CONNECT_TIMEOUT,
+            health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
+        )
+        self.client = Redis(connection_pool=self.pool)
+        self._set_with_tags = self.client.register_script(SET_WITH_TAGS_SCRIPT)
+        self._invalidate_tags = self.client.register_script(INVALIDATE_TAGS_SCRIPT)
+        self._release_lease = self.client.register_script(RELEASE_LEASE_SCRIPT)
+        self._move_many = self.client.register_script(MOVE_MANY_SCRIPT)
+        self._requeue = self.client.register_script(REQUEUE_SCRIPT)
 
-    async def init_cache(self, redis_url: str = "redis://redis:6379") -> None:
-        """Initialize the Redis client."""
-        self.client = Redis.from_url(redis_url, decode_responses=True)
+        get_meter().create_observable_gauge(
+            "redis.pool.connections",
+            callbacks=[self._observe_pool],
+            description="Redis pool connections by state",
+        )
 
     async def get(self, key: str) -> str | None:
-        """Get a value from Redis by key."""
+        """Get a value from Redis by key, whether or not it is stale."""
+        entry = await self.get_entry(key)
+        return entry.value if entry else None
+
+    async def get_entry(self, key: str) -> CacheEntry | None:
+        """Get a value from Redis by key along with its staleness."""
+        return envelope.decode(await self.get_raw(key))
+
+    async def get_many(self, keys: list[str]) -> list[CacheEntry | None]:
+        """Get several values with a single MGET, in the order of ``keys``."""
+        return [envelope.decode(raw) for raw in await self.get_many_raw(keys)]
+
+    async def get_many_raw(self, keys: list[str]) -> list[str | None]:
+        if not self.client:
+            raise RuntimeError("Redis client not initialized")
+        if not keys:
+            return []
+        return await self.client.mget(keys)
+
+    async def get_raw(self, key: str) -> str | None:
+        """Get the stored representation of a value, including its envelope."""
         if not self.client:
             raise RuntimeError("Redis client not initialized")
         return await self.client.get(key)
 
-    async def set(self, key: str, value: str, expire: int | None = None) -> None:
-        """Set a value in Redis with an optional expiration time (seconds)."""
+    async def set(self, key: str, value: str, expire: int | None = None, tags: list[str] | None = None,
+                  soft_ttl: int | None = None) -> None:
+        """Set a value in Redis with an optional expiration time (seconds).
+
+        With ``soft_ttl`` the value is reported stale after that many seconds and
+        kept until ``expire``. Tagged values can later be evicted together with
+        ``invalidate_tags``.
+        """
+        if not self.client:
+            raise RuntimeError("Redis client not initialized")
+        if soft_ttl is not None:
+            value = envelope.encode(value, soft_ttl)
+        if not tags:
+            await self.client.set(key, value, ex=expire)
+            return
+        await self._set_with_tags(keys=[key, *[tag_key(tag) for tag in tags]], args=[value, expire or 0])
+
+    async def set_many(self, items: list[dict]) -> None:
+        """Set several values in one pipelined round-trip.
+
+        Each item holds ``key`` and ``value`` and optionally ``expire``, ``tags``
+        and ``soft_ttl``, with the same meaning as for ``set``.
+        """
+        if not self.client:
+            raise RuntimeError("Redis client not initialized")
+        if not items:
+            return
+        async with self.client.pipeline(transaction=False) as pipe:
+            for item in items:
+                value = item["value"]
+                if item.get("soft_ttl") is not None:
+                    value = envelope.encode(value, item["soft_ttl"])
+                tags = item.get("tags")
+                if tags:
+                    await self._set_with_tags(keys=[item["key"], *[tag_key(tag) for tag in tags]],
+                                              args=[value, item.get("expire") or 0], client=pipe)
+                else:
+                    pipe.set(item["key"], value, ex=item.get("expire"))
+            await pipe.execute()
+
+    async def invalidate_tags(self, *tags: str) -> list[str]:
+        """Delete every value carrying one of the tags in a single round-trip.
+
+        Returns the deleted keys.
+        """
+        if not self.client:
+            raise RuntimeError("Redis client not initialized")
+        if not tags:
+            return []
+        return await self._invalidate_tags(keys=[tag_key(tag) for tag in tags])
+
+    async def acquire_lease(self, key: str, ttl_ms: int) -> str | None:
+        """Try to take the exclusive lease to repopulate a key.
+
+        Returns the lease token, or None if another caller holds the lease.
+        """
+        if not self.client:
+            raise RuntimeError("Redis client not initialized")
+        token = uuid.uuid4().hex
+        acquired = await self.client.set(lease_key(key), token, nx=True, px=ttl_ms)
+        return token if acquired else None
+
+    async def release_lease(self, key: str, token: str) -> None:
+        if not self.client:
+            raise RuntimeError("Redis client not initialized")
+        await self._release_lease(keys=[lease_key(key)], args=[token])
+
+    async def delete(self, *keys: str) -> None:
+        """Delete one or more keys from Redis."""
+        if not self.client:
+            raise RuntimeError("Redis client not initialized")
+        if keys:
+            await self.client.delete(*keys)
+
+    async def push(self, key: str, *values: str) -> None:
+        """Append values to a Redis list."""
+        if not self.client:
+            raise RuntimeError("Redis client not initialized")
+        await self.client.rpush(key, *values)
+
+    async def move_many(self, source: str, destination: str, count: int = 0) -> list[str]:
+        """Atomically move up to ``count`` values (all when 0) from the head of one list to another."""
+        if not self.client:
+            raise RuntimeError("Redis client not initialized")
+        return await self._move_many(keys=[source, destination], args=[count])
+
+    async def remove_values(self, key: str, *values: str) -> None:
+        """Remove one occurrence of each value from a Redis list."""
+        if not self.client:
+            raise RuntimeError("Redis client not initialized")
+        async with self.client.pipeline(transaction=True) as pipe:
+            for value in values:
+                pipe.lrem(key, 1, value)
+            await pipe.execute()
+
+    async def requeue(self, source: str, destination: str, *values: str) -> None:
+        """Atomically move the given values from one list back to the tail of another."""
         if not self.client:
             raise RuntimeError("Redis client not initialized")
-        await self.client.set(key, value, ex=expire)
+        if values:
+            await self._requeue(keys=[source, destination], args=list(values))
+
+    async def publish(self, channel: str, message: str) -> None:
+        """Publish a message on a Redis pub/sub channel."""
+        if not self.client:
+            raise RuntimeError("Redis client not initialized")
+        await self.client.publish(channel, message)
+
+    def pool_stats(self) -> dict:
+        """Return a snapshot of the connection pool utilization."""
+        if not self.pool:
+            raise RuntimeError("Redis client not initialized")
+        in_use = len(self.pool._in_use_connections)
+        idle = len(self.pool._available_connections)
+        return {
+            "max_connections": self.pool.max_connections,
+            "in_use": in_use,
+            "idle": idle,
+            "created": in_use + idle,
+        }
+
+    def _observe_pool(self, options: CallbackOptions):
+        if not self.pool:
+            return []
+        stats = self.pool_stats()
+        return [
+            Observation(stats["in_use"], {"state": "in_use"}),
+            Observation(stats["idle"], {"state": "idle"}),
+            Observation(stats["max_connections"], {"state": "max"}),
+        ]
 
     async def close(self) -> None:
-        """Close the Redis connection."""
+        """Close the Redis client and disconnect the pool."""
         if self.client:
-            await self.client.close()
+            await self.client.aclose()
+        if self.pool:
+            await self.pool.disconnect()
@@ -0,0 +1,121 @@
+import asyncio
+import json
+import time
+from typing import Any, Awaitable, Callable
+
+from app.config import settings
+from app.instrumentation.metrics import get_meter
+from app.utils.logger import get_logger
+
+logger = get_logger("app.caching.singleflight")
+
+meter = get_meter()
+
+coalesced_counter = meter.create_counter(
+    "cache.coalesced_loads",
+    description="Cache misses served by another caller's load, by scope",
+)
+
+stale_refresh_counter = meter.create_counter(
+    "cache.stale_refreshes",
+    description="Background refreshes scheduled for stale cache entries",
+)
+
+
+class SingleFlight:
+    """Runs at most one load per key at a time; concurrent callers await the same result."""
+
+    def __init__(self):
+        self._calls: dict[str, asyncio.Task] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        else:
+            coalesced_counter.add(1, {"scope": "process"})
+
+        # A cancelled caller must not cancel the load the other callers are waiting on
+        return await asyncio.shield(task)
+
+    def in_flight(self, key: str) -> bool:
+        return key in self._calls
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved even if every caller went away
+            task.exception()
+
+
+single_flight = SingleFlight()
+
+# Strong references so pending refreshes are not garbage collected
+_background_refreshes: set[asyncio.Task] = set()
+
+
+async def coalesce(cache, cache_key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+    """Load a missing cache entry once per process and, optionally, once across replicas.
+
+    With CACHE_LEASE_ENABLED only the replica holding the Redis lease for the key
+    runs ``loader``; the others poll the cache for the value it writes and fall
+    back to loading themselves once CACHE_LEASE_WAIT_MS has elapsed.
+    """
+    if not settings.CACHE_LEASE_ENABLED:
+        return await single_flight.do(cache_key, loader)
+    return await single_flight.do(cache_key, lambda: _load_with_lease(cache, cache_key, loader))
+
+
+async def _load_with_lease(cache, cache_key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+    token = await cache.acquire_lease(cache_key, settings.CACHE_LEASE_TTL_MS)
+    if token is not None:
+        try:
+            return await loader()
+        finally:
+            await cache.release_lease(cache_key, token)
+
+    deadline = time.monotonic() + settings.CACHE_LEASE_WAIT_MS / 1000
+    while time.monotonic() < deadline:
+        await asyncio.sleep(settings.CACHE_LEASE_POLL_MS / 1000)
+        cached = await cache.get(cache_key)
+        if cached:
+            coalesced_counter.add(1, {"scope": "cluster"})
+            return json.loads(cached)
+
+    return await loader()
+
+
+def refresh_in_background(cache, cache_key: str, loader: Callable[[], Awaitable[Any]]) -> None:
+    """Schedule a reload of a stale entry without making the caller wait for it.
+
+    ``loader`` must not depend on the caller's request, e.g. it should open its
+    own database session. With CACHE_LEASE_ENABLED a replica that cannot take
+    the lease skips the refresh and keeps serving the stale value.
+    """
+    if single_flight.in_flight(cache_key):
+        return
+
+    async def refresh():
+        if not settings.CACHE_LEASE_ENABLED:
+            return await loader()
+        token = await cache.acquire_lease(cache_key, settings.CACHE_LEASE_TTL_MS)
+        if token is None:
+            return None
+        try:
+            return await loader()
+        finally:
+            await cache.release_lease(cache_key, token)
+
+    stale_refresh_counter.add(1)
+    task = asyncio.ensure_future(single_flight.do(cache_key, refresh))
+    _background_refreshes.add(task)
+    task.add_done_callback(_on_refresh_done)
+
+
+def _on_refresh_done(task: asyncio.Task) -> None:
+    _background_refreshes.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning("Background cache refresh failed: %s", task.exception())
@@ -0,0 +1,166 @@
+import asyncio
+import json
+import uuid
+
+from app.caching import envelope
+from app.caching.envelope import CacheEntry
+from app.caching.local_cache import LocalCache
+from app.caching.redis_cache import RedisCache
+from app.config import settings
+from app.instrumentation.metrics import get_meter
+from app.utils.logger import get_logger
+
+logger = get_logger("app.caching.tiered_cache")
+
+l1_requests_counter = get_meter().create_counter(
+    "cache.l1.requests",
+    description="In-process cache lookups by result",
+)
+
+
+class TieredCache:
+    """In-process LocalCache in front of RedisCache.
+
+    The local tier holds values as stored in Redis, envelope included, and is
+    populated on reads. Every write or delete is broadcast over Redis pub/sub so that the other
+    replicas drop their local copy of the key.
+    """
+
+    def __init__(self, redis_cache: RedisCache, local_cache: LocalCache,
+                 channel: str = settings.CACHE_INVALIDATION_CHANNEL):
+        self.redis_cache = redis_cache
+        self.local_cache = local_cache
+        self.channel = channel
+        self.instance_id = uuid.uuid4().hex
+        self._listener: asyncio.Task | None = None
+
+    @property
+    def client(self):
+        return self.redis_cache.client
+
+    async def start(self) -> None:
+        """Start listening for invalidations from other replicas."""
+        self._listener = asyncio.create_task(self._listen())
+
+    async def get(self, key: str) -> str | None:
+        """Get a value from the local cache, falling back to Redis."""
+        entry = await self.get_entry(key)
+        return entry.value if entry else None
+
+    async def get_entry(self, key: str) -> CacheEntry | None:
+        """Get a value and its staleness from the local cache, falling back to Redis."""
+        raw = self.local_cache.get(key)
+        if raw is not None:
+            l1_requests_counter.add(1, {"result": "hit"})
+            return envelope.decode(raw)
+
+        l1_requests_counter.add(1, {"result": "miss"})
+        raw = await self.redis_cache.get_raw(key)
+        if raw is not None:
+            self.local_cache.set(key, raw)
+        return envelope.decode(raw)
+
+    async def get_many(self, keys: list[str]) -> list[CacheEntry | None]:
+        """Get several values, reading only the local misses from Redis with one MGET."""
+        raws = [self.local_cache.get(key) for key in keys]
+        missing = [key for key, raw in zip(keys, raws) if raw is None]
+        l1_requests_counter.add(len(keys) - len(missing), {"result": "hit"})
+        l1_requests_counter.add(len(missing), {"result": "miss"})
+
+        fetched = dict(zip(missing, await self.redis_cache.get_many_raw(missing)))
+        for key, raw in fetched.items():
+            if raw is not None:
+                self.local_cache.set(key, raw)
+        return [envelope.decode(raw if raw is not None else fetched.get(key)) for key, raw in zip(keys, raws)]
+
+    async def set_many(self, items: list[dict]) -> None:
+        """Set several values in Redis, evicting the local copies on every replica."""
+        await self.redis_cache.set_many(items)
+        keys = [item["key"] for item in items]
+        for key in keys:
+            self.local_cache.delete(key)
+        await self._broadcast(keys)
+
+    async def set(self, key: str, value: str, expire: int | None = None, tags: list[str] | None = None,
+                  soft_ttl: int | None = None) -> None:
+        """Set a value in Redis, evicting the local copies on every replica."""
+        await self.redis_cache.set(key, value, expire=expire, tags=tags, soft_ttl=soft_ttl)
+        self.local_cache.delete(key)
+        await self._broadcast([key])
+
+    async def invalidate_tags(self, *tags: str) -> list[str]:
+        """Evict tagged values from Redis and from every replica's local cache."""
+        keys = await self.redis_cache.invalidate_tags(*tags)
+        for key in keys:
+            self.local_cache.delete(key)
+        await self._broadcast(keys)
+        return keys
+
+    async def delete(self, *keys: str) -> None:
+        """Delete keys from Redis and from every replica's local cache."""
+        await self.redis_cache.delete(*keys)
+        for key in keys:
+            self.local_cache.delete(key)
+        await self._broadcast(list(keys))
+
+    async def push(self, key: str, *values: str) -> None:
+        await self.redis_cache.push(key, *values)
+
+    async def move_many(self, source: str, destination: str, count: int = 0) -> list[str]:
+        return await self.redis_cache.move_many(source, destination, count)
+
+    async def remove_values(self, key: str, *values: str) -> None:
+        await self.redis_cache.remove_values(key, *values)
+
+    async def requeue(self, source: str, destination: str, *values: str) -> None:
+        await self.redis_cache.requeue(source, destination, *values)
+
+    async def acquire_lease(self, key: str, ttl_ms: int) -> str | None:
+        return await self.redis_cache.acquire_lease(key, ttl_ms)
+
+    async def release_lease(self, key: str, token: str) -> None:
+        await self.redis_cache.release_lease(key, token)
+
+    def pool_stats(self) -> dict:
+        return {**self.redis_cache.pool_stats(), "local": self.local_cache.stats()}
+
+    async def close(self) -> None:
+        if self._listener:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+        await self.redis_cache.close()
+
+    async def _broadcast(self, keys: list[str]) -> None:
+        if not keys:
+            return
+        message = json.dumps({"origin": self.instance_id, "keys": keys})
+        await self.redis_cache.publish(self.channel, message)
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                await pubsub.subscribe(self.channel)
+                # Invalidations may have been missed while we were not subscribed
+                self.local_cache.clear()
+                try:
+                    async for message in pubsub.listen():
+                        self._on_invalidation(message["data"])
+                finally:
+                    await pubsub.aclose()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Cache invalidation listener failed, resubscribing: %s", e)
+                self.local_cache.clear()
+                await asyncio.sleep(1)
+
+    def _on_invalidation(self, data: str) -> None:
+        payload = json.loads(data)
+        if payload.get("origin") == self.instance_id:
+            return
+        for key in payload.get("keys", []):
+            self.local_cache.delete(key)
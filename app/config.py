@@ -4,13 +4,115 @@ from pydantic_settings import BaseSettings
 class Settings(BaseSettings):
     PROJECT_NAME: str = "FastAPI Microservice"
     VERSION: str = "0.1.0"
+
+    # Authentication and JWT signing keys
     SECRET_KEY: str = Field(env="SECRET_KEY", default="25cfc423d48adcbdf03613fc86cc2728af8f572266163b92fe1d52ba90ef7d2e")
+    JWT_KEYS: dict[str, str] = Field(default={})
+    JWT_ACTIVE_KID: str = Field(default="default")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = Field(default=30)
+    TOKEN_VALIDATION_CACHE_TTL: int = Field(default=300)
+
+    # API keys: expiry sweep
+    API_KEY_SWEEP_INTERVAL_SECONDS: int = Field(default=60)
+    API_KEY_SWEEP_BATCH_SIZE: int = Field(default=1000)
+
+    # API keys: range partitions by expires_at
+    API_KEY_PARTITION_INTERVAL: str = Field(default="daily")
+    API_KEY_PARTITIONS_AHEAD: int = Field(default=3)
+    API_KEY_RETENTION_DAYS: int = Field(default=30)
+    API_KEY_PARTITION_DROP: bool = Field(default=True)
+    API_KEY_PARTITION_MAINTENANCE_INTERVAL_SECONDS: int = Field(default=3600)
+
+    # API keys: write-behind inserts
+    API_KEY_WRITE_BEHIND: bool = Field(default=False)
+    API_KEY_PENDING_QUEUE: str = Field(default="apikeys:pending")
+    API_KEY_FLUSH_INTERVAL_MS: int = Field(default=200)
+    API_KEY_FLUSH_MAX_ROWS: int = Field(default=500)
+
+    # Database
     DATABASE_URL: str = Field(env="DATABASE_URL")
+    DB_ECHO: bool = Field(default=False)
+    DB_POOL_SIZE: int = Field(default=10)
+    DB_MAX_OVERFLOW: int = Field(default=20)
+    DB_POOL_TIMEOUT: float = Field(default=30.0)
+    DB_POOL_PRE_PING: bool = Field(default=True)
+    DB_POOL_RECYCLE: int = Field(default=1800)
+    DB_STATEMENT_CACHE_SIZE: int = Field(default=100)
+
+    # Redis
     REDIS_URL: str = Field(default="redis://redis:6379/0")
+    REDIS_MAX_CONNECTIONS: int = Field(default=50)
+    REDIS_POOL_TIMEOUT: float = Field(default=5.0)
+    REDIS_SOCKET_TIMEOUT: float = Field(default=2.0)
+    REDIS_SOCKET_CONNECT_TIMEOUT: float = Field(default=2.0)
+    REDIS_HEALTH_CHECK_INTERVAL: int = Field(default=30)
+
+    # Cache
+    CACHE_DEFAULT_TTL: int = Field(default=3600)
+    CACHE_TTLS: dict[str, int] = Field(default={"users": 3600, "roles": 3600, "role_permissions": 3600})
+    CACHE_DEFAULT_SOFT_TTL: int = Field(default=900)
+    CACHE_SOFT_TTLS: dict[str, int] = Field(default={"users": 900, "roles": 900, "role_permissions": 900})
+    CACHE_DEFAULT_TTL_JITTER: float = Field(default=0.1)
+    CACHE_TTL_JITTER: dict[str, float] = Field(default={})
+    CACHE_LEASE_ENABLED: bool = Field(default=False)
+    CACHE_LEASE_TTL_MS: int = Field(default=5000)
+    CACHE_LEASE_WAIT_MS: int = Field(default=500)
+    CACHE_LEASE_POLL_MS: int = Field(default=25)
+    CACHE_L1_ENABLED: bool = Field(default=False)
+    CACHE_L1_MAX_ENTRIES: int = Field(default=10000)
+    CACHE_L1_MAX_BYTES: int = Field(default=16 * 1024 * 1024)
+    CACHE_L1_DEFAULT_TTL: int = Field(default=5)
+    CACHE_L1_TTLS: dict[str, int] = Field(default={"users": 10, "roles": 30, "role_permissions": 30})
+    CACHE_INVALIDATION_CHANNEL: str = Field(default="cache:invalidate")
+
+    # Users and password hashing
+    USER_BATCH_MAX_IDS: int = Field(default=100)
+    USER_BATCH_MAX_IDS_POST: int = Field(default=1000)
+    PASSWORD_HASH_EXECUTOR: str = Field(default="thread")
+    PASSWORD_HASH_WORKERS: int = Field(default=4)
+    PASSWORD_HASH_CONCURRENCY: int = Field(default=4)
+    PASSWORD_HASH_MAX_QUEUE: int = Field(default=64)
+
+    # Authorization
+    RBAC_CHANGES_CHANNEL: str = Field(default="rbac:changes")
+    RBAC_RELOAD_INTERVAL_SECONDS: int = Field(default=300)
+
+    # Messaging and events
     RABBITMQ_URL: str = Field(env="RABBITMQ_URL")
+    RABBITMQ_CHANNEL_POOL_SIZE: int = Field(default=4)
+    RABBITMQ_PUBLISH_BUFFER_SIZE: int = Field(default=10000)
+    RABBITMQ_CONFIRM_BATCH_SIZE: int = Field(default=100)
+    RABBITMQ_DRAIN_TIMEOUT_SECONDS: float = Field(default=10.0)
+    OUTBOX_POLL_INTERVAL_MS: int = Field(default=500)
+    OUTBOX_BATCH_SIZE: int = Field(default=100)
+    CONSUMER_PREFETCH: int = Field(default=64)
+    CONSUMER_WORKERS: int = Field(default=16)
+    CONSUMER_ACK_BATCH_SIZE: int = Field(default=32)
+    CONSUMER_ACK_INTERVAL_MS: int = Field(default=100)
+    CONSUMER_BATCH_MAX_SIZE: int = Field(default=50)
+    CONSUMER_BATCH_MAX_WAIT_MS: int = Field(default=50)
+    CONSUMER_RETRY_DELAYS_MS: list[int] = Field(default=[1000, 10000, 60000])
+    CONSUMER_DRAIN_TIMEOUT_SECONDS: float = Field(default=30.0)
+    CONSUMER_PROCESSES: int = Field(default=0)
+    CONSUMER_RESTART_BACKOFF_SECONDS: float = Field(default=1.0)
+    EVENT_BUS_BACKEND: str = Field(default="amqp")
+    EVENT_CONTENT_TYPE: str = Field(default="application/json")
+    EVENT_SHARDS: int = Field(default=0)
+
+    # Logging
     LOG_LEVEL: str = Field(env="LOG_LEVEL", default="INFO")
+    LOG_QUEUE_SIZE: int = Field(default=10000)
+    LOG_SUCCESS_SAMPLE_RATE: float = Field(default=1.0)
+
+    # Tracing
     OTEL_EXPORTER_OTLP_ENDPOINT: str = Field(default="http://otel-collector:4317")
+    TRACE_SAMPLE_RATIO: float = Field(default=1.0)
+    TRACE_TAIL_SAMPLING: bool = Field(default=False)
+    TRACE_SLOW_THRESHOLD_MS: float = Field(default=500.0)
+    TRACE_TAIL_MAX_TRACES: int = Field(default=10000)
+    TRACE_BSP_MAX_QUEUE_SIZE: int = Field(default=2048)
+    TRACE_BSP_MAX_EXPORT_BATCH_SIZE: int = Field(default=512)
+    TRACE_BSP_SCHEDULE_DELAY_MS: int = Field(default=5000)
 
     class Config:
         env_file = ".env"
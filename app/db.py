@@ -1,17 +1,95 @@
+import time
+
+from opentelemetry import trace
+from opentelemetry.metrics import CallbackOptions, Observation
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from sqlmodel import SQLModel
 from app.config import settings
+from app.instrumentation.metrics import get_meter
+from app.migrations import lock_migrations, run_migrations
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine, async_sessionmaker
 
+meter = get_meter()
+
+checkout_wait_histogram = meter.create_histogram(
+    "db.pool.checkout_wait",
+    unit="ms",
+    description="Time spent waiting for a database connection from the pool",
+)
+
+
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited for a connection."""
+
+    def _do_get(self):
+        start_time = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            wait_ms = (time.perf_counter() - start_time) * 1000
+            checkout_wait_histogram.record(wait_ms)
+            trace.get_current_span().set_attribute("db.pool.checkout_wait_ms", wait_ms)
+
+
 # Create async engine
-engine: AsyncEngine = create_async_engine(settings.DATABASE_URL, echo=True, future=True)
+engine: AsyncEngine = create_async_engine(
+    settings.DATABASE_URL,
+    echo=settings.DB_ECHO,
+    future=True,
+    poolclass=InstrumentedAsyncPool,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    connect_args={"prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE},
+)
 
 # Create async session factory
 async_session = async_sessionmaker(engine, expire_on_commit=False)
 
 
+@event.listens_for(engine.sync_engine, "checkout")
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    span = trace.get_current_span()
+    span.set_attribute("db.pool.checked_out", engine.pool.checkedout())
+    span.set_attribute("db.pool.overflow", engine.pool.overflow())
+
+
+def pool_stats() -> dict:
+    """Return a snapshot of the database connection pool utilization."""
+    return {
+        "size": engine.pool.size(),
+        "checked_out": engine.pool.checkedout(),
+        "checked_in": engine.pool.checkedin(),
+        "overflow": max(engine.pool.overflow(), 0),
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+    }
+
+
+def _observe_pool(options: CallbackOptions):
+    stats = pool_stats()
+    return [
+        Observation(stats["checked_out"], {"state": "checked_out"}),
+        Observation(stats["checked_in"], {"state": "checked_in"}),
+        Observation(stats["overflow"], {"state": "overflow"}),
+    ]
+
+
+meter.create_observable_gauge(
+    "db.pool.connections",
+    callbacks=[_observe_pool],
+    description="Database pool connections by state",
+)
+
+
 async def init_db():
     async with engine.begin() as conn:
+        # Replicas starting together would otherwise rename and drop each other's tables
+        await lock_migrations(conn)
         await conn.run_sync(SQLModel.metadata.create_all)
+        await run_migrations(conn)
 
 
 async def get_session() -> AsyncSession:
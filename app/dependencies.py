@@ -1,6 +1,7 @@
 from app.db import get_session
 from app.caching.redis_cache import RedisCache
 
+from fastapi import Request
 from fastapi.security import OAuth2PasswordBearer
 
 from app.instrumentation.tracing import get_tracers
@@ -13,13 +14,9 @@ async def get_db():
     get_session()
 
 
-async def get_cache() -> RedisCache:
-    cache = RedisCache()
-    await cache.init_cache()
-    try:
-        yield cache
-    finally:
-        await cache.close()
+async def get_cache(request: Request) -> RedisCache:
+    # The cache and its connection pool are owned by the application lifespan
+    yield request.app.state.cache
 
 async def get_tracer():
     yield await get_tracers()
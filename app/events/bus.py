@@ -0,0 +1,240 @@
+import asyncio
+import time
+from abc import ABC, abstractmethod
+
+from app.config import settings
+from app.events.rabbitmq import RabbitMQClient
+from app.events.retry import failure_headers, next_destination
+from app.events.runtime import (
+    BatchHandler,
+    ConsumerRuntime,
+    Handler,
+    batch_size_histogram,
+    dead_lettered_counter,
+    handler_latency_histogram,
+    invoke_batch_handler,
+    invoke_handler,
+    processed_counter,
+    redelivered_counter,
+    retried_counter,
+)
+from app.utils.logger import get_logger
+
+logger = get_logger("app.events.bus")
+
+
+class EventBus(ABC):
+    """Publish/subscribe interface shared by the event broker backends.
+
+    Handlers receive message objects exposing body, headers and redelivered.
+    A message whose handler raises, or for which a batch handler returns an
+    exception, is retried after each delay in CONSUMER_RETRY_DELAYS_MS and then
+    parked in the queue's dead-letter queue; every other message is acknowledged.
+    """
+
+    @abstractmethod
+    async def publish(self, queue_name: str, body: bytes, headers: dict | None = None) -> None:
+        ...
+
+    @abstractmethod
+    async def publish_confirmed(self, queue_name: str, body: bytes, headers: dict | None = None) -> None:
+        ...
+
+    @abstractmethod
+    def subscribe(self, queue_name: str, handler: Handler) -> None:
+        ...
+
+    @abstractmethod
+    def subscribe_batch(self, queue_name: str, handler: BatchHandler,
+                        max_size: int = settings.CONSUMER_BATCH_MAX_SIZE,
+                        max_wait_ms: int = settings.CONSUMER_BATCH_MAX_WAIT_MS) -> None:
+        ...
+
+    @abstractmethod
+    async def start(self) -> None:
+        """Start consuming the subscribed queues."""
+
+    @abstractmethod
+    async def close(self) -> None:
+        """Drain in-flight messages, then flush pending publishes."""
+
+
+class AmqpEventBus(EventBus):
+    """RabbitMQ backend: RabbitMQClient publishes and ConsumerRuntime consumes."""
+
+    def __init__(self):
+        self._runtime = ConsumerRuntime()
+        self._subscribed = False
+        self._started = False
+
+    async def publish(self, queue_name: str, body: bytes, headers: dict | None = None) -> None:
+        await RabbitMQClient.publish(queue_name, body, headers)
+
+    async def publish_confirmed(self, queue_name: str, body: bytes, headers: dict | None = None) -> None:
+        await RabbitMQClient.publish_confirmed(queue_name, body, headers)
+
+    def subscribe(self, queue_name: str, handler: Handler) -> None:
+        self._runtime.register(queue_name, handler)
+        self._subscribed = True
+
+    def subscribe_batch(self, queue_name: str, handler: BatchHandler,
+                        max_size: int = settings.CONSUMER_BATCH_MAX_SIZE,
+                        max_wait_ms: int = settings.CONSUMER_BATCH_MAX_WAIT_MS) -> None:
+        self._runtime.register_batch(queue_name, handler, max_size, max_wait_ms)
+        self._subscribed = True
+
+    async def start(self) -> None:
+        if self._subscribed:
+            await self._runtime.start()
+            self._started = True
+
+    async def close(self) -> None:
+        if self._started:
+            await self._runtime.stop()
+            self._started = False
+        await RabbitMQClient.close()
+
+
+class InProcessMessage:
+    def __init__(self, body: bytes, headers: dict | None = None):
+        self.body = body
+        self.headers = headers or {}
+        self.redelivered = False
+
+
+class InProcessEventBus(EventBus):
+    """In-memory broker on asyncio queues, for single-node deployments and load tests.
+
+    Publishing appends to the named queue and is confirmed once it is queued.
+    Each subscribed queue is consumed by CONSUMER_WORKERS tasks with the same
+    handler contract and retry tiers as the AMQP backend; dead-lettered messages
+    stay in the in-memory "<queue>.dlq" queue. Messages live only in this
+    process, so whatever is still queued or delayed when close() gives up
+    draining is lost.
+    """
+
+    def __init__(self, workers: int = settings.CONSUMER_WORKERS,
+                 retry_delays_ms: list[int] = settings.CONSUMER_RETRY_DELAYS_MS):
+        self.workers = workers
+        self.retry_delays_ms = retry_delays_ms
+        self._delayed: set[asyncio.Task] = set()
+        self._queues: dict[str, asyncio.Queue] = {}
+        self._handlers: dict[str, Handler] = {}
+        self._batch_handlers: dict[str, tuple[BatchHandler, int, int]] = {}
+        self._tasks: list[asyncio.Task] = []
+
+    def _queue(self, queue_name: str) -> asyncio.Queue:
+        if queue_name not in self._queues:
+            self._queues[queue_name] = asyncio.Queue()
+        return self._queues[queue_name]
+
+    async def publish(self, queue_name: str, body: bytes, headers: dict | None = None) -> None:
+        self._queue(queue_name).put_nowait(InProcessMessage(body, headers))
+
+    async def publish_confirmed(self, queue_name: str, body: bytes, headers: dict | None = None) -> None:
+        await self.publish(queue_name, body, headers)
+
+    def subscribe(self, queue_name: str, handler: Handler) -> None:
+        self._handlers[queue_name] = handler
+
+    def subscribe_batch(self, queue_name: str, handler: BatchHandler,
+                        max_size: int = settings.CONSUMER_BATCH_MAX_SIZE,
+                        max_wait_ms: int = settings.CONSUMER_BATCH_MAX_WAIT_MS) -> None:
+        self._batch_handlers[queue_name] = (handler, max_size, max_wait_ms)
+
+    async def start(self) -> None:
+        for queue_name in [*self._handlers, *self._batch_handlers]:
+            self._tasks += [asyncio.create_task(self._run_worker(queue_name)) for _ in range(self.workers)]
+
+    async def close(self) -> None:
+        subscribed = [self._queue(name) for name in [*self._handlers, *self._batch_handlers]]
+        try:
+            await asyncio.wait_for(asyncio.gather(*[queue.join() for queue in subscribed]),
+                                   settings.CONSUMER_DRAIN_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            logger.warning("Dropping %s queued in-process events",
+                           sum(queue.qsize() for queue in subscribed) + len(self._delayed))
+
+        for task in [*self._tasks, *self._delayed]:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _run_worker(self, queue_name: str) -> None:
+        queue = self._queue(queue_name)
+        loop = asyncio.get_running_loop()
+        while True:
+            messages = [await queue.get()]
+            if queue_name in self._batch_handlers:
+                handler, max_size, max_wait_ms = self._batch_handlers[queue_name]
+                deadline = loop.time() + max_wait_ms / 1000
+                while len(messages) < max_size:
+                    try:
+                        messages.append(await asyncio.wait_for(queue.get(), deadline - loop.time()))
+                    except asyncio.TimeoutError:
+                        break
+            delayed = 0
+            try:
+                delayed = await self._handle(queue_name, messages)
+            finally:
+                for _ in range(len(messages) - delayed):
+                    queue.task_done()
+
+    async def _handle(self, queue_name: str, messages: list[InProcessMessage]) -> int:
+        """Handle messages and return how many were scheduled for a delayed retry."""
+        attributes = {"queue": queue_name}
+        redelivered = sum(message.redelivered for message in messages)
+        if redelivered:
+            redelivered_counter.add(redelivered, attributes)
+
+        start_time = time.perf_counter()
+        if queue_name in self._batch_handlers:
+            results = await invoke_batch_handler(self._batch_handlers[queue_name][0], messages)
+            batch_size_histogram.record(len(messages), attributes)
+        else:
+            results = [await invoke_handler(self._handlers[queue_name], messages[0])]
+        handler_latency_histogram.record((time.perf_counter() - start_time) * 1000, attributes)
+
+        delayed = 0
+        for message, result in zip(messages, results):
+            if isinstance(result, BaseException):
+                logger.warning("Handler for %s failed: %s", queue_name, result)
+                delayed += self._retry(queue_name, message, result)
+                processed_counter.add(1, {**attributes, "outcome": "failed"})
+            else:
+                processed_counter.add(1, {**attributes, "outcome": "ok"})
+        return delayed
+
+    def _retry(self, queue_name: str, message: InProcessMessage, error: BaseException) -> bool:
+        destination, delay_ms = next_destination(queue_name, message.headers, self.retry_delays_ms)
+        copy = InProcessMessage(message.body, failure_headers(message.headers, error))
+        if delay_ms is None:
+            logger.error("Dead-lettered a message from %s after %s retries", queue_name, len(self.retry_delays_ms))
+            dead_lettered_counter.add(1, {"queue": queue_name})
+            self._queue(destination).put_nowait(copy)
+            return False
+
+        retried_counter.add(1, {"queue": queue_name, "delay_ms": delay_ms})
+        task = asyncio.create_task(self._requeue_later(self._queue(queue_name), copy, delay_ms))
+        self._delayed.add(task)
+        task.add_done_callback(self._delayed.discard)
+        return True
+
+    @staticmethod
+    async def _requeue_later(queue: asyncio.Queue, message: InProcessMessage, delay_ms: int) -> None:
+        await asyncio.sleep(delay_ms / 1000)
+        queue.put_nowait(message)
+        # The failed delivery stays unfinished until its retry is queued, so
+        # close() keeps draining while retries wait out their delay
+        queue.task_done()
+
+
+def create_event_bus(backend: str = settings.EVENT_BUS_BACKEND) -> EventBus:
+    if backend == "inprocess":
+        return InProcessEventBus()
+    if backend == "amqp":
+        return AmqpEventBus()
+    raise ValueError(f"Unknown EVENT_BUS_BACKEND: {backend}")
+
+
+event_bus = create_event_bus()
@@ -1,25 +1,74 @@
 import asyncio
-import json
-from aio_pika import connect_robust, IncomingMessage
+import signal
+
+from aio_pika import IncomingMessage
+from sqlmodel import select
+
 from app.config import settings
-from app.instrumentation.tracing import get_tracers
+from app.db import async_session
+from app.events.bus import AmqpEventBus, EventBus
+from app.events.schemas import decode_event
+from app.events.sharding import shard_queue
+from app.instrumentation.metrics import init_metrics
+from app.models.users import Users
+from app.utils.logger import get_logger
+
+logger = get_logger("app.events.consumer")
+
+
+async def handle_user_created(messages: list[IncomingMessage]) -> list[Exception | None]:
+    results: list[Exception | None] = []
+    user_ids = []
+    for message in messages:
+        try:
+            # Accepts JSON and msgpack events, and the legacy ones published before the registry
+            user_ids.append(decode_event("user.created", message.body, message.headers).id)
+            results.append(None)
+        except ValueError as e:
+            results.append(e)
+
+    if not user_ids:
+        return results
+
+    # One query for the whole batch instead of one per message
+    async with async_session() as session:
+        users = (await session.execute(select(Users).where(Users.id.in_(user_ids)))).scalars().all()
+
+    for user in users:
+        # Example: send welcome email, etc.
+        logger.info("New user created: %s", user.id)
+    return results
+
+
+def subscribe_handlers(bus: EventBus, shards: list[int] | None = None) -> None:
+    """Subscribe the event handlers, to the given shards or else to every queue the outbox publishes to."""
+    if shards is None and settings.EVENT_SHARDS > 1:
+        shards = list(range(settings.EVENT_SHARDS))
+    if shards is None:
+        bus.subscribe_batch("user.created", handle_user_created)
+    for shard in shards or []:
+        bus.subscribe_batch(shard_queue("user.created", shard), handle_user_created)
+
+
+async def main(worker_index: int | None = None, shards: list[int] | None = None):
+    """Consume from RabbitMQ until SIGINT or SIGTERM, then drain.
 
+    Supervised workers pass their index and the user.created shards they own
+    (see app.events.supervisor); a standalone consumer takes every shard.
+    """
+    init_metrics({"service.instance.id": f"consumer-{worker_index}"} if worker_index is not None else None)
+    bus = AmqpEventBus()
+    subscribe_handlers(bus, shards)
+    await bus.start()
 
-async def handle_user_created(message: IncomingMessage) -> None:
-    with message.process():
-        payload = json.loads(message.body)
-        user_id = payload.get("id")
-        with get_tracers().start_as_current_span("consumer.user_created"):
-            # Example: fetch user, send welcome email, etc.
-            print(f"[Consumer] New user created: {user_id}")
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    await stop.wait()
 
-async def main():
-    connection = await connect_robust(settings.RABBITMQ_URL)
-    channel = await connection.channel()
-    queue = await channel.declare_queue("user.created", durable=True)
-    await queue.consume(handle_user_created)
-    print(" [*] Waiting for user.created messages. To exit press CTRL+C")
-    await asyncio.Future()  # run forever
+    logger.info("Draining in-flight messages...")
+    await bus.close()
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
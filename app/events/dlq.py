@@ -0,0 +1,106 @@
+"""Inspect and replay dead-lettered events.
+
+    python -m app.events.dlq inspect user.created --limit 20
+    python -m app.events.dlq replay user.created
+"""
+import argparse
+import asyncio
+import json
+
+import aio_pika
+
+from app.config import settings
+from app.events.retry import LAST_ERROR_HEADER, RETRY_COUNT_HEADER, dead_letter_queue_name, retry_count
+from app.events.schemas import EVENT_TYPE_HEADER, decode_event
+
+
+def describe(message: aio_pika.IncomingMessage, queue_name: str) -> dict:
+    headers = message.headers or {}
+    try:
+        # Legacy events carry no type header and are named after their queue
+        body = decode_event(headers.get(EVENT_TYPE_HEADER, queue_name), message.body, headers).model_dump(mode="json")
+    except ValueError:
+        body = message.body[:200].decode("utf-8", errors="replace")
+    return {
+        "message_id": message.message_id,
+        "timestamp": message.timestamp.isoformat() if message.timestamp else None,
+        "retries": retry_count(headers),
+        "last_error": headers.get(LAST_ERROR_HEADER),
+        "body": body,
+    }
+
+
+def replayed_copy(message: aio_pika.IncomingMessage) -> aio_pika.Message:
+    # A replayed message starts over with the full set of retry tiers
+    headers = {key: value for key, value in (message.headers or {}).items()
+               if key not in (RETRY_COUNT_HEADER, LAST_ERROR_HEADER)}
+    return aio_pika.Message(
+        body=message.body,
+        headers=headers,
+        content_type=message.content_type,
+        content_encoding=message.content_encoding,
+        message_id=message.message_id,
+        timestamp=message.timestamp,
+        type=message.type,
+        delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+    )
+
+
+async def inspect(channel, queue_name: str, limit: int) -> None:
+    dlq = await channel.declare_queue(dead_letter_queue_name(queue_name), durable=True)
+    print(f"{dlq.declaration_result.message_count} messages in {dlq.name}")
+    for _ in range(limit):
+        message = await dlq.get(no_ack=False, fail=False)
+        if message is None:
+            break
+        print(json.dumps(describe(message, queue_name)))
+    # The messages are left unacknowledged and return to the DLQ when the channel closes
+
+
+async def replay(channel, queue_name: str, limit: int | None) -> None:
+    dlq = await channel.declare_queue(dead_letter_queue_name(queue_name), durable=True)
+    # Bounded by the depth at start, so messages that fail again are not replayed twice
+    remaining = dlq.declaration_result.message_count
+    if limit is not None:
+        remaining = min(remaining, limit)
+
+    replayed = 0
+    while remaining > 0:
+        batch = []
+        while len(batch) < min(remaining, settings.RABBITMQ_CONFIRM_BATCH_SIZE):
+            message = await dlq.get(no_ack=False, fail=False)
+            if message is None:
+                break
+            batch.append(message)
+        if not batch:
+            break
+
+        # Confirmed by the broker before the dead letters are acknowledged
+        await asyncio.gather(*[
+            channel.default_exchange.publish(replayed_copy(message), routing_key=queue_name) for message in batch
+        ])
+        await batch[-1].ack(multiple=True)
+        replayed += len(batch)
+        remaining -= len(batch)
+    print(f"Replayed {replayed} messages from {dlq.name} to {queue_name}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Inspect or replay a dead-letter queue")
+    parser.add_argument("command", choices=["inspect", "replay"])
+    parser.add_argument("queue", help="work queue whose DLQ to use, e.g. user.created")
+    parser.add_argument("--limit", type=int, default=None,
+                        help="maximum number of messages (inspect defaults to 20, replay to all)")
+    args = parser.parse_args()
+
+    connection = await aio_pika.connect(settings.RABBITMQ_URL)
+    async with connection:
+        channel = await connection.channel(publisher_confirms=True)
+        if args.command == "inspect":
+            await inspect(channel, args.queue, args.limit or 20)
+        else:
+            await replay(channel, args.queue, args.limit)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
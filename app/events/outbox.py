@@ -0,0 +1,118 @@
+import asyncio
+import time
+
+from opentelemetry.metrics import CallbackOptions, Observation
+from sqlalchemy import delete, text
+
+from app.config import settings
+from app.db import engine
+from app.events.bus import event_bus
+from app.instrumentation.metrics import get_meter
+from app.models.outbox import OutboxEvents
+from app.utils.logger import get_logger
+
+logger = get_logger("app.events.outbox")
+
+# SKIP LOCKED lets every replica relay concurrently without publishing the same row twice
+CLAIM_STATEMENT = text("""
+    SELECT id, queue_name, payload, headers, created_at FROM outboxevents
+    ORDER BY id
+    LIMIT :batch_size
+    FOR UPDATE SKIP LOCKED
+""")
+
+
+class OutboxRelay:
+    """Publishes rows of the outbox table to the event bus with at-least-once delivery.
+
+    Rows are claimed in batches of OUTBOX_BATCH_SIZE, published with publisher
+    confirms and deleted in the same transaction that locked them, so a crash
+    before the commit only means the batch is published again. The relay polls
+    every OUTBOX_POLL_INTERVAL_MS and is woken immediately by notify() when this
+    process has just written an event.
+    """
+
+    def __init__(self):
+        self._task: asyncio.Task | None = None
+        self._wakeup = asyncio.Event()
+        self.oldest_pending_age = 0.0
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def notify(self) -> None:
+        self._wakeup.set()
+
+    async def relay(self) -> int:
+        """Publish and delete one batch of outbox rows, returning how many were confirmed."""
+        async with engine.begin() as conn:
+            rows = (await conn.execute(CLAIM_STATEMENT, {"batch_size": settings.OUTBOX_BATCH_SIZE})).all()
+            if not rows:
+                self.oldest_pending_age = 0.0
+                return 0
+            now = time.time()
+            self.oldest_pending_age = now - rows[0].created_at.timestamp()
+
+            results = await asyncio.gather(*[
+                event_bus.publish_confirmed(row.queue_name, row.payload, row.headers) for row in rows
+            ], return_exceptions=True)
+
+            published = []
+            for row, result in zip(rows, results):
+                if isinstance(result, BaseException):
+                    logger.warning("Relaying outbox event %s to %s failed: %s", row.id, row.queue_name, result)
+                    continue
+                published.append(row.id)
+                lag_histogram.record((now - row.created_at.timestamp()) * 1000, {"queue": row.queue_name})
+
+            if published:
+                await conn.execute(delete(OutboxEvents).where(OutboxEvents.id.in_(published)))
+        published_counter.add(len(published))
+        return len(published)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), settings.OUTBOX_POLL_INTERVAL_MS / 1000)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                while await self.relay() == settings.OUTBOX_BATCH_SIZE:
+                    pass
+            except Exception as e:
+                logger.warning("Outbox relay failed: %s", e)
+
+
+outbox_relay = OutboxRelay()
+
+
+def _observe_oldest_pending(options: CallbackOptions):
+    return [Observation(outbox_relay.oldest_pending_age)]
+
+
+meter = get_meter()
+
+lag_histogram = meter.create_histogram(
+    "outbox.relay.lag",
+    unit="ms",
+    description="Time from writing an outbox row until the broker confirmed it",
+)
+
+published_counter = meter.create_counter(
+    "outbox.relay.published",
+    description="Outbox events confirmed by the broker and removed from the outbox",
+)
+
+meter.create_observable_gauge(
+    "outbox.relay.oldest_pending_age",
+    unit="s",
+    callbacks=[_observe_oldest_pending],
+    description="Age of the oldest outbox row seen by the last relay pass",
+)
@@ -1,11 +1,30 @@
+import asyncio
+import time
+
 import aio_pika
+from opentelemetry.metrics import CallbackOptions, Observation
 from tenacity import retry, wait_fixed, stop_after_attempt
 
 from app.config import settings
+from app.instrumentation.metrics import get_meter
+from app.utils.logger import get_logger
+
+logger = get_logger("app.events.rabbitmq")
 
 
 class RabbitMQClient:
+    """Publishes through a pool of long-lived channels with batched publisher confirms.
+
+    ``publish`` only appends to a bounded in-memory buffer and waits only when the
+    buffer is full. One publisher task per channel drains the buffer, publishes
+    up to RABBITMQ_CONFIRM_BATCH_SIZE messages concurrently and awaits their
+    confirms together.
+    """
     _connection = None
+    _buffer: asyncio.Queue | None = None
+    _publishers: list[asyncio.Task] = []
+    _declared_queues: set[str] = set()
+    _start_lock = asyncio.Lock()
 
     @classmethod
     @retry(wait=wait_fixed(2), stop=stop_after_attempt(5))
@@ -15,10 +34,120 @@ class RabbitMQClient:
         return cls._connection
 
     @staticmethod
-    async def publish(queue_name: str, message_body: bytes):
-        conn = await RabbitMQClient.get_connection()
-        channel = await conn.channel()
-        queue = await channel.declare_queue(queue_name, durable=True)
-        await channel.default_exchange.publish(
-            aio_pika.Message(body=message_body), routing_key=queue.name
-        )
+    async def publish(queue_name: str, message_body: bytes, headers: dict | None = None) -> None:
+        """Queue a message for publishing; waits only while the buffer is full."""
+        await RabbitMQClient._enqueue(queue_name, message_body, headers, None)
+
+    @staticmethod
+    async def publish_confirmed(queue_name: str, message_body: bytes, headers: dict | None = None) -> None:
+        """Publish a message and wait until the broker has confirmed it."""
+        confirmed = asyncio.get_running_loop().create_future()
+        await RabbitMQClient._enqueue(queue_name, message_body, headers, confirmed)
+        await confirmed
+
+    @classmethod
+    async def close(cls) -> None:
+        """Publish everything still buffered, then close the channels and connection."""
+        if cls._buffer is not None:
+            try:
+                await asyncio.wait_for(cls._buffer.join(), settings.RABBITMQ_DRAIN_TIMEOUT_SECONDS)
+            except asyncio.TimeoutError:
+                logger.error("Dropping %s unpublished messages on shutdown", cls._buffer.qsize())
+        for publisher in cls._publishers:
+            publisher.cancel()
+        await asyncio.gather(*cls._publishers, return_exceptions=True)
+        cls._publishers = []
+        cls._buffer = None
+        if cls._connection is not None:
+            await cls._connection.close()
+            cls._connection = None
+        cls._declared_queues.clear()
+
+    @classmethod
+    async def _enqueue(cls, queue_name: str, message_body: bytes, headers: dict | None,
+                       confirmed: asyncio.Future | None) -> None:
+        await cls._start()
+        await cls._buffer.put((queue_name, message_body, headers, confirmed, time.perf_counter()))
+
+    @classmethod
+    async def _start(cls) -> None:
+        if cls._buffer is not None:
+            return
+        async with cls._start_lock:
+            if cls._buffer is not None:
+                return
+            conn = await cls.get_connection()
+            channels = [await conn.channel(publisher_confirms=True)
+                        for _ in range(settings.RABBITMQ_CHANNEL_POOL_SIZE)]
+            cls._publishers = [asyncio.create_task(cls._run_publisher(channel)) for channel in channels]
+            cls._buffer = asyncio.Queue(maxsize=settings.RABBITMQ_PUBLISH_BUFFER_SIZE)
+
+    @classmethod
+    async def _run_publisher(cls, channel) -> None:
+        while True:
+            batch = [await cls._buffer.get()]
+            while len(batch) < settings.RABBITMQ_CONFIRM_BATCH_SIZE and not cls._buffer.empty():
+                batch.append(cls._buffer.get_nowait())
+            try:
+                await cls._publish_batch(channel, batch)
+            except Exception as e:
+                logger.error("Publishing a batch of %s messages failed: %s", len(batch), e)
+                for queue_name, _, _, confirmed, _ in batch:
+                    failed_counter.add(1, {"queue": queue_name})
+                    if confirmed is not None and not confirmed.done():
+                        confirmed.set_exception(e)
+            finally:
+                for _ in batch:
+                    cls._buffer.task_done()
+
+    @classmethod
+    async def _publish_batch(cls, channel, batch: list) -> None:
+        for queue_name in {item[0] for item in batch} - cls._declared_queues:
+            await channel.declare_queue(queue_name, durable=True)
+            cls._declared_queues.add(queue_name)
+
+        results = await asyncio.gather(*[
+            channel.default_exchange.publish(
+                aio_pika.Message(body=body, headers=headers, delivery_mode=aio_pika.DeliveryMode.PERSISTENT),
+                routing_key=queue_name,
+            )
+            for queue_name, body, headers, _, _ in batch
+        ], return_exceptions=True)
+
+        for (queue_name, _, _, confirmed, enqueued_at), result in zip(batch, results):
+            confirm_latency_histogram.record((time.perf_counter() - enqueued_at) * 1000, {"queue": queue_name})
+            if isinstance(result, BaseException):
+                failed_counter.add(1, {"queue": queue_name})
+                if confirmed is None:
+                    logger.error("Publishing to %s failed: %s", queue_name, result)
+            if confirmed is not None and not confirmed.done():
+                if isinstance(result, BaseException):
+                    confirmed.set_exception(result)
+                else:
+                    confirmed.set_result(None)
+
+
+def _observe_buffer(options: CallbackOptions):
+    if RabbitMQClient._buffer is None:
+        return []
+    return [Observation(RabbitMQClient._buffer.qsize())]
+
+
+meter = get_meter()
+
+confirm_latency_histogram = meter.create_histogram(
+    "rabbitmq.publish.confirm_latency",
+    unit="ms",
+    description="Time from publish() until the broker confirmed the message",
+)
+
+failed_counter = meter.create_counter(
+    "rabbitmq.publish.failed",
+    description="Messages the broker did not confirm",
+)
+
+meter.create_observable_gauge(
+    "rabbitmq.publish.buffer_depth",
+    callbacks=[_observe_buffer],
+    description="Messages waiting in the in-memory publish buffer",
+)
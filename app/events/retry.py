@@ -0,0 +1,70 @@
+import aio_pika
+
+from app.config import settings
+
+RETRY_COUNT_HEADER = "x-retry-count"
+LAST_ERROR_HEADER = "x-last-error"
+
+
+def retry_queue_name(queue_name: str, delay_ms: int) -> str:
+    return f"{queue_name}.retry.{delay_ms}ms"
+
+
+def dead_letter_queue_name(queue_name: str) -> str:
+    return f"{queue_name}.dlq"
+
+
+def retry_count(headers: dict | None) -> int:
+    return int((headers or {}).get(RETRY_COUNT_HEADER, 0))
+
+
+def next_destination(queue_name: str, headers: dict | None,
+                     delays_ms: list[int] = settings.CONSUMER_RETRY_DELAYS_MS) -> tuple[str, int | None]:
+    """Return where a failed message goes next and its delay, or None for the DLQ.
+
+    Each failure moves the message one tier further along CONSUMER_RETRY_DELAYS_MS;
+    once every tier has been tried it is parked in the dead-letter queue.
+    """
+    attempt = retry_count(headers)
+    if attempt < len(delays_ms):
+        return retry_queue_name(queue_name, delays_ms[attempt]), delays_ms[attempt]
+    return dead_letter_queue_name(queue_name), None
+
+
+def failure_headers(headers: dict | None, error: BaseException) -> dict:
+    return {
+        **(headers or {}),
+        RETRY_COUNT_HEADER: retry_count(headers) + 1,
+        LAST_ERROR_HEADER: f"{type(error).__name__}: {error}"[:512],
+    }
+
+
+async def declare_retry_topology(channel, queue_name: str,
+                                 delays_ms: list[int] = settings.CONSUMER_RETRY_DELAYS_MS) -> None:
+    """Declare the delay tiers and the dead-letter queue behind queue_name.
+
+    A delay tier holds messages for its TTL and then dead-letters them through
+    the default exchange back onto queue_name. The work queue itself keeps its
+    arguments, so existing deployments do not have to redeclare it.
+    """
+    for delay_ms in delays_ms:
+        await channel.declare_queue(retry_queue_name(queue_name, delay_ms), durable=True, arguments={
+            "x-message-ttl": delay_ms,
+            "x-dead-letter-exchange": "",
+            "x-dead-letter-routing-key": queue_name,
+        })
+    await channel.declare_queue(dead_letter_queue_name(queue_name), durable=True)
+
+
+def failed_copy(message, error: BaseException) -> aio_pika.Message:
+    """Copy a failed message, keeping its properties and recording the failure."""
+    return aio_pika.Message(
+        body=message.body,
+        headers=failure_headers(message.headers, error),
+        content_type=message.content_type,
+        content_encoding=message.content_encoding,
+        message_id=message.message_id,
+        timestamp=message.timestamp,
+        type=message.type,
+        delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+    )
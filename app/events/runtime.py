@@ -0,0 +1,315 @@
+import asyncio
+import time
+from collections import deque
+from functools import partial
+from typing import Awaitable, Callable, Sequence
+
+from aio_pika import IncomingMessage, connect_robust
+from opentelemetry.trace import Status, StatusCode
+
+from app.config import settings
+from app.instrumentation.metrics import get_meter
+from app.events.retry import declare_retry_topology, failed_copy, next_destination
+from app.instrumentation.tracing import get_tracers
+from app.utils.logger import get_logger
+
+logger = get_logger("app.events.runtime")
+
+Handler = Callable[[IncomingMessage], Awaitable[None]]
+# Returns one result per message: None when it was handled, the exception when it failed
+BatchHandler = Callable[[list[IncomingMessage]], Awaitable[Sequence[BaseException | None] | None]]
+
+
+async def invoke_handler(handler: Handler, message) -> BaseException | None:
+    try:
+        await handler(message)
+    except Exception as e:
+        return e
+    return None
+
+
+async def invoke_batch_handler(handler: BatchHandler, messages: list) -> Sequence[BaseException | None]:
+    """Run a batch handler and return exactly one result per message."""
+    try:
+        results = await handler(messages)
+    except Exception as e:
+        return [e] * len(messages)
+    if results is None:
+        return [None] * len(messages)
+    if len(results) != len(messages):
+        return [ValueError(f"Batch handler returned {len(results)} results for {len(messages)} messages")] \
+            * len(messages)
+    return results
+
+
+class AckTracker:
+    """Turns out-of-order handler completions into cumulative acknowledgements.
+
+    Deliveries are tracked in delivery-tag order. release() advances over the
+    settled prefix and returns the item of the highest acknowledged tag in it,
+    so a single ack with multiple=True covers the whole prefix. A gap left by a
+    message still being handled stops the prefix, which keeps a cumulative ack
+    from ever covering unfinished work.
+    """
+
+    def __init__(self):
+        self._delivered: deque = deque()
+        self._settled: dict[int, bool] = {}
+        self.unflushed = 0
+
+    def __len__(self) -> int:
+        return len(self._delivered)
+
+    def track(self, tag: int, item) -> None:
+        self._delivered.append((tag, item))
+
+    def settle(self, tag: int, acked: bool) -> None:
+        self._settled[tag] = acked
+        if acked:
+            self.unflushed += 1
+
+    def release(self):
+        last_acked = None
+        while self._delivered and self._delivered[0][0] in self._settled:
+            tag, item = self._delivered.popleft()
+            if self._settled.pop(tag):
+                last_acked = item
+                self.unflushed -= 1
+        return last_acked
+
+
+class ConsumerRuntime:
+    """Consumes RabbitMQ queues with a bounded pool of asyncio workers.
+
+    The channel prefetch (CONSUMER_PREFETCH) bounds how many unacknowledged
+    messages are in flight, and CONSUMER_WORKERS handlers run concurrently.
+    Successful messages are acknowledged cumulatively, every
+    CONSUMER_ACK_BATCH_SIZE messages or CONSUMER_ACK_INTERVAL_MS. A failed
+    message is republished to the next delay tier of CONSUMER_RETRY_DELAYS_MS,
+    or to the queue's dead-letter queue once the tiers are used up, and then
+    acknowledged (see app.events.retry). stop() cancels the consumers and waits
+    for in-flight messages before acknowledging them and closing the connection.
+
+    Queues registered with register_batch() are handed to their handler in
+    micro-batches of up to max_size messages, collected for at most max_wait_ms
+    after the first one arrives. The prefetch caps how many messages can be
+    outstanding at once, so it should be at least the largest max_size.
+    """
+
+    def __init__(self, prefetch: int = settings.CONSUMER_PREFETCH, workers: int = settings.CONSUMER_WORKERS):
+        self.prefetch = prefetch
+        self.workers = workers
+        self._handlers: dict[str, Handler] = {}
+        self._batch_handlers: dict[str, tuple[BatchHandler, int, int]] = {}
+        self._pending: dict[str, asyncio.Queue] = {}
+        self._queues: dict = {}
+        self._consumer_tags: dict[str, str] = {}
+        self._connection = None
+        self._channel = None
+        self._work: asyncio.Queue | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._acks = AckTracker()
+        self._ack_lock = asyncio.Lock()
+        self._tracer = None
+
+    def register(self, queue_name: str, handler: Handler) -> None:
+        self._handlers[queue_name] = handler
+
+    def register_batch(self, queue_name: str, handler: BatchHandler,
+                       max_size: int = settings.CONSUMER_BATCH_MAX_SIZE,
+                       max_wait_ms: int = settings.CONSUMER_BATCH_MAX_WAIT_MS) -> None:
+        """Register a handler that receives a list of messages.
+
+        The handler returns one entry per message, in order: None when the
+        message was handled and an exception when it failed, so only the
+        failed messages are rejected. Returning None marks the whole batch as
+        handled and raising fails the whole batch. Failed messages go through
+        the same retry tiers as single messages.
+        """
+        self._batch_handlers[queue_name] = (handler, max_size, max_wait_ms)
+
+    async def start(self) -> None:
+        self._tracer = await get_tracers()
+        self._connection = await connect_robust(settings.RABBITMQ_URL)
+        self._channel = channel = await self._connection.channel()
+        await channel.set_qos(prefetch_count=self.prefetch)
+        channel.reopen_callbacks.add(self._on_reopen)
+
+        self._work = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._run_worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._run_ack_flusher()))
+        for queue_name, (_, max_size, max_wait_ms) in self._batch_handlers.items():
+            self._pending[queue_name] = asyncio.Queue()
+            self._tasks.append(asyncio.create_task(self._run_batcher(queue_name, max_size, max_wait_ms)))
+
+        for queue_name in [*self._handlers, *self._batch_handlers]:
+            queue = await channel.declare_queue(queue_name, durable=True)
+            await declare_retry_topology(channel, queue_name)
+            self._queues[queue_name] = queue
+            self._consumer_tags[queue_name] = await queue.consume(partial(self._on_message, queue_name))
+        logger.info("Consuming %s with prefetch %s and %s workers", list(self._queues), self.prefetch, self.workers)
+
+    async def stop(self) -> None:
+        for queue_name, consumer_tag in self._consumer_tags.items():
+            await self._queues[queue_name].cancel(consumer_tag)
+        self._consumer_tags.clear()
+
+        try:
+            await asyncio.wait_for(self._drain(), settings.CONSUMER_DRAIN_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            # Unacknowledged messages are redelivered once the connection closes
+            logger.warning("Stopping with %s messages still in flight", len(self._acks))
+
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self.flush_acks()
+        await self._connection.close()
+
+    async def flush_acks(self) -> None:
+        # Serialized so a lower cumulative ack is never sent after a higher one
+        async with self._ack_lock:
+            message = self._acks.release()
+            if message is not None:
+                await message.ack(multiple=True)
+
+    async def _drain(self) -> None:
+        # Partial batches are flushed by their batcher within max_wait_ms
+        for pending in self._pending.values():
+            await pending.join()
+        await self._work.join()
+
+    def _on_reopen(self, *args) -> None:
+        # Delivery tags restart on a new channel and the broker requeues everything
+        # that was unacknowledged, so messages from the old channel are tracked apart
+        self._acks = AckTracker()
+
+    async def _on_message(self, queue_name: str, message: IncomingMessage) -> None:
+        self._acks.track(message.delivery_tag, message)
+        if queue_name in self._pending:
+            await self._pending[queue_name].put((message, self._acks))
+        else:
+            await self._work.put((queue_name, [(message, self._acks)]))
+
+    async def _run_batcher(self, queue_name: str, max_size: int, max_wait_ms: int) -> None:
+        pending = self._pending[queue_name]
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await pending.get()]
+            deadline = loop.time() + max_wait_ms / 1000
+            while len(batch) < max_size:
+                try:
+                    batch.append(await asyncio.wait_for(pending.get(), deadline - loop.time()))
+                except asyncio.TimeoutError:
+                    break
+            await self._work.put((queue_name, batch))
+            for _ in batch:
+                pending.task_done()
+
+    async def _run_worker(self) -> None:
+        while True:
+            queue_name, batch = await self._work.get()
+            try:
+                await self._handle(queue_name, batch)
+            except Exception as e:
+                logger.error("Settling messages from %s failed: %s", queue_name, e)
+            finally:
+                self._work.task_done()
+
+    async def _handle(self, queue_name: str, batch: list[tuple[IncomingMessage, AckTracker]]) -> None:
+        attributes = {"queue": queue_name}
+        messages = [message for message, _ in batch]
+        redelivered = sum(message.redelivered for message in messages)
+        if redelivered:
+            redelivered_counter.add(redelivered, attributes)
+
+        start_time = time.perf_counter()
+        with self._tracer.start_as_current_span("consumer.handle") as span:
+            span.set_attribute("messaging.destination.name", queue_name)
+            span.set_attribute("messaging.batch.message_count", len(messages))
+            if queue_name in self._batch_handlers:
+                results = await invoke_batch_handler(self._batch_handlers[queue_name][0], messages)
+                batch_size_histogram.record(len(messages), attributes)
+            else:
+                results = [await invoke_handler(self._handlers[queue_name], messages[0])]
+
+            for (message, acks), result in zip(batch, results):
+                if isinstance(result, BaseException):
+                    span.record_exception(result)
+                    span.set_status(Status(StatusCode.ERROR, str(result)))
+                    logger.warning("Handler for %s failed: %s", queue_name, result)
+                    await self._retry(queue_name, message, acks, result)
+                    processed_counter.add(1, {**attributes, "outcome": "failed"})
+                else:
+                    acks.settle(message.delivery_tag, acked=True)
+                    processed_counter.add(1, {**attributes, "outcome": "ok"})
+
+        handler_latency_histogram.record((time.perf_counter() - start_time) * 1000, attributes)
+        if self._acks.unflushed >= settings.CONSUMER_ACK_BATCH_SIZE:
+            await self.flush_acks()
+
+    async def _retry(self, queue_name: str, message: IncomingMessage, acks: AckTracker,
+                     error: BaseException) -> None:
+        try:
+            destination, delay_ms = next_destination(queue_name, message.headers)
+            # The channel confirms the copy before the original is acknowledged
+            await self._channel.default_exchange.publish(failed_copy(message, error), routing_key=destination)
+        except Exception as e:
+            logger.error("Moving a failed message out of %s failed: %s", queue_name, e)
+            # Rejected before it is settled, so no cumulative ack can cover it
+            try:
+                await message.nack(requeue=True)
+            finally:
+                acks.settle(message.delivery_tag, acked=False)
+            return
+
+        acks.settle(message.delivery_tag, acked=True)
+        if delay_ms is None:
+            logger.error("Dead-lettered a message from %s after %s retries", queue_name,
+                         len(settings.CONSUMER_RETRY_DELAYS_MS))
+            dead_lettered_counter.add(1, {"queue": queue_name})
+        else:
+            retried_counter.add(1, {"queue": queue_name, "delay_ms": delay_ms})
+
+    async def _run_ack_flusher(self) -> None:
+        while True:
+            await asyncio.sleep(settings.CONSUMER_ACK_INTERVAL_MS / 1000)
+            try:
+                await self.flush_acks()
+            except Exception as e:
+                logger.warning("Flushing acknowledgements failed: %s", e)
+
+
+meter = get_meter()
+
+processed_counter = meter.create_counter(
+    "consumer.messages.processed",
+    description="Messages handled by the consumer runtime, by queue and outcome",
+)
+
+handler_latency_histogram = meter.create_histogram(
+    "consumer.handler.latency",
+    unit="ms",
+    description="Time spent in the message handler",
+)
+
+redelivered_counter = meter.create_counter(
+    "consumer.messages.redelivered",
+    description="Messages the broker delivered again after a reject or a lost consumer",
+)
+
+batch_size_histogram = meter.create_histogram(
+    "consumer.batch.size",
+    description="Messages passed to a batch handler per call",
+)
+
+retried_counter = meter.create_counter(
+    "consumer.messages.retried",
+    description="Failed messages moved to a delayed retry tier",
+)
+
+dead_lettered_counter = meter.create_counter(
+    "consumer.messages.dead_lettered",
+    description="Failed messages parked in a dead-letter queue after the last retry tier",
+)
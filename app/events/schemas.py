@@ -0,0 +1,69 @@
+import json
+
+import msgpack
+from pydantic import BaseModel
+
+from app.config import settings
+from app.schemas.events import UserCreated
+
+CONTENT_TYPE_HEADER = "content_type"
+EVENT_TYPE_HEADER = "x-event-type"
+SCHEMA_VERSION_HEADER = "x-schema-version"
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+
+# (event type, schema version) -> model; a new version is registered next to the old
+# ones so consumers keep decoding events that are still in flight
+_schemas: dict[tuple[str, int], type[BaseModel]] = {}
+_current: dict[type[BaseModel], tuple[str, int]] = {}
+
+
+def register(event_type: str, version: int, model: type[BaseModel]) -> None:
+    """Register model as version of event_type; the highest version is the one published."""
+    _schemas[(event_type, version)] = model
+    if model not in _current or _current[model][1] < version:
+        _current[model] = (event_type, version)
+
+
+register("user.created", 1, UserCreated)
+
+
+def encode_event(event: BaseModel, content_type: str = settings.EVENT_CONTENT_TYPE) -> tuple[bytes, dict]:
+    """Serialize event and return the body with the headers that describe it."""
+    event_type, version = _current[type(event)]
+    payload = event.model_dump(mode="json")
+    if content_type == MSGPACK:
+        body = msgpack.packb(payload)
+    elif content_type == JSON:
+        body = json.dumps(payload, separators=(",", ":")).encode()
+    else:
+        raise ValueError(f"Unsupported event content type: {content_type}")
+    return body, {
+        CONTENT_TYPE_HEADER: content_type,
+        EVENT_TYPE_HEADER: event_type,
+        SCHEMA_VERSION_HEADER: version,
+    }
+
+
+def decode_event(event_type: str, body: bytes, headers: dict | None) -> BaseModel:
+    """Deserialize an event of event_type, raising ValueError when it cannot be read.
+
+    Messages without headers are legacy JSON events of schema version 1.
+    """
+    headers = headers or {}
+    content_type = headers.get(CONTENT_TYPE_HEADER, JSON)
+    version = int(headers.get(SCHEMA_VERSION_HEADER, 1))
+    model = _schemas.get((headers.get(EVENT_TYPE_HEADER, event_type), version))
+    if model is None:
+        raise ValueError(f"Unknown schema version {version} for {event_type}")
+
+    if content_type not in (MSGPACK, JSON):
+        raise ValueError(f"Unsupported event content type: {content_type}")
+
+    try:
+        payload = msgpack.unpackb(body) if content_type == MSGPACK else json.loads(body)
+        return model.model_validate(payload)
+    except (ValueError, TypeError, msgpack.UnpackException) as e:
+        # ValidationError and JSONDecodeError are ValueErrors too
+        raise ValueError(f"Malformed {event_type} event: {e}") from e
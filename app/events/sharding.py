@@ -0,0 +1,31 @@
+from app.config import settings
+
+
+def jump_hash(key: int, buckets: int) -> int:
+    """Map key to one of buckets with Lamping and Veach's jump consistent hash.
+
+    Growing from n to n + 1 buckets moves only about 1/(n + 1) of the keys, all of
+    them into the new bucket.
+    """
+    key &= 0xFFFFFFFFFFFFFFFF
+    bucket, jump = -1, 0
+    while jump < buckets:
+        bucket = jump
+        key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        jump = int((bucket + 1) * (float(1 << 31) / float((key >> 33) + 1)))
+    return bucket
+
+
+def shard_queue(queue_name: str, shard: int) -> str:
+    return f"{queue_name}.{shard}"
+
+
+def queue_for(queue_name: str, key: int, shards: int = settings.EVENT_SHARDS) -> str:
+    """Return the queue that carries events for key.
+
+    With sharding enabled, every event for the same key (e.g. a user id) goes to
+    the same shard queue, which is consumed by a single worker process.
+    """
+    if shards <= 1:
+        return queue_name
+    return shard_queue(queue_name, jump_hash(key, shards))
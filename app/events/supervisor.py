@@ -0,0 +1,151 @@
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+import time
+
+from opentelemetry.metrics import CallbackOptions, Observation
+
+from app.config import settings
+from app.instrumentation.metrics import get_meter, init_metrics
+from app.utils.logger import get_logger
+
+logger = get_logger("app.events.supervisor")
+
+# Workers that stayed up this long reset their restart backoff
+STABLE_AFTER_SECONDS = 60
+MAX_BACKOFF_SECONDS = 30
+
+
+def assign_shards(shards: int, workers: int) -> list[list[int] | None]:
+    """Split shard ids round-robin over workers; None means the unsharded queue."""
+    if shards <= 1:
+        return [None] * workers
+    return [list(range(index, shards, workers)) for index in range(min(workers, shards))]
+
+
+def _run_worker(worker_index: int, shards: list[int] | None) -> None:
+    from app.events.consumer import main
+    asyncio.run(main(worker_index, shards))
+
+
+class Worker:
+    def __init__(self, index: int, shards: list[int] | None):
+        self.index = index
+        self.shards = shards
+        self.process: multiprocessing.Process | None = None
+        self.started_at = 0.0
+        self.restart_at = 0.0
+        self.backoff = settings.CONSUMER_RESTART_BACKOFF_SECONDS
+
+
+class ConsumerSupervisor:
+    """Runs consumer workers in separate processes and restarts the ones that die.
+
+    With EVENT_SHARDS set, each worker owns a disjoint set of user.created shard
+    queues, so all events for one user are handled by one process. Handlers
+    still run concurrently inside that process; strict per-user ordering also
+    needs CONSUMER_WORKERS=1. Workers export metrics under their own
+    service.instance.id, which the collector aggregates.
+    """
+
+    def __init__(self, processes: int, shards: int):
+        if shards > 1 and processes > shards:
+            logger.warning("Only %s of %s consumer workers get a shard", shards, processes)
+        self._context = multiprocessing.get_context("spawn")
+        self._workers = [Worker(index, assigned) for index, assigned in enumerate(assign_shards(shards, processes))]
+        self._stopping = False
+
+    def alive(self) -> int:
+        return sum(1 for worker in self._workers if worker.process and worker.process.is_alive())
+
+    def run(self) -> None:
+        signal.signal(signal.SIGTERM, self._request_stop)
+        signal.signal(signal.SIGINT, self._request_stop)
+        for worker in self._workers:
+            self._spawn(worker)
+
+        while not self._stopping:
+            now = time.monotonic()
+            for worker in self._workers:
+                if worker.process.is_alive() or worker.restart_at > now:
+                    continue
+                if worker.restart_at:
+                    self._spawn(worker)
+                    restarts_counter.add(1, {"worker": worker.index})
+                    continue
+                if now - worker.started_at > STABLE_AFTER_SECONDS:
+                    worker.backoff = settings.CONSUMER_RESTART_BACKOFF_SECONDS
+                logger.warning("Consumer worker %s exited with %s, restarting in %.1fs",
+                               worker.index, worker.process.exitcode, worker.backoff)
+                worker.restart_at = now + worker.backoff
+                worker.backoff = min(worker.backoff * 2, MAX_BACKOFF_SECONDS)
+            time.sleep(0.5)
+
+        self._shutdown()
+
+    def _spawn(self, worker: Worker) -> None:
+        worker.process = self._context.Process(target=_run_worker, args=(worker.index, worker.shards),
+                                               name=f"consumer-{worker.index}")
+        worker.process.start()
+        worker.started_at = time.monotonic()
+        worker.restart_at = 0.0
+        logger.info("Started consumer worker %s (pid %s, shards %s)", worker.index, worker.process.pid, worker.shards)
+
+    def _request_stop(self, signum, frame) -> None:
+        self._stopping = True
+
+    def _shutdown(self) -> None:
+        # Workers drain their in-flight messages on SIGTERM
+        for worker in self._workers:
+            if worker.process.is_alive():
+                worker.process.terminate()
+        deadline = time.monotonic() + settings.CONSUMER_DRAIN_TIMEOUT_SECONDS + 5
+        for worker in self._workers:
+            worker.process.join(max(deadline - time.monotonic(), 0))
+            if worker.process.is_alive():
+                logger.warning("Killing consumer worker %s after the drain timeout", worker.index)
+                worker.process.kill()
+                worker.process.join()
+
+
+supervisor: ConsumerSupervisor | None = None
+
+
+def _observe_workers(options: CallbackOptions):
+    if supervisor is None:
+        return []
+    return [Observation(supervisor.alive())]
+
+
+meter = get_meter()
+
+restarts_counter = meter.create_counter(
+    "consumer.supervisor.restarts",
+    description="Consumer worker processes restarted after exiting",
+)
+
+meter.create_observable_gauge(
+    "consumer.supervisor.workers_alive",
+    callbacks=[_observe_workers],
+    description="Consumer worker processes currently running",
+)
+
+
+def main():
+    global supervisor
+    parser = argparse.ArgumentParser(description="Run consumer workers under a supervisor")
+    parser.add_argument("--processes", type=int, default=settings.CONSUMER_PROCESSES or os.cpu_count(),
+                        help="number of consumer worker processes")
+    parser.add_argument("--shards", type=int, default=settings.EVENT_SHARDS,
+                        help="number of user.created shard queues; must match the publishers")
+    args = parser.parse_args()
+
+    init_metrics({"service.instance.id": "consumer-supervisor"})
+    supervisor = ConsumerSupervisor(args.processes, args.shards)
+    supervisor.run()
+
+
+if __name__ == "__main__":
+    main()
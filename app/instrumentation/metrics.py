@@ -0,0 +1,26 @@
+from opentelemetry import metrics
+from opentelemetry.exporter.otlp.proto.grpc.metric_exporter import OTLPMetricExporter
+from opentelemetry.sdk.metrics import MeterProvider
+from opentelemetry.sdk.metrics.export import PeriodicExportingMetricReader
+from opentelemetry.sdk.resources import Resource
+from app.config import settings
+
+def init_metrics(resource_attributes: dict | None = None) -> None:
+    """Initialize OpenTelemetry metrics export to the OTLP collector.
+
+    Processes that export side by side (e.g. supervised consumer workers) pass a
+    distinct service.instance.id so the collector can aggregate their series.
+    """
+    # Configure OTLP exporter
+    otlp_exporter = OTLPMetricExporter(
+        endpoint=settings.OTEL_EXPORTER_OTLP_ENDPOINT,
+        insecure=True,  # Set to False in production with TLS
+    )
+
+    # Periodically push collected metrics to the collector
+    metric_reader = PeriodicExportingMetricReader(otlp_exporter)
+    metrics.set_meter_provider(MeterProvider(metric_readers=[metric_reader],
+                                             resource=Resource.create(resource_attributes or {})))
+
+def get_meter():
+    return metrics.get_meter("app.instrumentation.metrics")
@@ -1,15 +1,86 @@
+import threading
+from collections import OrderedDict
+
 from opentelemetry import trace
+from opentelemetry.context import Context
 from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
-from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace import ReadableSpan, Span, SpanProcessor, TracerProvider
 from opentelemetry.sdk.trace.export import BatchSpanProcessor
+from opentelemetry.sdk.trace.sampling import ALWAYS_ON, ParentBased, TraceIdRatioBased
+from opentelemetry.trace import StatusCode
 from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
 from fastapi import FastAPI
 from app.config import settings
 
+
+class TailSamplingSpanProcessor(SpanProcessor):
+    """Buffers the spans of each trace and decides once its local root span ends.
+
+    A trace is exported when any of its spans failed, when the root took at
+    least slow_threshold_ms, or otherwise for the ratio of trace ids that the
+    head sampler would have kept. Spans ending after the decision follow it.
+    At most max_traces undecided traces are buffered; the oldest are dropped.
+    """
+
+    def __init__(self, delegate: SpanProcessor, ratio: float, slow_threshold_ms: float, max_traces: int):
+        self._delegate = delegate
+        self._ratio_bound = TraceIdRatioBased.get_bound_for_rate(ratio)
+        self._slow_threshold_ns = slow_threshold_ms * 1_000_000
+        self._max_traces = max_traces
+        self._pending: OrderedDict[int, list[ReadableSpan]] = OrderedDict()
+        self._decided: OrderedDict[int, bool] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def on_start(self, span: Span, parent_context: Context | None = None) -> None:
+        self._delegate.on_start(span, parent_context)
+
+    def on_end(self, span: ReadableSpan) -> None:
+        trace_id = span.context.trace_id
+        is_local_root = span.parent is None or span.parent.is_remote
+        with self._lock:
+            if trace_id in self._decided:
+                keep, spans = self._decided[trace_id], [span]
+            else:
+                spans = self._pending.setdefault(trace_id, [])
+                spans.append(span)
+                if not is_local_root:
+                    if len(self._pending) > self._max_traces:
+                        self._pending.popitem(last=False)
+                    return
+                del self._pending[trace_id]
+                keep = self._should_keep(span, spans)
+                self._decided[trace_id] = keep
+                if len(self._decided) > self._max_traces:
+                    self._decided.popitem(last=False)
+
+        if keep:
+            for finished in spans:
+                self._delegate.on_end(finished)
+
+    def _should_keep(self, root: ReadableSpan, spans: list[ReadableSpan]) -> bool:
+        if any(span.status.status_code == StatusCode.ERROR for span in spans):
+            return True
+        if root.end_time - root.start_time >= self._slow_threshold_ns:
+            return True
+        return root.context.trace_id & TraceIdRatioBased.TRACE_ID_LIMIT < self._ratio_bound
+
+    def shutdown(self) -> None:
+        self._delegate.shutdown()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return self._delegate.force_flush(timeout_millis)
+
+
 def init_tracer(app: FastAPI) -> None:
     """Initialize OpenTelemetry tracing for the FastAPI app."""
+    # Tail sampling decides after the fact, so every span must be recorded first
+    if settings.TRACE_TAIL_SAMPLING:
+        sampler = ParentBased(ALWAYS_ON)
+    else:
+        sampler = ParentBased(TraceIdRatioBased(settings.TRACE_SAMPLE_RATIO))
+
     # Set up the TracerProvider
-    trace.set_tracer_provider(TracerProvider())
+    trace.set_tracer_provider(TracerProvider(sampler=sampler))
 
     # Configure OTLP exporter
     otlp_exporter = OTLPSpanExporter(
@@ -18,7 +89,19 @@ def init_tracer(app: FastAPI) -> None:
     )
 
     # Add BatchSpanProcessor to export spans
-    span_processor = BatchSpanProcessor(otlp_exporter)
+    span_processor = BatchSpanProcessor(
+        otlp_exporter,
+        max_queue_size=settings.TRACE_BSP_MAX_QUEUE_SIZE,
+        max_export_batch_size=settings.TRACE_BSP_MAX_EXPORT_BATCH_SIZE,
+        schedule_delay_millis=settings.TRACE_BSP_SCHEDULE_DELAY_MS,
+    )
+    if settings.TRACE_TAIL_SAMPLING:
+        span_processor = TailSamplingSpanProcessor(
+            span_processor,
+            ratio=settings.TRACE_SAMPLE_RATIO,
+            slow_threshold_ms=settings.TRACE_SLOW_THRESHOLD_MS,
+            max_traces=settings.TRACE_TAIL_MAX_TRACES,
+        )
     trace.get_tracer_provider().add_span_processor(span_processor)
 
     # Instrument FastAPI to automatically trace requests
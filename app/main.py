@@ -1,14 +1,27 @@
 from contextlib import asynccontextmanager
+import random
 import time
 
 import uvicorn
 from fastapi import FastAPI, Request
 from starlette.middleware.cors import CORSMiddleware
 
+from app.caching.local_cache import LocalCache
+from app.caching.redis_cache import RedisCache
+from app.caching.tiered_cache import TieredCache
 from app.config import settings
 from app.db import init_db
+from app.events.bus import event_bus
+from app.events.consumer import subscribe_handlers
+from app.events.outbox import outbox_relay
+from app.instrumentation.metrics import init_metrics
 from app.instrumentation.tracing import init_tracer
-from app.routers import protected_user, auth, protected_roles, protected_permissions
+from app.services.api_key_partitions import api_key_partitions
+from app.services.api_key_sweeper import api_key_sweeper
+from app.services.api_key_writer import api_key_writer
+from app.services.authorization_service import authorization
+from app.services.hashing_service import PasswordHasher
+from app.routers import protected_user, auth, protected_roles, protected_permissions, monitoring
 from app.utils.logger import get_logger
 
 logger = get_logger("app.main")
@@ -19,10 +32,48 @@ async def lifespan(app_local: FastAPI):
     # Startup: Initialize database and tracing
     logger.info("Starting up application...")
     await init_db()
+    await api_key_partitions.try_maintain()
     init_tracer(app_local)
+    init_metrics()
     logger.info("Database tables created and tracing initialized.")
+
+    # Shared Redis connection pool for the whole process
+    cache = RedisCache()
+    await cache.init_cache()
+    if settings.CACHE_L1_ENABLED:
+        cache = TieredCache(cache, LocalCache(
+            max_entries=settings.CACHE_L1_MAX_ENTRIES,
+            max_bytes=settings.CACHE_L1_MAX_BYTES,
+            default_ttl=settings.CACHE_L1_DEFAULT_TTL,
+            ttls=settings.CACHE_L1_TTLS,
+        ))
+        await cache.start()
+    app_local.state.cache = cache
+    logger.info("Redis connection pool initialized.")
+
+    await authorization.start(cache)
+    logger.info("RBAC snapshot loaded.")
+
+    api_key_sweeper.start()
+    api_key_partitions.start()
+    if settings.API_KEY_WRITE_BEHIND:
+        api_key_writer.start(cache)
+    if settings.EVENT_BUS_BACKEND == "inprocess":
+        # Without a broker the event handlers run inside the API process
+        subscribe_handlers(event_bus)
+        await event_bus.start()
+    outbox_relay.start()
     yield
     logger.info("Shutting down application...")
+    await api_key_sweeper.close()
+    await api_key_partitions.close()
+    if settings.API_KEY_WRITE_BEHIND:
+        await api_key_writer.close()
+    await authorization.close()
+    await outbox_relay.close()
+    await event_bus.close()
+    await app_local.state.cache.close()
+    PasswordHasher.shutdown()
 
 origins = [
     "http://localhost",
@@ -48,14 +99,19 @@ async def log_requests_and_add_process_time_header(request: Request, call_next):
     start_time = time.perf_counter()
     response = await call_next(request)
     process_time = time.perf_counter() - start_time
-    logger.info(
-        "Handled %s request to %s with status %s from %s in %.2fs",
-        request.method,
-        request.url.path,
-        response.status_code,
-        request.client.host,
-        process_time
-    )
+    # Successful requests are sampled; every other status is always logged
+    is_success = 200 <= response.status_code < 300
+    sample_rate = settings.LOG_SUCCESS_SAMPLE_RATE if is_success else 1.0
+    if sample_rate >= 1.0 or random.random() < sample_rate:
+        logger.info(
+            "Handled %s request to %s with status %s from %s in %.2fs",
+            request.method,
+            request.url.path,
+            response.status_code,
+            request.client.host,
+            process_time,
+            extra={"sample_rate": sample_rate},
+        )
     response.headers["X-Process-Time"] = str(process_time)
 
     return response
@@ -65,6 +121,7 @@ app.include_router(protected_user.router, prefix="/api",tags=["User API"])
 app.include_router(protected_roles.router, prefix="/api",tags=["Role API"])
 app.include_router(protected_permissions.router, prefix="/api",tags=["Permission API"])
 app.include_router(auth.router, tags=["Protected API Keys"])
+app.include_router(monitoring.router, prefix="/internal", tags=["Monitoring"])
 
 if __name__ == "__main__":
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, log_level=settings.LOG_LEVEL)
@@ -0,0 +1,23 @@
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.migrations import api_key_digest, api_key_partitioning
+
+# Applied in order on every startup; each migration must be idempotent
+MIGRATIONS = [
+    api_key_digest,
+    api_key_partitioning,
+]
+
+# Serializes schema changes across replicas; the value is arbitrary but fixed
+MIGRATION_LOCK_ID = 7_310_215
+
+
+async def lock_migrations(conn: AsyncConnection) -> None:
+    """Wait until no other replica is changing the schema, for the rest of the transaction."""
+    await conn.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+
+
+async def run_migrations(conn: AsyncConnection) -> None:
+    for migration in MIGRATIONS:
+        await migration.upgrade(conn)
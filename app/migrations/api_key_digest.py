@@ -0,0 +1,36 @@
+"""Replace the full-text ``apikeys.api_key`` column with an indexed SHA-256 digest.
+
+Tables created before the digest column existed are backfilled in place with
+Postgres' own sha256(), which matches ``app.utils.jw_utils.token_digest``.
+"""
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+
+async def upgrade(conn: AsyncConnection) -> None:
+    result = await conn.execute(text(
+        "SELECT 1 FROM information_schema.columns "
+        "WHERE table_name = 'apikeys' AND column_name = 'api_key'"
+    ))
+    if result.first() is None:
+        return
+
+    await conn.execute(text("ALTER TABLE apikeys ADD COLUMN IF NOT EXISTS api_key_digest CHAR(64)"))
+    await conn.execute(text(
+        "UPDATE apikeys SET api_key_digest = encode(sha256(convert_to(api_key, 'UTF8')), 'hex') "
+        "WHERE api_key_digest IS NULL"
+    ))
+    # The same token may have been stored more than once; keep the newest row
+    await conn.execute(text(
+        "DELETE FROM apikeys a USING apikeys b "
+        "WHERE a.api_key_digest = b.api_key_digest AND a.id < b.id"
+    ))
+    await conn.execute(text("ALTER TABLE apikeys ALTER COLUMN api_key_digest SET NOT NULL"))
+    await conn.execute(text(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_apikeys_api_key_digest ON apikeys (api_key_digest)"
+    ))
+    await conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_apikeys_user_id_is_active_expires_at "
+        "ON apikeys (user_id, is_active, expires_at)"
+    ))
+    await conn.execute(text("ALTER TABLE apikeys DROP COLUMN api_key"))
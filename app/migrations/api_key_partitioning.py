@@ -0,0 +1,58 @@
+"""Convert a plain ``apikeys`` table into one range-partitioned by ``expires_at``.
+
+The old table is renamed aside, the partitioned table is created from the
+model, rows still inside the retention window are copied over and the old
+table is dropped. A DEFAULT partition is always present so inserts never
+fail for lack of a partition.
+"""
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.config import settings
+
+COLUMNS = "id, api_key_digest, expires_at, is_active, created_at, updated_at, user_id"
+DEFAULT_PARTITION = "apikeys_default"
+
+
+async def upgrade(conn: AsyncConnection) -> None:
+    # Imported here because app.db imports the migrations
+    from app.models.api_keys import APIKeys
+    from app.services.api_key_partitions import api_key_partitions
+
+    result = await conn.execute(text("SELECT relkind FROM pg_class WHERE relname = 'apikeys'"))
+    relkind = result.scalar_one_or_none()
+
+    if relkind == "r":
+        await conn.execute(text("ALTER TABLE apikeys RENAME TO apikeys_unpartitioned"))
+        for index in ("ix_apikeys_api_key_digest", "ix_apikeys_user_id_is_active_expires_at", "apikeys_pkey"):
+            await conn.execute(text(f"ALTER INDEX IF EXISTS {index} RENAME TO {index}_unpartitioned"))
+        # The new serial column would otherwise collide with the old sequence's name
+        await conn.execute(text("ALTER SEQUENCE IF EXISTS apikeys_id_seq RENAME TO apikeys_id_seq_unpartitioned"))
+
+        await conn.run_sync(APIKeys.__table__.create)
+        await _create_default_partition(conn)
+
+        since = datetime.now().date() - timedelta(days=settings.API_KEY_RETENTION_DAYS)
+        await api_key_partitions.create_partitions(conn, since)
+        await conn.execute(text(
+            f"INSERT INTO apikeys ({COLUMNS}) SELECT {COLUMNS} FROM apikeys_unpartitioned "
+            "WHERE expires_at >= :since"
+        ), {"since": since})
+        await conn.execute(text(
+            "SELECT setval(pg_get_serial_sequence('apikeys', 'id'), COALESCE(max(id), 0) + 1, false) FROM apikeys"
+        ))
+        await conn.execute(text("DROP TABLE apikeys_unpartitioned"))
+    else:
+        await _create_default_partition(conn)
+
+    # Tables partitioned before the expiry sweep index existed get it here;
+    # on a partitioned table it cascades to every partition
+    await conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_apikeys_expires_at_active ON apikeys (expires_at) WHERE is_active"
+    ))
+
+
+async def _create_default_partition(conn: AsyncConnection) -> None:
+    await conn.execute(text(f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF apikeys DEFAULT"))
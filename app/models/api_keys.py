@@ -1,15 +1,27 @@
 from datetime import datetime, timezone
 from typing import Optional
-from sqlalchemy import DateTime
+from sqlalchemy import CHAR, DateTime, Index, text
 
 from sqlmodel import Field, SQLModel
 
 
 class APIKeys(SQLModel, table=True):
-    id: int | None = Field(default=None, primary_key=True)
-    api_key: str
-    expires_at: Optional[datetime] = Field(
-        default_factory=lambda: datetime.now(timezone.utc)
+    # Range-partitioned by expiry (see ApiKeyPartitionManager), so unique keys
+    # must include expires_at
+    __table_args__ = (
+        Index("ix_apikeys_api_key_digest_expires_at", "api_key_digest", "expires_at", unique=True),
+        Index("ix_apikeys_user_id_is_active_expires_at", "user_id", "is_active", "expires_at"),
+        # Serves the expiry sweep, which only ever looks at active keys
+        Index("ix_apikeys_expires_at_active", "expires_at", postgresql_where=text("is_active")),
+        {"postgresql_partition_by": "RANGE (expires_at)"},
+    )
+
+    id: int | None = Field(default=None, primary_key=True, sa_column_kwargs={"autoincrement": True})
+    # Hex SHA-256 of the issued token; the token itself is never stored
+    api_key_digest: str = Field(sa_type=CHAR(64))
+    expires_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        primary_key=True
     )
     is_active: bool
     created_at: Optional[datetime] = Field(
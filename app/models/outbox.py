@@ -0,0 +1,19 @@
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import JSON, DateTime, LargeBinary
+
+from sqlmodel import Field, SQLModel
+
+
+class OutboxEvents(SQLModel, table=True):
+    # Written in the same transaction as the change it describes and deleted by
+    # OutboxRelay once the broker has confirmed it
+    id: int | None = Field(default=None, primary_key=True)
+    queue_name: str
+    payload: bytes = Field(sa_type=LargeBinary)
+    headers: Optional[dict] = Field(default=None, sa_type=JSON)
+    created_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_type=DateTime(timezone=True)
+    )
@@ -6,13 +6,12 @@ from fastapi import APIRouter
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
 from app.db import get_session
 from app.schemas.apikeys import ApiKeysBase
-from app.services.user_service import UserService
 
-from app.utils.constant import ROLES, PERMISSIONS
-from app.utils.env import get_token_expire_minutes
-from app.utils.jw_utils import Token, create_access_token, authenticate_user, get_user
+from app.utils.constant import PERMISSIONS
+from app.utils.jw_utils import Token, create_access_token, authenticate_user
 
 from typing import Annotated
 
@@ -22,10 +21,10 @@ from starlette import status
 from jwt.exceptions import InvalidTokenError
 
 from app.dependencies import ALGORITHM, oauth2_scheme, get_cache, get_tracer
-from app.schemas.apikeys import ApiKeysVerify
-from app.schemas.user import User
+from app.schemas.user import UserRead
 from app.services.auth_service import AuthenticateService
-from app.utils.env import get_key
+from app.services.authorization_service import authorization
+from app.utils.keyring import keyring
 from app.utils.jw_utils import TokenData
 
 router = APIRouter()
@@ -51,11 +50,11 @@ async def login_for_access_token(
 
         # Child Span: Permission check
         with tracer.start_as_current_span("check-user-permission"):
-            await is_allowed_to_generate_token(user, session, cache, tracer)
+            is_allowed_to_generate_token(user)
 
         # Child Span: Create access token
         with tracer.start_as_current_span("create-access-token"):
-            access_token_expires = timedelta(minutes=int(get_token_expire_minutes()))
+            access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
             access_token = create_access_token(
                 data={"sub": user.username}, expires_delta=access_token_expires
             )
@@ -74,23 +73,9 @@ async def login_for_access_token(
         return Token(access_token=access_token, token_type="bearer")
 
 
-async def is_allowed_to_generate_token(user, session: AsyncSession, cache, tracer):
-    role = await UserService.get_user_role(user.id, session, cache, tracer)
-
-    if not role or role is None:
-        raise HTTPException(status_code=404,
-                            detail="The username is not allowed to generate a token.")
-    permission = next(
-        (p for p in await UserService.get_role_permission(ROLES.API_USER.value, session, cache, tracer)
-         if p.permission_name == PERMISSIONS.API_GENERATE_TOKEN.value),
-        None
-    )
-    if not permission or permission is None:
-        raise HTTPException(status_code=404,
-                            detail="The username is not allowed to generate a token.")
-
-
-async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]):
+async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)],
+                           session: AsyncSession = Depends(get_session), cache=Depends(get_cache),
+                           tracer=Depends(get_tracer)) -> UserRead:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -98,37 +83,38 @@ async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]):
     )
 
     try:
-        payload = jwt.decode(token, get_key(), algorithms=[ALGORITHM])
+        payload = jwt.decode(token, keyring.verification_key(token), algorithms=[ALGORITHM])
         username: str = payload.get("sub")
         if username is None:
             raise credentials_exception
         token_data = TokenData(username=username)
+    except InvalidTokenError:
+        raise credentials_exception
 
-        user = UserService.get_user_by_username(token_data.username)
-
-        key = ApiKeysVerify(
-            api_key=token,
-            user_id=user.id
-        )
-        is_valid = AuthenticateService.is_api_key_active(key)
+    user = await AuthenticateService.validate_api_key(token, token_data.username, payload["exp"], session, cache,
+                                                      tracer)
+    if user is None:
+        raise HTTPException(status_code=401,
+                            detail="The API key validation was unsuccessful.")
 
-        await AuthenticateService.is_api_key_expired_set_inactive(token)
+    return UserRead.model_validate(user)
 
-        if not is_valid:
-            raise HTTPException(status_code=401,
-                                detail="The API key validation was unsuccessful.")
-    except InvalidTokenError:
-        raise credentials_exception
 
-    user = get_user(username=token_data.username)
+def is_allowed_to_generate_token(user):
+    if not authorization.has_permission(user.id, PERMISSIONS.API_GENERATE_TOKEN.value):
+        raise HTTPException(status_code=404,
+                            detail="The username is not allowed to generate a token.")
 
-    if user is None:
-        raise credentials_exception
 
-    return user
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(token: Annotated[str, Depends(oauth2_scheme)],
+                 current_user: Annotated[UserRead, Depends(get_current_user)],
+                 session: AsyncSession = Depends(get_session), cache=Depends(get_cache)):
+    payload = jwt.decode(token, keyring.verification_key(token), algorithms=[ALGORITHM])
+    await AuthenticateService.revoke_api_key(token, payload["exp"], session, cache)
 
 
-async def get_current_active_user(current_user: Annotated[User, Depends(get_current_user)],):
+async def get_current_active_user(current_user: Annotated[UserRead, Depends(get_current_user)],):
     if current_user.is_disabled:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
@@ -0,0 +1,14 @@
+from fastapi import APIRouter, Depends
+
+from app.db import pool_stats
+from app.dependencies import get_cache
+
+router = APIRouter()
+
+
+@router.get("/pools")
+async def read_pool_stats(cache=Depends(get_cache)):
+    return {
+        "redis": cache.pool_stats(),
+        "database": pool_stats(),
+    }
@@ -2,6 +2,7 @@ from fastapi import APIRouter, HTTPException, Depends, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db import get_session
+from app.dependencies import get_cache
 from app.models.users import Permissions
 from app.routers.auth import get_current_active_user
 from app.schemas.permissions import PermissionBase
@@ -39,11 +40,12 @@ async def create_permission(permission: PermissionBase, session: AsyncSession =
                status_code=status.HTTP_204_NO_CONTENT)
 async def delete_permission(permission_id: int,
                             current_user: dict = Depends(
-                                get_current_active_user)):
-    db_permission = get_permission_by_Id(permission_id)
+                                get_current_active_user),
+                            session: AsyncSession = Depends(get_session), cache=Depends(get_cache)):
+    db_permission = await PermissionService.service_get_permission_by_id(permission_id, session)
     if db_permission is None:
         raise HTTPException(status_code=404, detail="Permission not found")
-    db_permission = PermissionService.service_delete_permission(permission_id)
+    db_permission = await PermissionService.service_delete_permission(permission_id, session, cache)
     if db_permission is None:
         raise HTTPException(status_code=409,
                             detail="Permission logical constraints")
@@ -53,5 +55,6 @@ async def delete_permission(permission_id: int,
 @router.put("/permissions/{permission_id}", response_model=Permissions)
 async def update_permission(permission_id: int, permission: PermissionBase,
                             current_user: dict = Depends(
-                                get_current_active_user)):
-    return PermissionService.service_update_permission(permission_id, permission)
+                                get_current_active_user),
+                            session: AsyncSession = Depends(get_session), cache=Depends(get_cache)):
+    return await PermissionService.service_update_permission(permission_id, permission, session, cache)
@@ -2,6 +2,7 @@ from fastapi import APIRouter, HTTPException, Depends, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db import get_session
+from app.dependencies import get_cache
 from app.models.users import Roles
 from app.routers.auth import get_current_active_user
 from app.schemas.roles import RoleBase
@@ -37,11 +38,12 @@ async def create_role(role: RoleBase, session: AsyncSession = Depends(get_sessio
 
 @router.delete("/roles/{role_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_role(role_id: int,
-                      current_user: dict = Depends(get_current_active_user)):
-    db_role = read_roles_by_Id(role_id)
+                      current_user: dict = Depends(get_current_active_user),
+                      session: AsyncSession = Depends(get_session), cache=Depends(get_cache)):
+    db_role = await RoleService.service_get_role_by_id(role_id, session)
     if db_role is None:
         raise HTTPException(status_code=404, detail="Role not found")
-    db_deleted = RoleService.service_delete_role(role_id)
+    db_deleted = await RoleService.service_delete_role(role_id, session, cache)
     if db_deleted is None:
         raise HTTPException(status_code=409,
                             detail="Role logical constraints")
@@ -50,5 +52,6 @@ async def delete_role(role_id: int,
 
 @router.put("/roles/{role_id}", response_model=Roles)
 async def update_user(role_id: int, role: RoleBase,
-                      current_user: dict = Depends(get_current_active_user)):
-    return RoleService.service_update_role(role_id, role)
+                      current_user: dict = Depends(get_current_active_user),
+                      session: AsyncSession = Depends(get_session), cache=Depends(get_cache)):
+    return await RoleService.service_update_role(role_id, role, session, cache)
@@ -1,6 +1,9 @@
-from fastapi import APIRouter, HTTPException, Depends, status
+from typing import List
+
+from fastapi import APIRouter, HTTPException, Depends, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
 from app.db import get_session
 from app.dependencies import get_cache, get_tracer
 from app.models.users import UserRoles
@@ -8,17 +11,40 @@ from app.routers.auth import get_current_active_user
 from app.schemas.role_permission import RolePermission
 from app.schemas.user_profile import UserProfileBase, UserProfile
 
-from app.schemas.user import UserCreate, UserUpdate, User
+from app.schemas.user import UserBatchRequest, UserCreate, UserRead, UserUpdate, User
 from app.schemas.user_roles import UserRole
+from app.services.user_loader import user_loader
 from app.services.user_service import UserService
 
 router = APIRouter()
 
 
-@router.get("/users/{user_id}", response_model=User)
-async def read_user(user_id: int, session: AsyncSession = Depends(get_session), cache=Depends(get_cache),
-                    tracer=Depends(get_tracer)):
-    db_user = await UserService.get_user_by_id(user_id, session, cache, tracer)
+@router.get("/users", response_model=List[UserRead])
+async def read_users(ids: str = Query(..., description="Comma-separated user ids"), cache=Depends(get_cache),
+                     tracer=Depends(get_tracer)):
+    try:
+        user_ids = [int(user_id) for user_id in ids.split(",") if user_id.strip()]
+    except ValueError:
+        raise HTTPException(status_code=422, detail="ids must be a comma-separated list of integers")
+    return await _read_users_batch(user_ids, settings.USER_BATCH_MAX_IDS, cache, tracer)
+
+
+@router.post("/users/batch", response_model=List[UserRead])
+async def read_users_batch(batch: UserBatchRequest, cache=Depends(get_cache), tracer=Depends(get_tracer)):
+    return await _read_users_batch(batch.ids, settings.USER_BATCH_MAX_IDS_POST, cache, tracer)
+
+
+async def _read_users_batch(user_ids: List[int], max_ids: int, cache, tracer):
+    if len(user_ids) > max_ids:
+        raise HTTPException(status_code=422, detail=f"At most {max_ids} ids can be requested at once")
+    users = await user_loader.load_many(user_ids, cache, tracer)
+    # Unknown ids are left out; the order of the request is preserved
+    return [users[user_id] for user_id in dict.fromkeys(user_ids) if user_id in users]
+
+
+@router.get("/users/{user_id}", response_model=UserRead)
+async def read_user(user_id: int, cache=Depends(get_cache), tracer=Depends(get_tracer)):
+    db_user = await user_loader.load(user_id, cache, tracer)
     if db_user is None:
         raise HTTPException(status_code=404, detail="User not found")
 
@@ -42,11 +68,13 @@ async def create_user_profile(user_profile: UserProfileBase):
 
 @router.delete("/users/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_user(user_id: int,
-                      current_user: dict = Depends(get_current_active_user)):
-    db_user = UserService.get_user_by_id(user_id)
+                      current_user: dict = Depends(get_current_active_user),
+                      session: AsyncSession = Depends(get_session), cache=Depends(get_cache),
+                      tracer=Depends(get_tracer)):
+    db_user = await UserService.get_user_by_id(user_id, session, cache, tracer)
     if db_user is None:
         raise HTTPException(status_code=404, detail="User not found")
-    db_deleted = UserService.service_delete_user(user_id)
+    db_deleted = await UserService.service_delete_user(user_id, session, cache)
     if db_deleted is None:
         raise HTTPException(status_code=409,
                             detail="User logical constraints")
@@ -55,17 +83,20 @@ async def delete_user(user_id: int,
 
 @router.put("/users/{user_id}", response_model=User)
 async def update_user(user_id: int, user: UserUpdate,
-                      current_user: dict = Depends(get_current_active_user)):
-    return UserService.service_update_user(user_id, user)
+                      current_user: dict = Depends(get_current_active_user),
+                      session: AsyncSession = Depends(get_session), cache=Depends(get_cache)):
+    return await UserService.service_update_user(user_id, user, session, cache)
 
 
 @router.post("/users/assign_roles", response_model=UserRoles,
              status_code=status.HTTP_201_CREATED)
-async def user_assign_roles(user_roles: UserRole, session: AsyncSession = Depends(get_session)):
-    return await UserService.service_assign_role(user_roles, session)
+async def user_assign_roles(user_roles: UserRole, session: AsyncSession = Depends(get_session),
+                            cache=Depends(get_cache)):
+    return await UserService.service_assign_role(user_roles, session, cache)
 
 
 @router.post("/users/assign_permission", response_model=RolePermission,
              status_code=status.HTTP_201_CREATED)
-async def assign_permission(role_permission: RolePermission, session: AsyncSession = Depends(get_session)):
-    return await UserService.service_assign_permission(role_permission, session)
+async def assign_permission(role_permission: RolePermission, session: AsyncSession = Depends(get_session),
+                            cache=Depends(get_cache)):
+    return await UserService.service_assign_permission(role_permission, session, cache)
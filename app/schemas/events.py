@@ -0,0 +1,6 @@
+from pydantic import BaseModel
+
+
+class UserCreated(BaseModel):
+    id: int
+    username: str
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Optional
 
 from pydantic import BaseModel, Field
 
@@ -29,6 +29,17 @@ class UserCreateRolePermission(UserBase):
     permission_description: str
 
 
+class UserRead(UserBase):
+    id: int
+
+    class Config:
+        from_attributes = True
+
+
+class UserBatchRequest(BaseModel):
+    ids: List[int]
+
+
 class User(UserBase):
     id: Optional[int] = None
     password_hash: str
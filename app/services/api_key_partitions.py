@@ -0,0 +1,148 @@
+import asyncio
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.config import settings
+from app.db import engine
+from app.migrations.api_key_partitioning import COLUMNS, DEFAULT_PARTITION
+from app.utils.logger import get_logger
+
+logger = get_logger("app.services.api_key_partitions")
+
+PARTITION_PREFIX = "apikeys_p"
+
+# Serializes maintenance across replicas; the value is arbitrary but fixed
+MAINTENANCE_LOCK_ID = 7_310_214
+
+
+def period_start(day: date) -> date:
+    if settings.API_KEY_PARTITION_INTERVAL == "weekly":
+        return day - timedelta(days=day.weekday())
+    return day
+
+
+def period_length() -> timedelta:
+    return timedelta(weeks=1) if settings.API_KEY_PARTITION_INTERVAL == "weekly" else timedelta(days=1)
+
+
+def partition_name(start: date) -> str:
+    return f"{PARTITION_PREFIX}{start:%Y%m%d}"
+
+
+class ApiKeyPartitionManager:
+    """Maintains the range partitions of ``apikeys`` by ``expires_at``.
+
+    Partitions are created API_KEY_PARTITIONS_AHEAD periods in advance, and
+    partitions whose whole range ended more than API_KEY_RETENTION_DAYS ago are
+    detached and dropped, which is a catalog operation rather than a DELETE.
+    Rows that landed in the DEFAULT partition before their range had a
+    partition of its own are moved into it when the partition is created.
+    """
+
+    def __init__(self):
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def maintain(self) -> None:
+        async with engine.begin() as conn:
+            await conn.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": MAINTENANCE_LOCK_ID})
+            await self.create_partitions(conn, datetime.now().date())
+            await self.prune_partitions(conn)
+
+    async def try_maintain(self) -> None:
+        """Run maintenance, logging instead of raising so a failure never stops the app."""
+        try:
+            await self.maintain()
+        except Exception as e:
+            logger.warning("API key partition maintenance failed: %s", e)
+
+    async def create_partitions(self, conn: AsyncConnection, since: date) -> None:
+        """Create every partition from the period containing ``since`` up to the look-ahead window."""
+        start = period_start(since)
+        end = period_start(datetime.now().date()) + period_length() * settings.API_KEY_PARTITIONS_AHEAD
+        while start <= end:
+            upper = start + period_length()
+            await self._create_partition(conn, start, upper)
+            start = upper
+
+    async def _create_partition(self, conn: AsyncConnection, start: date, upper: date) -> None:
+        name = partition_name(start)
+        exists = await conn.execute(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": name})
+        if exists.scalar_one():
+            return
+
+        bounds = {"start": start, "upper": upper}
+        in_range = "expires_at >= :start AND expires_at < :upper"
+        has_default = await conn.execute(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": DEFAULT_PARTITION})
+        stranded = has_default.scalar_one() and (await conn.execute(text(
+            f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE {in_range})"
+        ), bounds)).scalar_one()
+
+        # Postgres refuses a new partition while the DEFAULT one holds rows in its range
+        if stranded:
+            await conn.execute(text(f"ALTER TABLE apikeys DETACH PARTITION {DEFAULT_PARTITION}"))
+        await conn.execute(text(
+            f"CREATE TABLE {name} PARTITION OF apikeys "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{upper.isoformat()}')"
+        ))
+        if stranded:
+            await conn.execute(text(
+                f"INSERT INTO apikeys ({COLUMNS}) SELECT {COLUMNS} FROM {DEFAULT_PARTITION} WHERE {in_range}"
+            ), bounds)
+            moved = await conn.execute(text(f"DELETE FROM {DEFAULT_PARTITION} WHERE {in_range}"), bounds)
+            await conn.execute(text(f"ALTER TABLE apikeys ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT"))
+            logger.info("Moved %s API keys from %s into %s", moved.rowcount, DEFAULT_PARTITION, name)
+
+    async def prune_partitions(self, conn: AsyncConnection) -> list[str]:
+        """Detach and drop partitions that are entirely past the retention window.
+
+        Rows of the DEFAULT partition past the window are deleted.
+        """
+        cutoff = datetime.now().date() - timedelta(days=settings.API_KEY_RETENTION_DAYS)
+        result = await conn.execute(text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE parent.relname = 'apikeys'"
+        ))
+
+        pruned = []
+        for (name,) in result:
+            if not name.startswith(PARTITION_PREFIX):
+                continue
+            start = datetime.strptime(name[len(PARTITION_PREFIX):], "%Y%m%d").date()
+            if start + period_length() > cutoff:
+                continue
+            await conn.execute(text(f"ALTER TABLE apikeys DETACH PARTITION {name}"))
+            if settings.API_KEY_PARTITION_DROP:
+                await conn.execute(text(f"DROP TABLE {name}"))
+            pruned.append(name)
+
+        # Keys outside every range partition land in the DEFAULT one, which is
+        # never detached, so its expired rows are deleted instead
+        expired = await conn.execute(text(f"DELETE FROM {DEFAULT_PARTITION} WHERE expires_at < :cutoff"),
+                                     {"cutoff": cutoff})
+        if expired.rowcount:
+            logger.info("Deleted %s expired API keys from %s", expired.rowcount, DEFAULT_PARTITION)
+
+        if pruned:
+            logger.info("Pruned API key partitions: %s", ", ".join(pruned))
+        return pruned
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(settings.API_KEY_PARTITION_MAINTENANCE_INTERVAL_SECONDS)
+            await self.try_maintain()
+
+
+api_key_partitions = ApiKeyPartitionManager()
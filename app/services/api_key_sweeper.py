@@ -0,0 +1,71 @@
+import asyncio
+import random
+
+from sqlalchemy import text
+
+from app.config import settings
+from app.db import engine
+from app.instrumentation.metrics import get_meter
+from app.utils.logger import get_logger
+
+logger = get_logger("app.services.api_key_sweeper")
+
+swept_counter = get_meter().create_counter(
+    "api_keys.swept",
+    description="Expired API keys deactivated by the background sweeper",
+)
+
+# SKIP LOCKED lets several replicas sweep concurrently without waiting on each
+# other. The inner scan uses the partial index ix_apikeys_expires_at_active, and
+# matching on (id, expires_at) lets the UPDATE prune partitions.
+SWEEP_STATEMENT = text("""
+    UPDATE apikeys SET is_active = false, updated_at = now()
+    WHERE (id, expires_at) IN (
+        SELECT id, expires_at FROM apikeys
+        WHERE is_active AND expires_at < now()
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    )
+""")
+
+
+class ApiKeySweeper:
+    """Periodically deactivates expired API keys in bounded, set-based batches."""
+
+    def __init__(self):
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def sweep(self) -> int:
+        """Deactivate every currently expired key, one batch per transaction."""
+        total = 0
+        while True:
+            async with engine.begin() as conn:
+                result = await conn.execute(SWEEP_STATEMENT, {"batch_size": settings.API_KEY_SWEEP_BATCH_SIZE})
+            total += result.rowcount
+            swept_counter.add(result.rowcount)
+            if result.rowcount < settings.API_KEY_SWEEP_BATCH_SIZE:
+                return total
+
+    async def _run(self) -> None:
+        while True:
+            # Jitter keeps replicas started together from sweeping in lockstep
+            interval = settings.API_KEY_SWEEP_INTERVAL_SECONDS
+            await asyncio.sleep(interval * random.uniform(0.5, 1.5))
+            try:
+                swept = await self.sweep()
+                if swept:
+                    logger.info("Deactivated %s expired API keys", swept)
+            except Exception as e:
+                logger.warning("API key sweep failed: %s", e)
+
+
+api_key_sweeper = ApiKeySweeper()
@@ -0,0 +1,111 @@
+import asyncio
+import json
+from datetime import datetime, timezone
+
+from sqlalchemy.dialects.postgresql import insert
+
+from app.config import settings
+from app.db import engine
+from app.instrumentation.metrics import get_meter
+from app.models.api_keys import APIKeys
+from app.utils.logger import get_logger
+
+logger = get_logger("app.services.api_key_writer")
+
+flushed_counter = get_meter().create_counter(
+    "api_keys.write_behind.flushed",
+    description="API key rows bulk-inserted by the write-behind flusher",
+)
+
+
+class ApiKeyWriteBehind:
+    """Buffers new API key rows in a Redis list and bulk-inserts them into Postgres.
+
+    Rows are flushed every API_KEY_FLUSH_INTERVAL_MS, or as soon as
+    API_KEY_FLUSH_MAX_ROWS have been queued by this process. The buffer lives in
+    Redis, so rows survive a crash of the process that queued them, and the
+    buffer is drained on shutdown. A flush moves its rows to a processing list
+    and removes them only once the INSERT has committed; rows left there by a
+    crashed flush are moved back to the buffer on startup.
+    """
+
+    def __init__(self, queue_key: str = settings.API_KEY_PENDING_QUEUE):
+        self.queue_key = queue_key
+        self.processing_key = f"{queue_key}:processing"
+        self._cache = None
+        self._task: asyncio.Task | None = None
+        self._wakeup = asyncio.Event()
+        self._queued_since_flush = 0
+
+    def start(self, cache) -> None:
+        self._cache = cache
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        # Whatever is still buffered is written before the process exits
+        while await self.flush() == settings.API_KEY_FLUSH_MAX_ROWS:
+            pass
+
+    async def enqueue(self, cache, row: dict) -> None:
+        await cache.push(self.queue_key, json.dumps(row, default=str))
+        self._queued_since_flush += 1
+        if self._queued_since_flush >= settings.API_KEY_FLUSH_MAX_ROWS:
+            self._wakeup.set()
+
+    async def flush(self) -> int:
+        """Insert up to API_KEY_FLUSH_MAX_ROWS buffered rows with one multi-row INSERT."""
+        self._queued_since_flush = 0
+        payloads = await self._cache.move_many(self.queue_key, self.processing_key,
+                                               settings.API_KEY_FLUSH_MAX_ROWS)
+        if not payloads:
+            return 0
+
+        rows = [self._row(payload) for payload in payloads]
+        try:
+            async with engine.begin() as conn:
+                # Rows requeued after a failed flush or a crash may already have been written
+                await conn.execute(insert(APIKeys).values(rows).on_conflict_do_nothing())
+        except Exception:
+            await self._cache.requeue(self.processing_key, self.queue_key, *payloads)
+            raise
+
+        await self._cache.remove_values(self.processing_key, *payloads)
+        flushed_counter.add(len(rows))
+        return len(rows)
+
+    @staticmethod
+    def _row(payload: str) -> dict:
+        row = json.loads(payload)
+        row["expires_at"] = datetime.fromisoformat(row["expires_at"])
+        # A Core INSERT does not apply the model's default factories
+        now = datetime.now(timezone.utc)
+        for column in ("created_at", "updated_at"):
+            row[column] = datetime.fromisoformat(row[column]) if row.get(column) else now
+        return row
+
+    async def _run(self) -> None:
+        try:
+            # Rows a crashed process was flushing go back to the buffer
+            recovered = await self._cache.move_many(self.processing_key, self.queue_key)
+            if recovered:
+                logger.info("Requeued %s API key rows from an interrupted flush", len(recovered))
+        except Exception as e:
+            logger.warning("Requeueing interrupted API key rows failed: %s", e)
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), settings.API_KEY_FLUSH_INTERVAL_MS / 1000)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                while await self.flush() == settings.API_KEY_FLUSH_MAX_ROWS:
+                    pass
+            except Exception as e:
+                logger.warning("API key write-behind flush failed: %s", e)
+
+
+api_key_writer = ApiKeyWriteBehind()
@@ -1,38 +1,46 @@
+import json
+import time
 from datetime import datetime
-from fastapi import HTTPException, Depends
+from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.dependencies import get_db
+from app.caching.keys import pending_token_key, revoked_token_key, token_validation_key, user_tag
+from app.config import settings
 from app.models.api_keys import APIKeys
 from app.models.users import Users
 from app.schemas.apikeys import ApiKeysBase, ApiKeysVerify
 from sqlalchemy.exc import IntegrityError
-from sqlmodel import select
+from sqlmodel import select, update
 
+from app.services.api_key_writer import api_key_writer
 from app.services.user_service import UserService
+from app.utils.jw_utils import token_digest
 
 
 class AuthenticateService:
     @staticmethod
     async def service_create_api_key(api_key: ApiKeysBase, session: AsyncSession, cache, tracer) -> APIKeys:
         try:
-
-            user = await UserService.get_user_by_id(api_key.user_id, session, cache, tracer)
-
-            if user is None:
-                raise HTTPException(status_code=404,
-                                    detail="Username does not exists")
+            # The users foreign key rejects unknown users, no lookup needed
             db_api_key = APIKeys(
-                api_key=api_key.api_key,
+                api_key_digest=token_digest(api_key.api_key),
                 user_id=api_key.user_id,
                 expires_at=api_key.expires_at,
                 is_active=api_key.is_active
             )
 
+            if settings.API_KEY_WRITE_BEHIND:
+                # Validation accepts the pending marker until the row is flushed
+                ttl = int((api_key.expires_at - datetime.now()).total_seconds())
+                if ttl > 0:
+                    await cache.set(pending_token_key(db_api_key.api_key_digest), str(api_key.user_id), expire=ttl)
+                await api_key_writer.enqueue(cache, db_api_key.model_dump(
+                    include={"api_key_digest", "user_id", "expires_at", "is_active", "created_at", "updated_at"}))
+                return db_api_key
+
             async with session:
                 session.add(db_api_key)
                 await session.commit()
-                await session.refresh(db_api_key)
                 return db_api_key
         except IntegrityError:
             await session.rollback()
@@ -40,43 +48,74 @@ class AuthenticateService:
                                 detail="Error in generating api key")
 
     @staticmethod
-    async def is_api_key_expired_set_inactive(api_key: str, db=Depends(get_db)) -> bool:
-        try:
-            with db as session:
-                statement = select(APIKeys).where(
-                    APIKeys.api_key == api_key).where(
-                    APIKeys.is_active).where(
-                    APIKeys.expires_at < datetime.now())
-
-                results = await session.exec(statement).first()
-
-                if results:
-                    key = await session.get(APIKeys, results.id)
-                    key.is_active = False
-                    await session.add(key)
-                    await session.commit()
-                    await session.refresh(key)
-                    return True
-                return False
-        except IntegrityError:
-            await session.rollback()
-            raise
+    async def validate_api_key(token: str, username: str, expires_at: float, session: AsyncSession, cache,
+                               tracer) -> dict | None:
+        """Return the owner of an active API key, or None if the key is not valid.
+
+        Successful validations are cached by token digest for at most the token's
+        remaining lifetime and tagged with the user id, so updating or deleting the
+        user evicts them. Revoked tokens are rejected before the cache is consulted.
+        """
+        digest = token_digest(token)
+        cache_key = token_validation_key(digest)
+
+        with tracer.start_as_current_span("validate-api-key") as span:
+            # One round-trip for both the revocation marker and the cached validation
+            cached, revoked = await cache.get_many([cache_key, revoked_token_key(digest)])
+            if revoked:
+                span.set_attribute("auth.token.revoked", True)
+                return None
+            if cached:
+                span.set_attribute("auth.validation_cache.hit", True)
+                return json.loads(cached.value)
+
+            span.set_attribute("auth.validation_cache.hit", False)
+            user = await UserService.get_user_by_username(username, session, cache, tracer)
+            if user is None:
+                return None
+            user_dict = user if isinstance(user, dict) else user.to_dict()
+
+            # Expired keys are deactivated by ApiKeySweeper; here expires_at is only compared
+            key = ApiKeysVerify(api_key=token, user_id=user_dict["id"])
+            if not await AuthenticateService.is_api_key_active(key, session):
+                # With write-behind the row may not have been flushed yet
+                if not settings.API_KEY_WRITE_BEHIND or not user_dict["is_active"] \
+                        or not await cache.get(pending_token_key(digest)):
+                    return None
+
+            ttl = min(settings.TOKEN_VALIDATION_CACHE_TTL, int(expires_at - time.time()))
+            if ttl > 0:
+                await cache.set(cache_key, json.dumps(user_dict), expire=ttl, tags=[user_tag(user_dict["id"])])
+            return user_dict
 
     @staticmethod
-    async def is_api_key_active(api_key: ApiKeysVerify, db=Depends(get_db)):
+    async def revoke_api_key(token: str, expires_at: float, session: AsyncSession, cache) -> None:
+        """Deactivate an API key and reject it immediately on every replica."""
+        digest = token_digest(token)
+        ttl = int(expires_at - time.time())
+        if ttl > 0:
+            await cache.set(revoked_token_key(digest), "1", expire=ttl)
+        await cache.delete(token_validation_key(digest))
+
+        async with session:
+            await session.execute(update(APIKeys).where(APIKeys.api_key_digest == digest).values(is_active=False))
+            await session.commit()
+
+    @staticmethod
+    async def is_api_key_active(api_key: ApiKeysVerify, session: AsyncSession):
         try:
-            with db as session:
+            async with session:
                 statement = select(APIKeys).join(Users).where(
-                    APIKeys.api_key == api_key.api_key).where(
+                    APIKeys.api_key_digest == token_digest(api_key.api_key)).where(
                     APIKeys.is_active).where(
                     APIKeys.expires_at > datetime.now()).where(
                     Users.is_active)
 
-                results = await session.exec(statement).first()
+                results = (await session.execute(statement)).first()
 
                 if not results:
                     return False
                 return True
         except IntegrityError:
             await session.rollback()
-            raise
\ No newline at end of file
+            raise
@@ -0,0 +1,204 @@
+import asyncio
+import json
+import uuid
+
+from sqlmodel import select
+
+from app.config import settings
+from app.db import async_session
+from app.models.users import Permissions, RolePermissions, Roles, UserRoles
+from app.utils.logger import get_logger
+
+logger = get_logger("app.services.authorization_service")
+
+
+class RBACSnapshot:
+    """In-memory role-based access control index.
+
+    Each permission id is given a bit position; each role holds the bitset of
+    its permissions and each user the union of their roles' bitsets, so a
+    permission check is a dict lookup and a bit test.
+    """
+
+    def __init__(self):
+        self.permission_bits: dict[int, int] = {}
+        self.permission_names: dict[str, int] = {}
+        self.role_masks: dict[int, int] = {}
+        self.user_roles: dict[int, set[int]] = {}
+        self.role_users: dict[int, set[int]] = {}
+        self.user_masks: dict[int, int] = {}
+
+    def add_permission(self, permission_id: int, permission_name: str) -> None:
+        if permission_id not in self.permission_bits:
+            self.permission_bits[permission_id] = len(self.permission_bits)
+        # A renamed permission no longer answers to its old name
+        for name in [name for name, known_id in self.permission_names.items() if known_id == permission_id]:
+            del self.permission_names[name]
+        self.permission_names[permission_name] = permission_id
+
+    def remove_permission(self, permission_id: int) -> None:
+        for name in [name for name, known_id in self.permission_names.items() if known_id == permission_id]:
+            del self.permission_names[name]
+        bit = self.permission_bits.get(permission_id)
+        if bit is None:
+            return
+        # The bit position stays reserved so the other permissions keep theirs
+        for role_id, mask in self.role_masks.items():
+            if mask >> bit & 1:
+                self.role_masks[role_id] = mask & ~(1 << bit)
+                for user_id in self.role_users.get(role_id, ()):
+                    self._recompute_user(user_id)
+
+    def add_role(self, role_id: int) -> None:
+        self.role_masks.setdefault(role_id, 0)
+
+    def grant_permission(self, role_id: int, permission_id: int) -> None:
+        if permission_id not in self.permission_bits:
+            self.permission_bits[permission_id] = len(self.permission_bits)
+        self.role_masks[role_id] = self.role_masks.get(role_id, 0) | (1 << self.permission_bits[permission_id])
+        for user_id in self.role_users.get(role_id, ()):
+            self._recompute_user(user_id)
+
+    def remove_role(self, role_id: int) -> None:
+        self.role_masks.pop(role_id, None)
+        for user_id in self.role_users.pop(role_id, set()):
+            self.user_roles.get(user_id, set()).discard(role_id)
+            self._recompute_user(user_id)
+
+    def assign_role(self, user_id: int, role_id: int) -> None:
+        self.add_role(role_id)
+        self.user_roles.setdefault(user_id, set()).add(role_id)
+        self.role_users.setdefault(role_id, set()).add(user_id)
+        self._recompute_user(user_id)
+
+    def remove_user(self, user_id: int) -> None:
+        for role_id in self.user_roles.pop(user_id, set()):
+            self.role_users.get(role_id, set()).discard(user_id)
+        self.user_masks.pop(user_id, None)
+
+    def has_permission(self, user_id: int, permission_name: str) -> bool:
+        permission_id = self.permission_names.get(permission_name)
+        if permission_id is None:
+            return False
+        return bool(self.user_masks.get(user_id, 0) >> self.permission_bits[permission_id] & 1)
+
+    def _recompute_user(self, user_id: int) -> None:
+        mask = 0
+        for role_id in self.user_roles.get(user_id, ()):
+            mask |= self.role_masks.get(role_id, 0)
+        self.user_masks[user_id] = mask
+
+
+class AuthorizationService:
+    """Keeps an RBACSnapshot current for the process.
+
+    Changes made through ``apply_change`` are applied locally and broadcast to
+    the other replicas over Redis pub/sub; a periodic full reload covers
+    anything changed outside the service layer.
+    """
+
+    def __init__(self, channel: str = settings.RBAC_CHANGES_CHANNEL):
+        self.snapshot = RBACSnapshot()
+        self.channel = channel
+        self.instance_id = uuid.uuid4().hex
+        self._client = None
+        self._tasks: list[asyncio.Task] = []
+
+    async def start(self, cache) -> None:
+        self._client = cache.client
+        await self.reload()
+        self._tasks = [
+            asyncio.create_task(self._listen()),
+            asyncio.create_task(self._reload_periodically()),
+        ]
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def has_permission(self, user_id: int, permission_name: str) -> bool:
+        return self.snapshot.has_permission(user_id, permission_name)
+
+    async def reload(self) -> None:
+        """Build a fresh snapshot from the database and swap it in."""
+        snapshot = RBACSnapshot()
+        async with async_session() as session:
+            for permission_id, permission_name in await session.execute(
+                    select(Permissions.id, Permissions.permission_name)):
+                snapshot.add_permission(permission_id, permission_name)
+            for (role_id,) in await session.execute(select(Roles.id)):
+                snapshot.add_role(role_id)
+            for role_id, permission_id in await session.execute(
+                    select(RolePermissions.role_id, RolePermissions.permission_id)):
+                snapshot.grant_permission(role_id, permission_id)
+            for user_id, role_id in await session.execute(select(UserRoles.user_id, UserRoles.role_id)):
+                snapshot.assign_role(user_id, role_id)
+        self.snapshot = snapshot
+
+    async def apply_change(self, op: str, **args) -> None:
+        """Apply a change to the local snapshot and broadcast it to the other replicas.
+
+        Called after the change has been committed, so a failure is only logged;
+        the periodic reload brings the snapshots back in line.
+        """
+        try:
+            self._apply(op, args)
+            if self._client:
+                await self._client.publish(self.channel,
+                                           json.dumps({"origin": self.instance_id, "op": op, "args": args}))
+        except Exception as e:
+            logger.warning("Applying RBAC change %s failed: %s", op, e)
+
+    def _apply(self, op: str, args: dict) -> None:
+        if op == "add_permission":
+            self.snapshot.add_permission(args["permission_id"], args["permission_name"])
+        elif op == "add_role":
+            self.snapshot.add_role(args["role_id"])
+        elif op == "grant_permission":
+            self.snapshot.grant_permission(args["role_id"], args["permission_id"])
+        elif op == "assign_role":
+            self.snapshot.assign_role(args["user_id"], args["role_id"])
+        elif op == "remove_permission":
+            self.snapshot.remove_permission(args["permission_id"])
+        elif op == "remove_role":
+            self.snapshot.remove_role(args["role_id"])
+        elif op == "remove_user":
+            self.snapshot.remove_user(args["user_id"])
+        else:
+            raise ValueError(f"Unknown RBAC change: {op}")
+
+    async def _reload_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(settings.RBAC_RELOAD_INTERVAL_SECONDS)
+            try:
+                await self.reload()
+            except Exception as e:
+                logger.warning("RBAC snapshot reload failed: %s", e)
+
+    async def _listen(self) -> None:
+        resubscribed = False
+        while True:
+            try:
+                pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+                await pubsub.subscribe(self.channel)
+                if resubscribed:
+                    # Changes may have been missed while we were not subscribed
+                    await self.reload()
+                try:
+                    async for message in pubsub.listen():
+                        payload = json.loads(message["data"])
+                        if payload.get("origin") != self.instance_id:
+                            self._apply(payload["op"], payload["args"])
+                finally:
+                    await pubsub.aclose()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("RBAC change listener failed, resubscribing: %s", e)
+                resubscribed = True
+                await asyncio.sleep(1)
+
+
+authorization = AuthorizationService()
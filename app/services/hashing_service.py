@@ -0,0 +1,111 @@
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+from fastapi import HTTPException
+from opentelemetry.metrics import CallbackOptions, Observation
+from passlib.context import CryptContext
+
+from app.config import settings
+from app.instrumentation.metrics import get_meter
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+meter = get_meter()
+
+wait_histogram = meter.create_histogram(
+    "password_hash.queue_wait",
+    unit="ms",
+    description="Time password hashing operations waited for a free worker",
+)
+
+rejected_counter = meter.create_counter(
+    "password_hash.rejected",
+    description="Password hashing operations rejected because the queue was full",
+)
+
+
+def _observe_queue(options: CallbackOptions):
+    # Read at collection time, once PasswordHasher is defined
+    return [
+        Observation(PasswordHasher._queued, {"state": "queued"}),
+        Observation(PasswordHasher._running, {"state": "running"}),
+    ]
+
+
+meter.create_observable_gauge(
+    "password_hash.queue_depth",
+    callbacks=[_observe_queue],
+    description="Password hashing operations by state",
+)
+
+
+# Module-level so they can be pickled into a process pool
+def _hash_password(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify_password(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+class PasswordHasher:
+    """Runs bcrypt in a bounded thread or process pool instead of on the event loop.
+
+    At most PASSWORD_HASH_CONCURRENCY operations run at once and at most
+    PASSWORD_HASH_MAX_QUEUE wait behind them; beyond that callers get a 503.
+    """
+    _executor: Executor | None = None
+    _semaphore: asyncio.Semaphore | None = None
+    _running = 0
+    _queued = 0
+
+    @classmethod
+    async def hash(cls, password: str) -> str:
+        return await cls._run(_hash_password, password)
+
+    @classmethod
+    async def verify(cls, plain_password: str, hashed_password: str) -> bool:
+        return await cls._run(_verify_password, plain_password, hashed_password)
+
+    @classmethod
+    def shutdown(cls) -> None:
+        if cls._executor:
+            cls._executor.shutdown(wait=True, cancel_futures=True)
+            cls._executor = None
+            cls._semaphore = None
+
+    @classmethod
+    def _get_executor(cls) -> Executor:
+        if cls._executor is None:
+            if settings.PASSWORD_HASH_EXECUTOR == "process":
+                cls._executor = ProcessPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS)
+            else:
+                cls._executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS,
+                                                   thread_name_prefix="password-hash")
+            cls._semaphore = asyncio.Semaphore(settings.PASSWORD_HASH_CONCURRENCY)
+        return cls._executor
+
+    @classmethod
+    async def _run(cls, fn, *args):
+        executor = cls._get_executor()
+        if cls._queued >= settings.PASSWORD_HASH_MAX_QUEUE:
+            rejected_counter.add(1)
+            raise HTTPException(status_code=503,
+                                detail="Too many concurrent authentication requests",
+                                headers={"Retry-After": "1"})
+
+        start_time = time.perf_counter()
+        cls._queued += 1
+        try:
+            await cls._semaphore.acquire()
+        finally:
+            cls._queued -= 1
+        wait_histogram.record((time.perf_counter() - start_time) * 1000)
+
+        cls._running += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+        finally:
+            cls._running -= 1
+            cls._semaphore.release()
@@ -2,8 +2,10 @@ from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select
 
-from app.models.users import Roles, Permissions
+from app.caching.keys import permission_tag
+from app.models.users import Permissions
 from app.schemas.permissions import PermissionBase
+from app.services.authorization_service import authorization
 from sqlalchemy.exc import IntegrityError
 
 
@@ -43,26 +45,33 @@ class PermissionService:
                 session.add(db_permission)
                 await session.commit()
                 await session.refresh(db_permission)
-                return db_permission
+
+            await cache.invalidate_tags(permission_tag(permission_id))
+            await authorization.apply_change("add_permission", permission_id=db_permission.id,
+                                             permission_name=db_permission.permission_name)
+            return db_permission
         except IntegrityError:
             await session.rollback()
             raise HTTPException(status_code=409,
                                 detail="Permission already exists")
 
     @staticmethod
-    async def service_delete_permission(permission_id: int, session: AsyncSession):
+    async def service_delete_permission(permission_id: int, session: AsyncSession, cache):
         async with session:
             permission = await session.get(Permissions, permission_id)
             await session.delete(permission)
             await session.commit()
-            return permission
+
+        await cache.invalidate_tags(permission_tag(permission_id))
+        await authorization.apply_change("remove_permission", permission_id=permission_id)
+        return permission
 
     @staticmethod
     async def service_update_permission(permission_id: int,
-                                        permission: PermissionBase, session: AsyncSession) -> Permissions:
+                                        permission: PermissionBase, session: AsyncSession, cache) -> Permissions:
         try:
             async with session:
-                db_permission = await session.get(Roles, permission_id)
+                db_permission = await session.get(Permissions, permission_id)
             if db_permission is None:
                 raise HTTPException(status_code=404,
                                     detail="Permission not found")
@@ -72,10 +81,13 @@ class PermissionService:
                 setattr(db_permission, key, value)
 
             async with session:
-                await session.add(db_permission)
+                session.add(db_permission)
                 await session.commit()
                 await session.refresh(db_permission)
 
+            await cache.invalidate_tags(permission_tag(permission_id))
+            await authorization.apply_change("add_permission", permission_id=db_permission.id,
+                                             permission_name=db_permission.permission_name)
             return db_permission
         except IntegrityError:
             await session.rollback()
@@ -3,8 +3,10 @@ from sqlmodel import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
 
+from app.caching.keys import role_tag
 from app.models.users import Roles
 from app.schemas.roles import RoleBase
+from app.services.authorization_service import authorization
 
 
 
@@ -34,7 +36,9 @@ class RoleService:
                 session.add(db_roles)
                 await session.commit()
                 await session.refresh(db_roles)
-                return db_roles
+
+            await authorization.apply_change("add_role", role_id=db_roles.id)
+            return db_roles
 
         except IntegrityError:
             await session.rollback()
@@ -42,15 +46,18 @@ class RoleService:
                                 detail="Role already exists")
 
     @staticmethod
-    async def service_delete_role(role_id: int, session: AsyncSession):
+    async def service_delete_role(role_id: int, session: AsyncSession, cache):
         async with session:
             role = await session.get(Roles, role_id)
             await session.delete(role)
             await session.commit()
-            return role
+
+        await cache.invalidate_tags(role_tag(role_id))
+        await authorization.apply_change("remove_role", role_id=role_id)
+        return role
 
     @staticmethod
-    async def service_update_role(role_id: int, role: RoleBase, session: AsyncSession) -> Roles:
+    async def service_update_role(role_id: int, role: RoleBase, session: AsyncSession, cache) -> Roles:
         try:
             async with session:
                 db_role = await session.get(Roles, role_id)
@@ -66,6 +73,8 @@ class RoleService:
                 await session.commit()
                 await session.refresh(db_role)
 
+            # Cached role permissions are keyed by the role's name
+            await cache.invalidate_tags(role_tag(role_id))
             return db_role
         except IntegrityError:
             await session.rollback()
@@ -0,0 +1,128 @@
+import asyncio
+import json
+from functools import partial
+
+from sqlmodel import select
+
+from app.caching.keys import cache_soft_ttl, cache_ttl, user_by_id_key, user_tag
+from app.caching.singleflight import refresh_in_background
+from app.db import async_session
+from app.instrumentation.metrics import get_meter
+from app.models.users import Users
+from app.utils.logger import get_logger
+
+logger = get_logger("app.services.user_loader")
+
+batch_size_histogram = get_meter().create_histogram(
+    "users.batch_load.size",
+    description="Number of distinct user ids resolved per batch",
+)
+
+
+class UserBatchLoader:
+    """Resolves users by id in batches: one Redis MGET, then one SQL query for the misses.
+
+    Single-id loads issued within the same event-loop tick are merged into one batch.
+    Stale entries are refreshed in the background through ``refresh_in_background``,
+    keyed per user like ``UserService``'s refreshes, so concurrent readers of the
+    same stale user trigger a single reload; the reloads scheduled within a tick
+    share one SQL query. Users are returned as the same dicts
+    ``UserService.get_user_by_id`` caches.
+    """
+
+    def __init__(self):
+        self._pending: dict[int, asyncio.Future] = {}
+        self._refreshing: dict[int, asyncio.Future] = {}
+        self._background: set[asyncio.Task] = set()
+
+    async def load(self, user_id: int, cache, tracer) -> dict | None:
+        future = self._enqueue(self._pending, user_id, lambda ids: self.load_many(ids, cache, tracer))
+        # A cancelled caller must not cancel the result the other callers are waiting on
+        return await asyncio.shield(future)
+
+    async def load_many(self, user_ids: list[int], cache, tracer) -> dict[int, dict]:
+        """Return the users found for ``user_ids``, keyed by id."""
+        with tracer.start_as_current_span("users-batch-load") as span:
+            ids = list(dict.fromkeys(user_ids))
+            span.set_attribute("users.batch.size", len(ids))
+            batch_size_histogram.record(len(ids))
+
+            entries = await cache.get_many([user_by_id_key(user_id) for user_id in ids])
+
+            users, misses, stale = {}, [], []
+            for user_id, entry in zip(ids, entries):
+                if entry is None:
+                    misses.append(user_id)
+                    continue
+                users[user_id] = json.loads(entry.value)
+                if entry.stale:
+                    stale.append(user_id)
+
+            span.set_attribute("users.batch.cache_misses", len(misses))
+            if misses:
+                users.update(await self._fetch(misses, cache))
+            for user_id in stale:
+                refresh_in_background(cache, user_by_id_key(user_id), partial(self._refresh, user_id, cache))
+
+            return users
+
+    def _refresh(self, user_id: int, cache) -> asyncio.Future:
+        return self._enqueue(self._refreshing, user_id, lambda ids: self._fetch(ids, cache))
+
+    def _enqueue(self, batch: dict[int, asyncio.Future], user_id: int, load) -> asyncio.Future:
+        """Add user_id to the batch that ``load`` resolves on the next event-loop tick."""
+        future = batch.get(user_id)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = batch[user_id] = loop.create_future()
+            if len(batch) == 1:
+                loop.call_soon(self._dispatch, batch, load)
+        return future
+
+    def _dispatch(self, batch: dict[int, asyncio.Future], load) -> None:
+        pending = dict(batch)
+        batch.clear()
+        self._spawn(self._resolve(pending, load))
+
+    async def _resolve(self, pending: dict[int, asyncio.Future], load) -> None:
+        try:
+            users = await load(list(pending))
+        except Exception as e:
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(e)
+                    # Mark the exception as retrieved even if every caller went away
+                    future.exception()
+            return
+
+        for user_id, future in pending.items():
+            if not future.done():
+                future.set_result(users.get(user_id))
+
+    async def _fetch(self, user_ids: list[int], cache) -> dict[int, dict]:
+        # Batches span several requests, so they use a session of their own
+        async with async_session() as session:
+            result = await session.execute(select(Users).where(Users.id.in_(user_ids)))
+            users = {user.id: user.to_dict() for user in result.scalars().all()}
+
+        items = []
+        for user_id, user_dict in users.items():
+            key = user_by_id_key(user_id)
+            ttl = cache_ttl(key)
+            items.append({"key": key, "value": json.dumps(user_dict), "expire": ttl,
+                          "soft_ttl": cache_soft_ttl(key, ttl), "tags": [user_tag(user_id)]})
+        await cache.set_many(items)
+        return users
+
+    def _spawn(self, coroutine) -> None:
+        task = asyncio.ensure_future(coroutine)
+        self._background.add(task)
+        task.add_done_callback(self._on_background_done)
+
+    def _on_background_done(self, task: asyncio.Task) -> None:
+        self._background.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Background user batch load failed: %s", task.exception())
+
+
+user_loader = UserBatchLoader()
@@ -4,48 +4,46 @@ from opentelemetry.trace import Status, StatusCode
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select
 
-from passlib.context import CryptContext
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 
+from app.caching.keys import cache_soft_ttl, cache_ttl, permission_tag, role_tag, user_by_id_key, user_tag
+from app.caching.singleflight import coalesce, refresh_in_background
+from app.db import async_session
+from app.events.outbox import outbox_relay
+from app.events.schemas import encode_event
+from app.events.sharding import queue_for
+from app.services.authorization_service import authorization
+from app.services.hashing_service import PasswordHasher
+from app.schemas.events import UserCreated
 from app.schemas.user_profile import UserProfileBase
 from app.schemas.user_roles import UserRole
-from app.dependencies import get_db
+from app.models.outbox import OutboxEvents
 from app.models.users import Roles, Permissions, RolePermissions, UserRoles, Users, UserProfile
 from app.schemas.role_permission import RolePermission
 from app.schemas.user import UserCreate, UserUpdate, UserCreateRolePermission
-from fastapi import Depends, HTTPException
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from fastapi import HTTPException
 
 
 class UserService:
     @staticmethod
     async def get_user_by_id(user_id: int, session: AsyncSession, cache, tracer):
-        with tracer.start_as_current_span(f"db-query-get_user_by_id-{user_id}") as span:
+        with tracer.start_as_current_span("db-query-get_user_by_id") as span:
+            span.set_attribute("user.id", user_id)
             try:
-                cache_key = f"users:get_user_by_id:{user_id}"
-
-                # Check cache first
-                cached = await cache.get(cache_key)
-                if cached:
-                    return json.loads(cached)
-
-                statement = select(Users).where(Users.id == user_id)
-                result = await session.execute(statement)
-                user = result.scalar_one_or_none()
-
-                if user is None:
-                    return None
-
-                user_dict = user.to_dict()
-                await cache.set(cache_key, json.dumps(user_dict), expire=60)
-
-                span.set_attribute("user.id", user.id)
-                span.set_attribute("user.username", user.username)
-                span.set_attribute("fetched.user.success", True)
-                span.add_event("fetched.user.successful", attributes={"status": True})
-
-                return user
+                cache_key = user_by_id_key(user_id)
+
+                # Check cache first, refreshing stale entries in the background
+                entry = await cache.get_entry(cache_key)
+                if entry:
+                    if entry.stale:
+                        refresh_in_background(cache, cache_key, lambda: UserService._load_in_own_session(
+                            UserService._load_user_by_id, user_id, cache, tracer))
+                    return json.loads(entry.value)
+
+                # Concurrent misses for the same key share a single load
+                return await coalesce(cache, cache_key,
+                                      lambda: UserService._load_in_own_session(
+                                          UserService._load_user_by_id, user_id, cache, tracer))
             except SQLAlchemyError as e:
                 span.record_exception(e)
                 span.set_status(Status(StatusCode.ERROR, str(e)))
@@ -56,33 +54,54 @@ class UserService:
                 raise
 
     @staticmethod
-    async def get_user_by_username(username: str, session: AsyncSession, cache, tracer) -> Users:
-        with tracer.start_as_current_span("db-query-user") as root_span:
-            root_span.set_attribute("username", username)
-        try:
-            cache_key = f"users:get_user_by_id:{username}"
+    async def _load_in_own_session(load, key, cache, tracer):
+        # Shared loads outlive the request that started them (a coalesced load is
+        # shielded, a refresh runs in the background), so they never borrow its session
+        async with async_session() as session:
+            return await load(key, session, cache, tracer)
 
-            # Check cache first
-            cached = await cache.get(cache_key)
-            if cached:
-                return json.loads(cached)
+    @staticmethod
+    async def _load_user_by_id(user_id: int, session: AsyncSession, cache, tracer):
+        cache_key = user_by_id_key(user_id)
 
-            # Trace the database query
-            with tracer.start_as_current_span(f"db-query-get_user_by_username-{username}") as database_span:
-                result = await session.execute(select(Users).where(Users.username == username))
-                user = result.scalar_one_or_none()
+        with tracer.start_as_current_span("db-query-load_user_by_id") as span:
+            statement = select(Users).where(Users.id == user_id)
+            result = await session.execute(statement)
+            user = result.scalar_one_or_none()
+
+            if user is None:
+                return None
 
-                if user is None:
-                    return None
+            user_dict = user.to_dict()
+            ttl = cache_ttl(cache_key)
+            await cache.set(cache_key, json.dumps(user_dict), expire=ttl,
+                            soft_ttl=cache_soft_ttl(cache_key, ttl), tags=[user_tag(user.id)])
 
-                user_dict = user.to_dict()
-                await cache.set(cache_key, json.dumps(user_dict), expire=60)
+            span.set_attribute("user.id", user.id)
+            span.set_attribute("user.username", user.username)
+            span.set_attribute("fetched.user.success", True)
+            span.add_event("fetched.user.successful", attributes={"status": True})
 
-                database_span.set_attribute("user.id", user.id)
-                database_span.set_attribute("fetched.user.success", True)
-                database_span.add_event("fetched.user.successful", attributes={"status": True})
+            return user
 
-                return user
+    @staticmethod
+    async def get_user_by_username(username: str, session: AsyncSession, cache, tracer) -> Users:
+        with tracer.start_as_current_span("db-query-user") as root_span:
+            root_span.set_attribute("username", username)
+        try:
+            cache_key = f"users:get_user_by_username:{username}"
+
+            # Check cache first, refreshing stale entries in the background
+            entry = await cache.get_entry(cache_key)
+            if entry:
+                if entry.stale:
+                    refresh_in_background(cache, cache_key, lambda: UserService._load_in_own_session(
+                        UserService._load_user_by_username, username, cache, tracer))
+                return json.loads(entry.value)
+
+            return await coalesce(cache, cache_key,
+                                  lambda: UserService._load_in_own_session(
+                                      UserService._load_user_by_username, username, cache, tracer))
         except SQLAlchemyError as e:
             root_span.record_exception(e)
             root_span.set_status(Status(StatusCode.ERROR, str(e)))
@@ -93,22 +112,62 @@ class UserService:
             raise
 
     @staticmethod
-    async def service_delete_user(user_id: int, db=Depends(get_db)):
+    async def get_user_credentials(username: str, session: AsyncSession, tracer) -> Users | None:
+        """Load a user together with its password hash, bypassing the cache.
+
+        Cached users are plain dicts without credentials, so logins must not use them.
+        """
+        with tracer.start_as_current_span("db-query-get_user_credentials") as span:
+            span.set_attribute("user.username", username)
+            async with session:
+                result = await session.execute(select(Users).where(Users.username == username))
+                return result.scalar_one_or_none()
+
+    @staticmethod
+    async def _load_user_by_username(username: str, session: AsyncSession, cache, tracer) -> Users:
+        cache_key = f"users:get_user_by_username:{username}"
+
+        # Trace the database query
+        with tracer.start_as_current_span("db-query-get_user_by_username") as database_span:
+            database_span.set_attribute("user.username", username)
+            result = await session.execute(select(Users).where(Users.username == username))
+            user = result.scalar_one_or_none()
+
+            if user is None:
+                return None
+
+            user_dict = user.to_dict()
+            ttl = cache_ttl(cache_key)
+            await cache.set(cache_key, json.dumps(user_dict), expire=ttl,
+                            soft_ttl=cache_soft_ttl(cache_key, ttl), tags=[user_tag(user.id)])
+
+            database_span.set_attribute("user.id", user.id)
+            database_span.set_attribute("fetched.user.success", True)
+            database_span.add_event("fetched.user.successful", attributes={"status": True})
+
+            return user
+
+    @staticmethod
+    async def service_delete_user(user_id: int, session: AsyncSession, cache):
         try:
-            with db as session:
+            async with session:
                 user = await session.get(Users, user_id)
                 await session.delete(user)
                 await session.commit()
-                return user
+
+            await cache.invalidate_tags(user_tag(user_id))
+            await authorization.apply_change("remove_user", user_id=user_id)
+            return user
         except IntegrityError:
             await session.rollback()
             raise
 
     @staticmethod
     async def service_create_user(user_create: UserCreate, session: AsyncSession, tracer) -> Users:
-        with tracer.start_as_current_span(f"db-query-service_create_user-{user_create.username}") as create_user_span:
+        with tracer.start_as_current_span("db-query-service_create_user") as create_user_span:
+            create_user_span.set_attribute("user.username", user_create.username)
             try:
-                hashed_password = pwd_context.hash(
+                hashed_password = await PasswordHasher.hash(
                     user_create.password_hash)
 
                 db_user = Users(
@@ -121,8 +180,17 @@ class UserService:
 
                 async with session:
                     session.add(db_user)
+                    await session.flush()
+                    # The event commits or rolls back together with the user row
+                    payload, headers = encode_event(UserCreated(id=db_user.id, username=db_user.username))
+                    session.add(OutboxEvents(
+                        queue_name=queue_for("user.created", db_user.id),
+                        payload=payload,
+                        headers=headers,
+                    ))
                     await session.commit()
                     await session.refresh(db_user)
+                outbox_relay.notify()
 
                 create_user_span.set_attribute("user.id", db_user.id)
                 create_user_span.set_attribute("user.username", db_user.username)
@@ -130,11 +198,6 @@ class UserService:
                 create_user_span.set_attribute("created.user.success", True)
                 create_user_span.add_event("created.user.successful", attributes={"status": True})
 
-                # publish event
-                from app.events.rabbitmq import RabbitMQClient
-                await RabbitMQClient.publish("user.created",
-                                             json.dumps({"id": db_user.id, "username": db_user.username}).encode())
-
                 return db_user
 
             except SQLAlchemyError as e:
@@ -157,7 +220,7 @@ class UserService:
     async def service_create_user_with_role_permission(user_create: UserCreateRolePermission,
                                                        session: AsyncSession) -> Users:
         try:
-            hashed_password = pwd_context.hash(user_create.password_hash)
+            hashed_password = await PasswordHasher.hash(user_create.password_hash)
 
             permission = Permissions(
                 permission_name=user_create.permission,
@@ -178,19 +241,26 @@ class UserService:
 
             async with session:
                 session.add(db_user)
+                await session.flush()
+                user_id, role_id, permission_id = db_user.id, role.id, permission.id
                 await session.commit()
                 await session.refresh(db_user)
-                return db_user
+
+            await authorization.apply_change("add_permission", permission_id=permission_id,
+                                             permission_name=user_create.permission)
+            await authorization.apply_change("grant_permission", role_id=role_id, permission_id=permission_id)
+            await authorization.apply_change("assign_role", user_id=user_id, role_id=role_id)
+            return db_user
         except IntegrityError:
             await session.rollback()
             raise HTTPException(status_code=409,
                                 detail="Username or email already exists")
 
     @staticmethod
-    async def service_update_user(user_id: int, user: UserUpdate, session: AsyncSession) -> Users:
+    async def service_update_user(user_id: int, user: UserUpdate, session: AsyncSession, cache) -> Users:
         try:
             async with session:
-                db_user = session.get(Users, user_id)
+                db_user = await session.get(Users, user_id)
             if db_user is None:
                 raise HTTPException(status_code=404, detail="User not found")
 
@@ -203,6 +273,7 @@ class UserService:
                 await session.commit()
                 await session.refresh(db_user)
 
+            await cache.invalidate_tags(user_tag(user_id))
             return db_user
         except IntegrityError:
             await session.rollback()
@@ -241,7 +312,7 @@ class UserService:
 
     @staticmethod
     async def service_assign_permission(role_permission: RolePermission,
-                                        session: AsyncSession) -> RolePermissions | None:
+                                        session: AsyncSession, cache) -> RolePermissions | None:
         try:
             async with session:
                 permission = await session.get(Permissions,
@@ -261,13 +332,17 @@ class UserService:
                 session.add(role_permission)
                 await session.commit()
                 await session.refresh(role_permission)
-                return role_permission
+
+            await cache.invalidate_tags(role_tag(role_permission.role_id))
+            await authorization.apply_change("grant_permission", role_id=role_permission.role_id,
+                                             permission_id=role_permission.permission_id)
+            return role_permission
         except IntegrityError:
             await session.rollback()
             raise
 
     @staticmethod
-    async def service_assign_role(user_roles: UserRole, session: AsyncSession) -> UserRoles | None:
+    async def service_assign_role(user_roles: UserRole, session: AsyncSession, cache) -> UserRoles | None:
         try:
             async with session:
                 user = await session.get(Users, user_roles.user_id)
@@ -286,7 +361,10 @@ class UserService:
                 session.add(user_roles)
                 await session.commit()
                 await session.refresh(user_roles)
-                return user_roles
+
+            await cache.invalidate_tags(user_tag(user_roles.user_id))
+            await authorization.apply_change("assign_role", user_id=user_roles.user_id, role_id=user_roles.role_id)
+            return user_roles
         except IntegrityError:
             await session.rollback()
             raise
@@ -296,72 +374,101 @@ class UserService:
         try:
             cache_key = f"roles:byuserid:{user_id}"
 
-            # Check cache first
-            cached = await cache.get(cache_key)
-            if cached:
-                return json.loads(cached)
-
-            # Trace the database query
-            with tracer.start_as_current_span(f"db-query-get_user_role-{user_id}"):
-                statement = select(Roles).join(UserRoles).where(Roles.id == user_id).where(UserRoles.user_id == user_id)
-                result = await session.execute(statement)
-                role = result.scalar_one_or_none()
-
-                if role is None:
-                    return None
-
-                role_dict = role.to_dict()
-                await cache.set(cache_key, json.dumps(role_dict), expire=60)
-                return role
+            # Check cache first, refreshing stale entries in the background
+            entry = await cache.get_entry(cache_key)
+            if entry:
+                if entry.stale:
+                    refresh_in_background(cache, cache_key, lambda: UserService._load_in_own_session(
+                        UserService._load_user_role, user_id, cache, tracer))
+                return json.loads(entry.value)
+
+            return await coalesce(cache, cache_key,
+                                  lambda: UserService._load_in_own_session(
+                                      UserService._load_user_role, user_id, cache, tracer))
         except IntegrityError:
             raise
         except Exception:
             raise
 
+    @staticmethod
+    async def _load_user_role(user_id: int, session: AsyncSession, cache, tracer):
+        cache_key = f"roles:byuserid:{user_id}"
+
+        # Trace the database query
+        with tracer.start_as_current_span("db-query-get_user_role") as span:
+            span.set_attribute("user.id", user_id)
+            statement = select(Roles).join(UserRoles).where(Roles.id == user_id).where(UserRoles.user_id == user_id)
+            result = await session.execute(statement)
+            role = result.scalar_one_or_none()
+
+            if role is None:
+                return None
+
+            role_dict = role.to_dict()
+            ttl = cache_ttl(cache_key)
+            await cache.set(cache_key, json.dumps(role_dict), expire=ttl,
+                            soft_ttl=cache_soft_ttl(cache_key, ttl), tags=[user_tag(user_id), role_tag(role.id)])
+            return role
+
     @staticmethod
     async def get_role_permission(role_name: str, session: AsyncSession, cache, tracer):
         try:
 
             cache_key = f"role_permissions:get_role_permission:{role_name}"
 
-            # Check cache first
-            cached = await cache.get(cache_key)
-            if cached:
-                return json.loads(cached)
-
-            # Trace the database query
-            with tracer.start_as_current_span(f"db-query-get_role_permission-{role_name}"):
-                statement = (
-                    select(Permissions)
-                    .join(RolePermissions, RolePermissions.permission_id == Permissions.id)
-                    .join(Roles, Roles.id == RolePermissions.role_id)
-                    .where(Roles.role_name == role_name)
-                )
+            # Check cache first, refreshing stale entries in the background
+            entry = await cache.get_entry(cache_key)
+            if entry:
+                if entry.stale:
+                    refresh_in_background(cache, cache_key, lambda: UserService._load_in_own_session(
+                        UserService._load_role_permission, role_name, cache, tracer))
+                return json.loads(entry.value)
+
+            return await coalesce(cache, cache_key,
+                                  lambda: UserService._load_in_own_session(
+                                      UserService._load_role_permission, role_name, cache, tracer))
+        except IntegrityError:
+            raise
+        except Exception:
+            raise
 
-                result = await session.execute(statement)
-                permissions = result.scalars().all()
+    @staticmethod
+    async def _load_role_permission(role_name: str, session: AsyncSession, cache, tracer):
+        cache_key = f"role_permissions:get_role_permission:{role_name}"
+
+        # Trace the database query
+        with tracer.start_as_current_span("db-query-get_role_permission") as span:
+            span.set_attribute("role.name", role_name)
+            statement = (
+                select(Permissions)
+                .join(RolePermissions, RolePermissions.permission_id == Permissions.id)
+                .join(Roles, Roles.id == RolePermissions.role_id)
+                .where(Roles.role_name == role_name)
+            )
 
-                if not permissions:
-                    return None
+            result = await session.execute(statement)
+            permissions = result.scalars().all()
 
-                # Assuming you have a Role object from a prior query or context
-                # If you need to fetch the Role, add a query for it
-                statement_role = select(Roles).where(Roles.role_name == role_name)
-                result_role = await session.execute(statement_role)
-                role = result_role.scalars().first()
+            if not permissions:
+                return None
 
-                if not role:
-                    return None
+            # Assuming you have a Role object from a prior query or context
+            # If you need to fetch the Role, add a query for it
+            statement_role = select(Roles).where(Roles.role_name == role_name)
+            result_role = await session.execute(statement_role)
+            role = result_role.scalars().first()
 
-                role_dict = {
-                    "role_name": role.role_name,
-                    "permissions": [perm.to_dict() for perm in permissions]
-                }
+            if not role:
+                return None
 
-                # Cache the result
-                await cache.set(cache_key, json.dumps(role_dict), expire=60)
-                return permissions
-        except IntegrityError:
-            raise
-        except Exception:
-            raise
+            role_dict = {
+                "role_name": role.role_name,
+                "permissions": [perm.to_dict() for perm in permissions]
+            }
+
+            # Cache the result
+            ttl = cache_ttl(cache_key)
+            await cache.set(cache_key, json.dumps(role_dict), expire=ttl,
+                            soft_ttl=cache_soft_ttl(cache_key, ttl),
+                            tags=[role_tag(role.id), *[permission_tag(perm.id) for perm in permissions]])
+            return permissions
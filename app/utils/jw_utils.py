@@ -1,14 +1,16 @@
+import hashlib
+import uuid
 from datetime import datetime, timedelta, timezone
 
 import jwt
 
-from passlib.context import CryptContext
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.users import Users
+from app.services.hashing_service import PasswordHasher
 from app.services.user_service import UserService
-from app.utils.env import get_key
+from app.utils.keyring import keyring
 
 ALGORITHM = "HS256"
 
@@ -22,15 +24,12 @@ class TokenData(BaseModel):
     username: str | None = None
 
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+async def verify_password(plain_password, hashed_password):
+    return await PasswordHasher.verify(plain_password, hashed_password)
 
 
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
-
-
-def get_password_hash(password):
-    return pwd_context.hash(password)
+async def get_password_hash(password):
+    return await PasswordHasher.hash(password)
 
 
 async def get_user(username: str, session: AsyncSession, cache, tracer) -> Users:
@@ -38,20 +37,27 @@ async def get_user(username: str, session: AsyncSession, cache, tracer) -> Users
 
 
 async def authenticate_user(username: str, password: str, session: AsyncSession, cache, tracer) -> Users:
-    user: Users = await get_user(username, session, cache, tracer)
+    user = await UserService.get_user_credentials(username, session, tracer)
     if not user:
         return False
-    if not verify_password(password, user.password_hash):
+    if not await verify_password(password, user.password_hash):
         return False
     return user
 
 
+def token_digest(token: str) -> str:
+    """Return the hex SHA-256 digest used to identify a token without storing it."""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.now(timezone.utc) + expires_delta
     else:
         expire = datetime.now(timezone.utc) + timedelta(minutes=15)
-    to_encode.update({"exp": expire})
+    # jti keeps tokens issued within the same second distinct, and so their digests
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
 
-    return jwt.encode(to_encode, get_key(), algorithm=ALGORITHM)
+    kid, secret = keyring.signing_key()
+    return jwt.encode(to_encode, secret, algorithm=ALGORITHM, headers={"kid": kid})
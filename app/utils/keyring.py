@@ -0,0 +1,40 @@
+import jwt
+from jwt.exceptions import InvalidTokenError
+
+from app.config import settings
+
+DEFAULT_KID = "default"
+
+
+class Keyring:
+    """JWT signing keys held in memory and selected by the token's ``kid`` header.
+
+    New tokens are signed with the active key; any key still in the ring can
+    verify, so secrets can be rotated without invalidating issued tokens.
+    Tokens without a ``kid`` are verified with SECRET_KEY.
+    """
+
+    def __init__(self, keys: dict[str, str], active_kid: str):
+        if active_kid not in keys:
+            raise ValueError(f"Active JWT key '{active_kid}' is not in the keyring")
+        self.keys = keys
+        self.active_kid = active_kid
+
+    @classmethod
+    def from_settings(cls) -> "Keyring":
+        keys = {DEFAULT_KID: settings.SECRET_KEY, **settings.JWT_KEYS}
+        return cls(keys, settings.JWT_ACTIVE_KID)
+
+    def signing_key(self) -> tuple[str, str]:
+        """Return the kid and secret new tokens are signed with."""
+        return self.active_kid, self.keys[self.active_kid]
+
+    def verification_key(self, token: str) -> str:
+        """Return the secret matching the token's kid header."""
+        kid = jwt.get_unverified_header(token).get("kid", DEFAULT_KID)
+        if kid not in self.keys:
+            raise InvalidTokenError(f"Unknown signing key '{kid}'")
+        return self.keys[kid]
+
+
+keyring = Keyring.from_settings()
@@ -1,9 +1,86 @@
+import atexit
+import copy
 import logging
+import queue
 import sys
+from logging.handlers import QueueHandler, QueueListener
 from typing import Optional
 from pythonjsonlogger.json import JsonFormatter
 
 from app.config import settings  # Assuming settings has LOG_LEVEL and other config
+from app.instrumentation.metrics import get_meter
+
+dropped_counter = get_meter().create_counter(
+    "logging.records.dropped",
+    description="Log records dropped because the logging queue was full",
+)
+
+_exception_formatter = logging.Formatter()
+
+
+class DroppingQueueHandler(QueueHandler):
+    """Hands records to the listener thread without ever blocking the caller.
+
+    The message is interpolated and any traceback rendered before the record
+    is queued, so the listener never touches arguments that the caller may
+    still mutate; JSON formatting and the write to stdout happen on the
+    listener thread. When the queue is full the record is dropped and counted
+    instead of stalling the event loop.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Like QueueHandler.prepare, but the traceback stays out of the message
+        # so the JSON formatter still reports it in its own exc_info field
+        record = copy.copy(record)
+        record.msg = record.message = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _exception_formatter.formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            dropped_counter.add(1)
+
+
+class BlockingStopQueueListener(QueueListener):
+    def enqueue_sentinel(self) -> None:
+        # Waits for room so stopping never fails on a full queue
+        self.queue.put(self._sentinel)
+
+
+_queue_handler: DroppingQueueHandler | None = None
+
+
+def _get_queue_handler(log_level: int) -> DroppingQueueHandler:
+    global _queue_handler
+    if _queue_handler is None:
+        log_queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+
+        # Create console handler with a JSON formatter
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setLevel(log_level)
+
+        # Define JSON log format
+        formatter = JsonFormatter(
+            fmt="%(asctime)s %(name)s %(levelname)s %(message)s %(filename)s %(lineno)d"
+        )
+        console_handler.setFormatter(formatter)
+
+        # One background thread formats and writes the records of every logger
+        listener = BlockingStopQueueListener(log_queue, console_handler, respect_handler_level=True)
+        listener.start()
+        atexit.register(listener.stop)
+        _queue_handler = DroppingQueueHandler(log_queue)
+    return _queue_handler
 
 
 def get_logger(name: Optional[str] = None) -> logging.Logger:
@@ -18,20 +95,10 @@ def get_logger(name: Optional[str] = None) -> logging.Logger:
     log_level = getattr(logging, settings.LOG_LEVEL.upper(), logging.INFO)
     logger.setLevel(log_level)
 
-    # Create console handler with a JSON formatter
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setLevel(log_level)
-
-    # Define JSON log format
-    formatter = JsonFormatter(
-        fmt="%(asctime)s %(name)s %(levelname)s %(message)s %(filename)s %(lineno)d"
-    )
-    console_handler.setFormatter(formatter)
-
     # Add handler to logger
-    logger.addHandler(console_handler)
+    logger.addHandler(_get_queue_handler(log_level))
 
     # Prevent propagation to root logger to avoid duplicate logs
     logger.propagate = False
 
-    return logger
\ No newline at end of file
+    return logger
@@ -0,0 +1,109 @@
+"""Measure API key lookup latency by digest on a large apikeys-shaped table.
+
+Creates ``apikeys_bench`` with the same digest column and indexes as
+``APIKeys``, fills it with ``--rows`` synthetic keys using generate_series
+and times random lookups by digest. With ``--compare-text`` a second table
+keyed by the unindexed full token text, as the old schema stored it, is
+timed the same way (keep ``--rows`` small for that one).
+
+Usage:
+    python -m benchmarks.api_key_lookup --rows 10000000 --lookups 2000
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.config import settings
+
+SETUP_DIGEST = [
+    "DROP TABLE IF EXISTS apikeys_bench",
+    """
+    CREATE TABLE apikeys_bench AS
+    SELECT g AS id,
+           encode(sha256(convert_to('token-' || g, 'UTF8')), 'hex')::char(64) AS api_key_digest,
+           now() + (g % 1440) * interval '1 minute' AS expires_at,
+           (g % 10 <> 0) AS is_active,
+           (g % 100000) + 1 AS user_id
+    FROM generate_series(1, {rows}) AS g
+    """,
+    "CREATE UNIQUE INDEX ON apikeys_bench (api_key_digest)",
+    "CREATE INDEX ON apikeys_bench (user_id, is_active, expires_at)",
+    "ANALYZE apikeys_bench",
+]
+
+SETUP_TEXT = [
+    "DROP TABLE IF EXISTS apikeys_bench_text",
+    """
+    CREATE TABLE apikeys_bench_text AS
+    SELECT g AS id, 'token-' || g || repeat('x', 200) AS api_key,
+           now() + (g % 1440) * interval '1 minute' AS expires_at,
+           (g % 10 <> 0) AS is_active
+    FROM generate_series(1, {rows}) AS g
+    """,
+    "ANALYZE apikeys_bench_text",
+]
+
+LOOKUP_DIGEST = text(
+    "SELECT id FROM apikeys_bench "
+    "WHERE api_key_digest = encode(sha256(convert_to(:token, 'UTF8')), 'hex') "
+    "AND is_active AND expires_at > now()"
+)
+
+LOOKUP_TEXT = text(
+    "SELECT id FROM apikeys_bench_text "
+    "WHERE api_key = :token || repeat('x', 200) AND is_active AND expires_at > now()"
+)
+
+
+async def run_setup(conn, statements, rows):
+    # CREATE TABLE AS cannot take bind parameters, so the row count is inlined
+    for statement in statements:
+        await conn.execute(text(statement.format(rows=int(rows))))
+
+
+async def time_lookups(conn, statement, rows, lookups):
+    latencies = []
+    for _ in range(lookups):
+        token = f"token-{random.randint(1, rows)}"
+        start_time = time.perf_counter()
+        await conn.execute(statement, {"token": token})
+        latencies.append((time.perf_counter() - start_time) * 1000)
+    latencies.sort()
+    return {
+        "p50_ms": statistics.median(latencies),
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1],
+        "mean_ms": statistics.fmean(latencies),
+    }
+
+
+async def main(rows: int, lookups: int, compare_text: bool):
+    engine = create_async_engine(settings.DATABASE_URL)
+    async with engine.begin() as conn:
+        print(f"Populating apikeys_bench with {rows} rows...")
+        await run_setup(conn, SETUP_DIGEST, rows)
+        if compare_text:
+            await run_setup(conn, SETUP_TEXT, rows)
+
+    async with engine.connect() as conn:
+        print("digest lookup:", await time_lookups(conn, LOOKUP_DIGEST, rows, lookups))
+        if compare_text:
+            print("full-text lookup:", await time_lookups(conn, LOOKUP_TEXT, rows, lookups))
+
+    async with engine.begin() as conn:
+        await conn.execute(text("DROP TABLE IF EXISTS apikeys_bench"))
+        await conn.execute(text("DROP TABLE IF EXISTS apikeys_bench_text"))
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--compare-text", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.lookups, args.compare_text))
@@ -0,0 +1,44 @@
+"""Compare JSON and msgpack encoding of typical user events.
+
+Encodes and decodes ``--events`` synthetic ``user.created`` events through the
+event schema registry, including pydantic validation, and reports throughput
+and the average body size on the wire for each content type.
+
+Usage:
+    python -m benchmarks.event_encoding --events 100000
+"""
+import argparse
+import time
+
+from app.events.schemas import JSON, MSGPACK, decode_event, encode_event
+from app.schemas.events import UserCreated
+
+
+def measure(events: list[UserCreated], content_type: str) -> dict:
+    start_time = time.perf_counter()
+    encoded = [encode_event(event, content_type) for event in events]
+    encode_seconds = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    for body, headers in encoded:
+        decode_event("user.created", body, headers)
+    decode_seconds = time.perf_counter() - start_time
+
+    return {
+        "encode_per_s": round(len(events) / encode_seconds),
+        "decode_per_s": round(len(events) / decode_seconds),
+        "avg_bytes": round(sum(len(body) for body, _ in encoded) / len(events), 1),
+    }
+
+
+def main(count: int):
+    events = [UserCreated(id=1_000_000 + index, username=f"user_{index:08d}") for index in range(count)]
+    for content_type in (JSON, MSGPACK):
+        print(f"{content_type}:", measure(events, content_type))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=100_000)
+    args = parser.parse_args()
+    main(args.events)
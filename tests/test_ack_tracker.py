@@ -0,0 +1,33 @@
+from app.events.runtime import AckTracker
+
+
+def test_release_acks_only_the_settled_prefix():
+    acks = AckTracker()
+    for tag in (1, 2, 3, 4):
+        acks.track(tag, f"message-{tag}")
+
+    acks.settle(1, acked=True)
+    acks.settle(3, acked=True)
+
+    assert acks.release() == "message-1"
+    assert acks.release() is None
+    assert acks.unflushed == 1
+
+    acks.settle(2, acked=True)
+
+    assert acks.release() == "message-3"
+    assert len(acks) == 1
+
+
+def test_release_skips_rejected_messages():
+    acks = AckTracker()
+    for tag in (1, 2, 3):
+        acks.track(tag, f"message-{tag}")
+
+    acks.settle(1, acked=True)
+    acks.settle(2, acked=False)
+    assert acks.release() == "message-1"
+
+    acks.settle(3, acked=False)
+    assert acks.release() is None
+    assert len(acks) == 0
@@ -0,0 +1,126 @@
+from datetime import date, datetime, timedelta
+from types import FunctionType
+from unittest.mock import AsyncMock, MagicMock
+
+from app import db
+from app.config import settings
+from app.migrations import api_key_partitioning
+from app.services.api_key_partitions import ApiKeyPartitionManager, partition_name
+
+
+class FakeConnection:
+    """Records the SQL it is given and answers from canned results, matched by substring."""
+
+    def __init__(self, results: dict[str, object] | None = None):
+        self.results = results or {}
+        self.statements: list[str] = []
+        self.run_sync = AsyncMock()
+
+    async def execute(self, statement, params=None):
+        sql = str(statement)
+        self.statements.append(sql)
+        for fragment, result in self.results.items():
+            if fragment in sql:
+                return result(params) if isinstance(result, FunctionType) else result
+        return MagicMock(rowcount=0, scalar_one=MagicMock(return_value=False), scalar_one_or_none=MagicMock())
+
+    def executed(self, fragment: str) -> list[str]:
+        return [sql for sql in self.statements if fragment in sql]
+
+
+def scalar(value) -> MagicMock:
+    return MagicMock(scalar_one=MagicMock(return_value=value), scalar_one_or_none=MagicMock(return_value=value))
+
+
+async def test_new_partitions_adopt_the_rows_stranded_in_the_default_partition():
+    start = date(2030, 1, 1)
+    conn = FakeConnection({
+        "to_regclass": lambda params: scalar(params["name"] == "apikeys_default"),
+        "SELECT EXISTS": scalar(True),
+        "DELETE FROM apikeys_default": MagicMock(rowcount=2),
+    })
+
+    await ApiKeyPartitionManager()._create_partition(conn, start, start + timedelta(days=1))
+
+    steps = [sql.split(" (")[0].strip() for sql in conn.statements[3:]]
+    assert steps == [
+        "ALTER TABLE apikeys DETACH PARTITION apikeys_default",
+        f"CREATE TABLE {partition_name(start)} PARTITION OF apikeys FOR VALUES FROM",
+        "INSERT INTO apikeys",
+        "DELETE FROM apikeys_default WHERE expires_at >= :start AND expires_at < :upper",
+        "ALTER TABLE apikeys ATTACH PARTITION apikeys_default DEFAULT",
+    ]
+
+
+async def test_partitions_are_created_directly_when_the_default_partition_has_no_rows_in_range():
+    conn = FakeConnection({
+        "to_regclass": lambda params: scalar(params["name"] == "apikeys_default"),
+        "SELECT EXISTS": scalar(False),
+    })
+
+    await ApiKeyPartitionManager()._create_partition(conn, date(2030, 1, 1), date(2030, 1, 2))
+
+    assert len(conn.executed("CREATE TABLE")) == 1
+    assert not conn.executed("DETACH") and not conn.executed("INSERT")
+
+
+async def test_existing_partitions_are_left_alone():
+    conn = FakeConnection({"to_regclass": scalar(True)})
+
+    await ApiKeyPartitionManager()._create_partition(conn, date(2030, 1, 1), date(2030, 1, 2))
+
+    assert conn.statements == ["SELECT to_regclass(:name) IS NOT NULL"]
+
+
+async def test_pruning_drops_old_partitions_and_expired_default_rows(monkeypatch):
+    monkeypatch.setattr(settings, "API_KEY_PARTITION_INTERVAL", "daily")
+    monkeypatch.setattr(settings, "API_KEY_RETENTION_DAYS", 30)
+    monkeypatch.setattr(settings, "API_KEY_PARTITION_DROP", True)
+    today = datetime.now().date()
+    old, recent = partition_name(today - timedelta(days=40)), partition_name(today - timedelta(days=5))
+    conn = FakeConnection({"pg_inherits": [(old,), (recent,), ("apikeys_default",)]})
+
+    assert await ApiKeyPartitionManager().prune_partitions(conn) == [old]
+    assert conn.executed(f"DETACH PARTITION {old}") and conn.executed(f"DROP TABLE {old}")
+    assert not conn.executed(recent)
+    assert conn.executed("DELETE FROM apikeys_default WHERE expires_at < :cutoff")
+
+
+async def test_migration_leaves_an_already_partitioned_table_in_place():
+    conn = FakeConnection({"relkind": scalar("p")})
+
+    await api_key_partitioning.upgrade(conn)
+
+    assert not conn.executed("RENAME") and not conn.executed("DROP TABLE")
+    assert conn.executed("apikeys_default PARTITION OF apikeys DEFAULT")
+    assert conn.executed("CREATE INDEX IF NOT EXISTS ix_apikeys_expires_at_active")
+
+
+async def test_migration_copies_a_plain_table_into_the_partitioned_one():
+    conn = FakeConnection({"relkind": scalar("r")})
+
+    await api_key_partitioning.upgrade(conn)
+
+    order = [conn.statements.index(conn.executed(fragment)[0]) for fragment in (
+        "RENAME TO apikeys_unpartitioned",
+        "apikeys_default PARTITION OF apikeys DEFAULT",
+        "SELECT id, api_key_digest, expires_at, is_active, created_at, updated_at, user_id FROM apikeys_unpartitioned",
+        "DROP TABLE apikeys_unpartitioned",
+    )]
+    assert order == sorted(order)
+    conn.run_sync.assert_awaited_once()
+
+
+async def test_startup_takes_the_migration_lock_before_touching_the_schema(monkeypatch):
+    conn = FakeConnection()
+    begin = MagicMock()
+    begin.__aenter__ = AsyncMock(return_value=conn)
+    begin.__aexit__ = AsyncMock(return_value=False)
+    monkeypatch.setattr(db, "engine", MagicMock(begin=MagicMock(return_value=begin)))
+    monkeypatch.setattr(db, "run_migrations", AsyncMock())
+
+    await db.init_db()
+
+    assert conn.statements == ["SELECT pg_advisory_xact_lock(:id)"]
+    conn.run_sync.assert_awaited_once()
+    db.run_migrations.assert_awaited_once_with(conn)
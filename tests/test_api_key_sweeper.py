@@ -0,0 +1,29 @@
+from unittest.mock import AsyncMock, MagicMock
+
+from app.services import api_key_sweeper as sweeper_module
+from app.services.api_key_sweeper import ApiKeySweeper
+
+
+def fake_engine(rowcounts: list[int]) -> tuple[MagicMock, AsyncMock]:
+    execute = AsyncMock(side_effect=[MagicMock(rowcount=count) for count in rowcounts])
+    begin = MagicMock()
+    begin.__aenter__ = AsyncMock(return_value=MagicMock(execute=execute))
+    begin.__aexit__ = AsyncMock(return_value=False)
+    return MagicMock(begin=MagicMock(return_value=begin)), execute
+
+
+async def test_sweep_stops_after_the_first_partial_batch(monkeypatch):
+    engine, execute = fake_engine([10, 10, 3, 10])
+    monkeypatch.setattr(sweeper_module, "engine", engine)
+    monkeypatch.setattr(sweeper_module.settings, "API_KEY_SWEEP_BATCH_SIZE", 10)
+
+    assert await ApiKeySweeper().sweep() == 23
+    assert execute.await_count == 3
+
+
+async def test_sweep_runs_a_single_batch_when_nothing_is_expired(monkeypatch):
+    engine, execute = fake_engine([0])
+    monkeypatch.setattr(sweeper_module, "engine", engine)
+
+    assert await ApiKeySweeper().sweep() == 0
+    assert execute.await_count == 1
@@ -0,0 +1,93 @@
+import json
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+from opentelemetry import trace
+
+from app.caching.envelope import CacheEntry
+from app.caching.keys import revoked_token_key, token_validation_key, user_tag
+from app.config import settings
+from app.services.auth_service import AuthenticateService
+from app.services.user_service import UserService
+from app.utils.jw_utils import token_digest
+
+tracer = trace.get_tracer(__name__)
+owner = {"id": 1, "username": "ada", "is_active": True}
+
+
+def fake_session(active: bool = True) -> MagicMock:
+    session = MagicMock(commit=AsyncMock())
+    session.__aenter__ = AsyncMock(return_value=session)
+    session.__aexit__ = AsyncMock(return_value=False)
+    session.execute = AsyncMock(return_value=MagicMock(first=MagicMock(return_value=(object(),) if active else None)))
+    return session
+
+
+def fake_cache(cached: dict | None = None, revoked: bool = False) -> MagicMock:
+    entry = CacheEntry(value=json.dumps(cached), stale=False) if cached else None
+    cache = MagicMock(set=AsyncMock(), delete=AsyncMock(), get=AsyncMock(return_value=None))
+    cache.get_many = AsyncMock(return_value=[entry, CacheEntry(value="1", stale=False) if revoked else None])
+    return cache
+
+
+async def test_revoked_keys_are_rejected_even_with_a_cached_validation(monkeypatch):
+    monkeypatch.setattr(UserService, "get_user_by_username", AsyncMock(return_value=owner))
+    session = fake_session()
+
+    result = await AuthenticateService.validate_api_key("token", "ada", time.time() + 60, session,
+                                                        fake_cache(cached=owner, revoked=True), tracer)
+
+    assert result is None
+    session.execute.assert_not_awaited()
+    UserService.get_user_by_username.assert_not_awaited()
+
+
+async def test_a_cached_validation_issues_no_sql(monkeypatch):
+    monkeypatch.setattr(UserService, "get_user_by_username", AsyncMock(return_value=owner))
+    session = fake_session()
+    cache = fake_cache(cached=owner)
+
+    assert await AuthenticateService.validate_api_key("token", "ada", time.time() + 60, session, cache,
+                                                      tracer) == owner
+    cache.get_many.assert_awaited_once_with([token_validation_key(token_digest("token")),
+                                             revoked_token_key(token_digest("token"))])
+    session.execute.assert_not_awaited()
+    UserService.get_user_by_username.assert_not_awaited()
+
+
+async def test_validations_are_cached_no_longer_than_the_key_lives(monkeypatch):
+    monkeypatch.setattr(UserService, "get_user_by_username", AsyncMock(return_value=owner))
+    monkeypatch.setattr(settings, "TOKEN_VALIDATION_CACHE_TTL", 3600)
+    cache = fake_cache()
+
+    assert await AuthenticateService.validate_api_key("token", "ada", time.time() + 30, fake_session(), cache,
+                                                      tracer) == owner
+    key, value = cache.set.await_args.args
+    assert key == token_validation_key(token_digest("token"))
+    assert json.loads(value) == owner
+    assert 0 < cache.set.await_args.kwargs["expire"] <= 30
+    assert cache.set.await_args.kwargs["tags"] == [user_tag(1)]
+
+
+async def test_inactive_keys_are_not_cached(monkeypatch):
+    monkeypatch.setattr(UserService, "get_user_by_username", AsyncMock(return_value=owner))
+    monkeypatch.setattr(settings, "API_KEY_WRITE_BEHIND", False)
+    cache = fake_cache()
+
+    assert await AuthenticateService.validate_api_key("token", "ada", time.time() + 30, fake_session(active=False),
+                                                      cache, tracer) is None
+    cache.set.assert_not_awaited()
+
+
+async def test_revocation_marks_the_key_and_evicts_its_cached_validation():
+    cache = fake_cache()
+    session = fake_session()
+
+    await AuthenticateService.revoke_api_key("token", time.time() + 60, session, cache)
+
+    digest = token_digest("token")
+    assert cache.set.await_args.args == (revoked_token_key(digest), "1")
+    assert 0 < cache.set.await_args.kwargs["expire"] <= 60
+    cache.delete.assert_awaited_once_with(token_validation_key(digest))
+    session.execute.assert_awaited_once()
+    session.commit.assert_awaited_once()
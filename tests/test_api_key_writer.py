@@ -0,0 +1,50 @@
+import json
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.services import api_key_writer as writer_module
+from app.services.api_key_writer import ApiKeyWriteBehind
+
+
+def payload(digest: str) -> str:
+    return json.dumps({"api_key_digest": digest, "user_id": 1, "is_active": True,
+                       "expires_at": "2030-01-01T00:00:00+00:00"})
+
+
+def fake_engine(execute: AsyncMock) -> MagicMock:
+    conn = MagicMock(execute=execute)
+    begin = MagicMock()
+    begin.__aenter__ = AsyncMock(return_value=conn)
+    begin.__aexit__ = AsyncMock(return_value=False)
+    return MagicMock(begin=MagicMock(return_value=begin))
+
+
+async def test_flushed_rows_leave_the_processing_list_only_after_the_insert(monkeypatch):
+    execute = AsyncMock()
+    monkeypatch.setattr(writer_module, "engine", fake_engine(execute))
+    writer = ApiKeyWriteBehind("pending")
+    writer._cache = cache = AsyncMock()
+    cache.move_many.return_value = [payload("a"), payload("b")]
+
+    assert await writer.flush() == 2
+
+    assert cache.move_many.await_args.args[:2] == ("pending", "pending:processing")
+    cache.remove_values.assert_awaited_once_with("pending:processing", payload("a"), payload("b"))
+    cache.requeue.assert_not_awaited()
+    # Timestamps are set explicitly, since a Core insert skips the model defaults
+    rows = execute.await_args.args[0].compile().params
+    assert rows["created_at_m0"] is not None and rows["updated_at_m1"] is not None
+
+
+async def test_failed_flush_requeues_its_rows(monkeypatch):
+    monkeypatch.setattr(writer_module, "engine", fake_engine(AsyncMock(side_effect=RuntimeError("db down"))))
+    writer = ApiKeyWriteBehind("pending")
+    writer._cache = cache = AsyncMock()
+    cache.move_many.return_value = [payload("a")]
+
+    with pytest.raises(RuntimeError):
+        await writer.flush()
+
+    cache.requeue.assert_awaited_once_with("pending:processing", "pending", payload("a"))
+    cache.remove_values.assert_not_awaited()
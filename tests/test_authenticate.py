@@ -0,0 +1,25 @@
+import json
+from unittest.mock import AsyncMock, MagicMock
+
+from opentelemetry import trace
+
+from app.caching.envelope import CacheEntry
+from app.models.users import Users
+from app.services.hashing_service import PasswordHasher
+from app.utils.jw_utils import authenticate_user
+
+
+async def test_login_succeeds_for_a_user_that_is_cached(monkeypatch):
+    monkeypatch.setattr(PasswordHasher, "verify", AsyncMock(side_effect=lambda plain, hashed: plain == hashed))
+    user = Users(id=1, username="ada", email="ada@example.com", password_hash="secret",
+                 is_active=True, is_disabled=False)
+    cache = MagicMock()
+    cache.get_entry = AsyncMock(return_value=CacheEntry(value=json.dumps(user.to_dict()), stale=False))
+    session = MagicMock()
+    session.__aenter__ = AsyncMock(return_value=session)
+    session.__aexit__ = AsyncMock(return_value=False)
+    session.execute = AsyncMock(return_value=MagicMock(scalar_one_or_none=MagicMock(return_value=user)))
+    tracer = trace.get_tracer("test")
+
+    assert await authenticate_user("ada", "secret", session, cache, tracer) is user
+    assert await authenticate_user("ada", "wrong", session, cache, tracer) is False
@@ -0,0 +1,45 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.caching.keys import permission_tag, role_tag
+from app.models.users import Permissions, Roles
+from app.schemas.permissions import PermissionBase
+from app.schemas.roles import RoleBase
+from app.services.permissions_service import PermissionService
+from app.services.roles_service import RoleService
+
+
+def fake_session(row) -> MagicMock:
+    session = MagicMock(get=AsyncMock(return_value=row), delete=AsyncMock(), commit=AsyncMock(),
+                        refresh=AsyncMock())
+    session.__aenter__ = AsyncMock(return_value=session)
+    session.__aexit__ = AsyncMock(return_value=False)
+    return session
+
+
+@pytest.mark.parametrize("write", ["update", "delete"])
+async def test_role_writes_evict_entries_tagged_with_the_role(write):
+    cache = MagicMock(invalidate_tags=AsyncMock())
+    session = fake_session(Roles(id=7, role_name="admin"))
+
+    if write == "update":
+        await RoleService.service_update_role(7, RoleBase(role_name="administrator"), session, cache)
+    else:
+        await RoleService.service_delete_role(7, session, cache)
+
+    cache.invalidate_tags.assert_awaited_once_with(role_tag(7))
+
+
+@pytest.mark.parametrize("write", ["update", "delete"])
+async def test_permission_writes_evict_entries_tagged_with_the_permission(write):
+    cache = MagicMock(invalidate_tags=AsyncMock())
+    session = fake_session(Permissions(id=3, permission_name="manage_users", description="Manage users"))
+
+    if write == "update":
+        await PermissionService.service_update_permission(
+            3, PermissionBase(permission_name="manage_accounts", description="Manage users"), session, cache)
+    else:
+        await PermissionService.service_delete_permission(3, session, cache)
+
+    cache.invalidate_tags.assert_awaited_once_with(permission_tag(3))
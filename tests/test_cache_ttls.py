@@ -0,0 +1,54 @@
+import json
+import time
+
+from app.caching import envelope
+from app.caching.keys import cache_soft_ttl, cache_ttl
+from app.config import settings
+
+
+def test_enveloped_values_turn_stale_after_their_soft_ttl(monkeypatch):
+    fresh = envelope.encode("payload", soft_ttl=60)
+    stale = envelope.encode("payload", soft_ttl=0)
+
+    assert envelope.decode(fresh) == envelope.CacheEntry(value="payload", stale=False)
+    assert envelope.decode(stale) == envelope.CacheEntry(value="payload", stale=True)
+
+    now = time.time()
+    monkeypatch.setattr(envelope.time, "time", lambda: now + 61)
+    assert envelope.decode(fresh).stale
+
+
+def test_values_written_without_an_envelope_are_never_stale():
+    legacy = json.dumps({"id": 1, "username": "ada"})
+
+    assert envelope.decode(None) is None
+    assert envelope.decode(legacy) == envelope.CacheEntry(value=legacy, stale=False)
+    assert envelope.decode("not json") == envelope.CacheEntry(value="not json", stale=False)
+    assert envelope.decode("[1, 2]") == envelope.CacheEntry(value="[1, 2]", stale=False)
+    assert envelope.decode("42") == envelope.CacheEntry(value="42", stale=False)
+
+
+def test_ttls_are_jittered_within_the_configured_bounds(monkeypatch):
+    monkeypatch.setattr(settings, "CACHE_TTLS", {"users": 1000})
+    monkeypatch.setattr(settings, "CACHE_TTL_JITTER", {"users": 0.1})
+
+    ttls = {cache_ttl("users:get_user_by_id:1") for _ in range(200)}
+
+    assert min(ttls) >= 1000 and max(ttls) <= 1100
+
+
+def test_soft_ttl_stays_below_the_hard_ttl_even_when_jitter_overlaps(monkeypatch):
+    monkeypatch.setattr(settings, "CACHE_TTLS", {"users": 100})
+    monkeypatch.setattr(settings, "CACHE_SOFT_TTLS", {"users": 99})
+    monkeypatch.setattr(settings, "CACHE_TTL_JITTER", {"users": 0.5})
+
+    for _ in range(200):
+        ttl = cache_ttl("users:get_user_by_id:1")
+        assert 0 < cache_soft_ttl("users:get_user_by_id:1", ttl) < ttl
+
+
+def test_soft_ttl_is_not_clamped_for_values_that_never_expire(monkeypatch):
+    monkeypatch.setattr(settings, "CACHE_SOFT_TTLS", {"users": 60})
+    monkeypatch.setattr(settings, "CACHE_TTL_JITTER", {"users": 0})
+
+    assert cache_soft_ttl("users:get_user_by_id:1", 0) == 60
@@ -0,0 +1,61 @@
+import pytest
+
+from app.events.bus import EventBus, InProcessEventBus
+from app.events.retry import RETRY_COUNT_HEADER, retry_count
+
+
+async def test_in_process_bus_retries_then_dead_letters():
+    bus = InProcessEventBus(workers=1, retry_delays_ms=[0, 0])
+    attempts = []
+
+    async def handle(message):
+        attempts.append(retry_count(message.headers))
+        raise ValueError("boom")
+
+    bus.subscribe("user.created", handle)
+    await bus.start()
+    await bus.publish("user.created", b"1")
+    await bus.close()
+
+    assert attempts == [0, 1, 2]
+    dead_letter = bus._queue("user.created.dlq").get_nowait()
+    assert dead_letter.body == b"1"
+    assert dead_letter.headers[RETRY_COUNT_HEADER] == 3
+
+
+async def test_in_process_bus_settles_batch_items_individually():
+    bus = InProcessEventBus(workers=1, retry_delays_ms=[0])
+    batches = []
+
+    async def handle(messages):
+        batches.append([message.body for message in messages])
+        return [ValueError("bad") if message.body == b"2" and not retry_count(message.headers) else None
+                for message in messages]
+
+    for body in (b"1", b"2", b"3"):
+        await bus.publish("user.created", body)
+    bus.subscribe_batch("user.created", handle, max_size=10, max_wait_ms=10)
+    await bus.start()
+    await bus.close()
+
+    assert batches == [[b"1", b"2", b"3"], [b"2"]]
+
+
+def test_handlers_subscribe_every_shard_the_outbox_publishes_to(monkeypatch):
+    from app.config import settings
+    from app.events.consumer import subscribe_handlers
+
+    monkeypatch.setattr(settings, "EVENT_SHARDS", 3)
+    bus = InProcessEventBus(workers=1)
+    subscribe_handlers(bus)
+
+    assert sorted(bus._batch_handlers) == ["user.created.0", "user.created.1", "user.created.2"]
+
+
+def test_event_bus_backends_must_implement_the_whole_interface():
+    class PublishOnlyBus(EventBus):
+        async def publish(self, queue_name, body, headers=None):
+            pass
+
+    with pytest.raises(TypeError):
+        PublishOnlyBus()
@@ -0,0 +1,34 @@
+from types import SimpleNamespace
+
+from app.events.dlq import describe
+from app.events.retry import failure_headers, next_destination
+from app.events.schemas import MSGPACK, encode_event
+from app.schemas.events import UserCreated
+
+
+def test_failed_messages_walk_the_retry_tiers_then_dead_letter():
+    headers = {"content": "kept"}
+    destinations = []
+    for _ in range(4):
+        destinations.append(next_destination("user.created", headers, [1000, 10000, 60000]))
+        headers = failure_headers(headers, ValueError("boom"))
+
+    assert destinations == [
+        ("user.created.retry.1000ms", 1000),
+        ("user.created.retry.10000ms", 10000),
+        ("user.created.retry.60000ms", 60000),
+        ("user.created.dlq", None),
+    ]
+    assert headers["content"] == "kept"
+    assert headers["x-last-error"] == "ValueError: boom"
+
+
+def test_dead_letters_are_described_with_their_decoded_event():
+    body, headers = encode_event(UserCreated(id=1, username="ada"), MSGPACK)
+    message = SimpleNamespace(message_id="m1", timestamp=None, body=body,
+                              headers=failure_headers(headers, ValueError("boom")))
+    unreadable = SimpleNamespace(message_id="m2", timestamp=None, body=b"not an event", headers=None)
+
+    assert describe(message, "user.created")["body"] == {"id": 1, "username": "ada"}
+    assert describe(message, "user.created")["last_error"] == "ValueError: boom"
+    assert describe(unreadable, "user.created")["body"] == "not an event"
@@ -0,0 +1,29 @@
+import json
+
+import pytest
+
+from app.events.schemas import JSON, MSGPACK, decode_event, encode_event
+from app.schemas.events import UserCreated
+
+
+@pytest.mark.parametrize("content_type", [MSGPACK, JSON])
+def test_events_round_trip(content_type):
+    body, headers = encode_event(UserCreated(id=1, username="ada"), content_type)
+
+    assert headers == {"content_type": content_type, "x-event-type": "user.created", "x-schema-version": 1}
+    assert decode_event("user.created", body, headers) == UserCreated(id=1, username="ada")
+
+
+def test_legacy_json_events_without_headers_are_accepted():
+    body = json.dumps({"id": 1, "username": "ada"}).encode()
+
+    assert decode_event("user.created", body, None) == UserCreated(id=1, username="ada")
+
+
+def test_unreadable_events_raise_value_error():
+    body, headers = encode_event(UserCreated(id=1, username="ada"), MSGPACK)
+
+    with pytest.raises(ValueError):
+        decode_event("user.created", b"\xc1", headers)
+    with pytest.raises(ValueError):
+        decode_event("user.created", body, {**headers, "x-schema-version": 99})
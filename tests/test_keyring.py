@@ -0,0 +1,25 @@
+import jwt
+import pytest
+from jwt.exceptions import InvalidTokenError
+
+from app.utils.keyring import Keyring
+
+
+def test_keyring_verifies_tokens_signed_with_a_rotated_key():
+    old_ring = Keyring({"default": "old-secret", "k1": "secret-1"}, "k1")
+    token = jwt.encode({"sub": "alice"}, old_ring.signing_key()[1], algorithm="HS256", headers={"kid": "k1"})
+
+    new_ring = Keyring({"default": "old-secret", "k1": "secret-1", "k2": "secret-2"}, "k2")
+
+    assert new_ring.signing_key() == ("k2", "secret-2")
+    assert jwt.decode(token, new_ring.verification_key(token), algorithms=["HS256"])["sub"] == "alice"
+
+
+def test_keyring_rejects_unknown_kid_and_falls_back_to_default():
+    ring = Keyring({"default": "old-secret"}, "default")
+    legacy = jwt.encode({"sub": "alice"}, "old-secret", algorithm="HS256")
+    unknown = jwt.encode({"sub": "alice"}, "other", algorithm="HS256", headers={"kid": "gone"})
+
+    assert ring.verification_key(legacy) == "old-secret"
+    with pytest.raises(InvalidTokenError):
+        ring.verification_key(unknown)
@@ -0,0 +1,38 @@
+import time
+
+from app.caching.local_cache import LocalCache
+
+
+def test_local_cache_evicts_least_recently_used():
+    cache = LocalCache(max_entries=2, max_bytes=1024, default_ttl=60)
+    cache.set("users:1", "a")
+    cache.set("users:2", "b")
+    cache.get("users:1")
+    cache.set("users:3", "c")
+
+    assert cache.get("users:1") == "a"
+    assert cache.get("users:2") is None
+    assert cache.get("users:3") == "c"
+
+
+def test_local_cache_is_bounded_by_bytes():
+    cache = LocalCache(max_entries=10, max_bytes=8, default_ttl=60)
+    cache.set("users:1", "1234")
+    cache.set("users:2", "5678")
+    cache.set("users:3", "9")
+
+    assert cache.get("users:1") is None
+    assert cache.stats()["bytes"] <= 8
+
+
+def test_local_cache_uses_namespace_ttls(monkeypatch):
+    cache = LocalCache(max_entries=10, max_bytes=1024, default_ttl=60, ttls={"roles": 1, "users": 0})
+    now = time.monotonic()
+    cache.set("roles:byuserid:1", "admin")
+    cache.set("users:get_user_by_id:1", "{}")
+
+    assert cache.get("users:get_user_by_id:1") is None
+    assert cache.get("roles:byuserid:1") == "admin"
+
+    monkeypatch.setattr(time, "monotonic", lambda: now + 2)
+    assert cache.get("roles:byuserid:1") is None
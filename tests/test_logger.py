@@ -0,0 +1,35 @@
+import logging
+import queue
+import sys
+
+from app.utils.logger import DroppingQueueHandler
+
+
+def test_queue_handler_drops_records_when_the_queue_is_full():
+    handler = DroppingQueueHandler(queue.Queue(maxsize=1))
+    record = logging.LogRecord("test", logging.INFO, __file__, 1, "user %s", ("ada",), None)
+
+    handler.handle(record)
+    handler.handle(record)
+
+    assert handler.dropped == 1
+    queued = handler.queue.get_nowait()
+    assert queued.getMessage() == "user ada"
+    assert queued.args is None
+
+
+def test_queue_handler_renders_arguments_and_tracebacks_before_queueing():
+    handler = DroppingQueueHandler(queue.Queue())
+    tags = ["a"]
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record = logging.LogRecord("test", logging.ERROR, __file__, 1, "tags %s", (tags,), sys.exc_info())
+
+    handler.handle(record)
+    tags.append("b")
+
+    queued = handler.queue.get_nowait()
+    assert queued.getMessage() == "tags ['a']"
+    assert queued.exc_info is None
+    assert "ValueError: boom" in queued.exc_text
@@ -0,0 +1,41 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi import HTTPException
+
+from app.config import settings
+from app.services import hashing_service
+from app.services.hashing_service import PasswordHasher
+
+
+@pytest.fixture
+def hasher(monkeypatch):
+    monkeypatch.setattr(settings, "PASSWORD_HASH_CONCURRENCY", 1)
+    monkeypatch.setattr(settings, "PASSWORD_HASH_MAX_QUEUE", 1)
+    monkeypatch.setattr(PasswordHasher, "_executor", ThreadPoolExecutor(max_workers=1))
+    monkeypatch.setattr(PasswordHasher, "_semaphore", asyncio.Semaphore(1))
+    yield PasswordHasher
+    PasswordHasher._executor.shutdown(wait=True)
+
+
+def queue_depth() -> dict[str, int]:
+    return {observation.attributes["state"]: observation.value for observation in hashing_service._observe_queue(None)}
+
+
+async def test_callers_beyond_the_queue_limit_get_a_503(hasher):
+    release = threading.Event()
+    running = asyncio.ensure_future(hasher._run(release.wait))
+    queued = asyncio.ensure_future(hasher._run(release.wait))
+    await asyncio.sleep(0.01)
+
+    assert queue_depth() == {"running": 1, "queued": 1}
+    with pytest.raises(HTTPException) as rejected:
+        await hasher._run(release.wait)
+    assert rejected.value.status_code == 503
+    assert rejected.value.headers == {"Retry-After": "1"}
+
+    release.set()
+    await asyncio.gather(running, queued)
+    assert queue_depth() == {"running": 0, "queued": 0}
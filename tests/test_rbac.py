@@ -0,0 +1,71 @@
+from unittest.mock import AsyncMock
+
+from app.services.authorization_service import AuthorizationService, RBACSnapshot
+
+
+def test_rbac_snapshot_resolves_permissions_through_roles():
+    snapshot = RBACSnapshot()
+    snapshot.add_permission(1, "api_generate_token")
+    snapshot.add_permission(2, "manage_users")
+    snapshot.grant_permission(10, 1)
+    snapshot.assign_role(100, 10)
+
+    assert snapshot.has_permission(100, "api_generate_token")
+    assert not snapshot.has_permission(100, "manage_users")
+    assert not snapshot.has_permission(101, "api_generate_token")
+    assert not snapshot.has_permission(100, "unknown")
+
+
+def test_rbac_snapshot_updates_users_when_role_is_granted_a_permission():
+    snapshot = RBACSnapshot()
+    snapshot.add_permission(2, "manage_users")
+    snapshot.assign_role(100, 10)
+    snapshot.assign_role(101, 11)
+
+    snapshot.grant_permission(10, 2)
+
+    assert snapshot.has_permission(100, "manage_users")
+    assert not snapshot.has_permission(101, "manage_users")
+
+
+def test_rbac_snapshot_drops_access_when_permissions_roles_and_users_are_deleted():
+    snapshot = RBACSnapshot()
+    snapshot.add_permission(1, "api_generate_token")
+    snapshot.add_permission(2, "manage_users")
+    snapshot.grant_permission(10, 1)
+    snapshot.grant_permission(11, 2)
+    snapshot.assign_role(100, 10)
+    snapshot.assign_role(100, 11)
+    snapshot.assign_role(101, 11)
+
+    snapshot.remove_permission(1)
+    assert not snapshot.has_permission(100, "api_generate_token")
+    assert snapshot.has_permission(100, "manage_users")
+
+    snapshot.remove_user(101)
+    assert not snapshot.has_permission(101, "manage_users")
+
+    snapshot.remove_role(11)
+    assert not snapshot.has_permission(100, "manage_users")
+
+
+def test_rbac_snapshot_forgets_the_old_name_of_a_renamed_permission():
+    snapshot = RBACSnapshot()
+    snapshot.add_permission(1, "api_generate_token")
+    snapshot.grant_permission(10, 1)
+    snapshot.assign_role(100, 10)
+
+    snapshot.add_permission(1, "api_issue_token")
+
+    assert snapshot.has_permission(100, "api_issue_token")
+    assert not snapshot.has_permission(100, "api_generate_token")
+
+
+async def test_apply_change_logs_instead_of_raising_when_publish_fails():
+    service = AuthorizationService()
+    service._client = AsyncMock()
+    service._client.publish.side_effect = ConnectionError("redis down")
+
+    await service.apply_change("add_permission", permission_id=1, permission_name="manage_users")
+
+    assert service.snapshot.permission_names == {"manage_users": 1}
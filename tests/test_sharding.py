@@ -0,0 +1,25 @@
+from app.events.sharding import jump_hash, queue_for
+
+
+def test_jump_hash_is_stable_and_in_range():
+    assert [jump_hash(key, 8) for key in range(1000)] == [jump_hash(key, 8) for key in range(1000)]
+    assert {jump_hash(key, 8) for key in range(1000)} == set(range(8))
+
+
+def test_jump_hash_only_moves_keys_into_the_new_bucket():
+    for key in range(1000):
+        before, after = jump_hash(key, 8), jump_hash(key, 9)
+        assert after == before or after == 8
+
+
+def test_queue_for_is_unsharded_by_default():
+    assert queue_for("user.created", 42, shards=0) == "user.created"
+    assert queue_for("user.created", 42, shards=4) == f"user.created.{jump_hash(42, 4)}"
+
+
+def test_assign_shards_gives_each_shard_to_one_worker():
+    from app.events.supervisor import assign_shards
+
+    assert assign_shards(0, 3) == [None, None, None]
+    assert assign_shards(8, 3) == [[0, 3, 6], [1, 4, 7], [2, 5]]
+    assert assign_shards(2, 4) == [[0], [1]]
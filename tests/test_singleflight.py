@@ -0,0 +1,60 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from opentelemetry import trace
+
+from app.caching.singleflight import SingleFlight
+from app.config import settings
+from app.models.users import Users
+from app.services import user_service
+from app.services.user_service import UserService
+
+
+async def test_single_flight_coalesces_concurrent_loads():
+    flight = SingleFlight()
+    calls = 0
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"id": 1}
+
+    results = await asyncio.gather(*[flight.do("users:1", load) for _ in range(10)])
+
+    assert calls == 1
+    assert all(result == {"id": 1} for result in results)
+
+
+async def test_single_flight_propagates_errors_and_forgets_key():
+    flight = SingleFlight()
+
+    async def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        await flight.do("users:1", fail)
+
+    async def load():
+        return 1
+
+    assert await flight.do("users:1", load) == 1
+
+
+async def test_coalesced_user_load_uses_its_own_session(monkeypatch):
+    user = Users(id=1, username="ada", email="ada@example.com", password_hash="x",
+                 is_active=True, is_disabled=False)
+    own_session = MagicMock()
+    own_session.__aenter__ = AsyncMock(return_value=own_session)
+    own_session.__aexit__ = AsyncMock(return_value=False)
+    own_session.execute = AsyncMock(return_value=MagicMock(scalar_one_or_none=MagicMock(return_value=user)))
+    monkeypatch.setattr(user_service, "async_session", MagicMock(return_value=own_session))
+    monkeypatch.setattr(settings, "CACHE_LEASE_ENABLED", False)
+    cache = MagicMock(get_entry=AsyncMock(return_value=None), set=AsyncMock())
+    request_session = MagicMock(execute=AsyncMock(side_effect=AssertionError("request session used")))
+
+    loaded = await UserService.get_user_by_id(1, request_session, cache, trace.get_tracer(__name__))
+
+    assert loaded is user
+    request_session.execute.assert_not_awaited()
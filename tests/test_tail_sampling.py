@@ -0,0 +1,37 @@
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from opentelemetry.trace import Status, StatusCode
+
+from app.instrumentation.tracing import TailSamplingSpanProcessor
+
+
+def make_tracer(slow_threshold_ms: float):
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(TailSamplingSpanProcessor(
+        SimpleSpanProcessor(exporter), ratio=0.0, slow_threshold_ms=slow_threshold_ms, max_traces=100))
+    return provider.get_tracer("test"), exporter
+
+
+def test_fast_successful_traces_are_dropped_and_failed_ones_kept():
+    tracer, exporter = make_tracer(slow_threshold_ms=60_000)
+
+    with tracer.start_as_current_span("GET /users"):
+        with tracer.start_as_current_span("db-query-get_user_by_id"):
+            pass
+    assert exporter.get_finished_spans() == ()
+
+    with tracer.start_as_current_span("GET /users"):
+        with tracer.start_as_current_span("db-query-get_user_by_id") as span:
+            span.set_status(Status(StatusCode.ERROR))
+    assert [span.name for span in exporter.get_finished_spans()] == ["db-query-get_user_by_id", "GET /users"]
+
+
+def test_slow_traces_are_kept():
+    tracer, exporter = make_tracer(slow_threshold_ms=0)
+
+    with tracer.start_as_current_span("GET /users"):
+        pass
+
+    assert len(exporter.get_finished_spans()) == 1
@@ -0,0 +1,102 @@
+import asyncio
+import json
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from fastapi import HTTPException
+from opentelemetry import trace
+
+from app.caching.envelope import CacheEntry
+from app.config import settings
+from app.models.users import Users
+from app.routers import protected_user
+from app.schemas.user import UserBatchRequest
+from app.services import user_loader as loader_module
+from app.services.user_loader import UserBatchLoader
+
+tracer = trace.get_tracer(__name__)
+
+
+def user(user_id: int) -> Users:
+    return Users(id=user_id, username=f"user{user_id}", email=f"user{user_id}@example.com", password_hash="x",
+                 is_active=True, is_disabled=False)
+
+
+def fake_database(monkeypatch, *user_ids: int) -> AsyncMock:
+    """Serve the given users from a fake session and return its execute mock."""
+    def execute_result(statement):
+        wanted = statement.compile().params["id_1"]
+        found = [user(user_id) for user_id in user_ids if user_id in wanted]
+        return MagicMock(scalars=MagicMock(return_value=MagicMock(all=MagicMock(return_value=found))))
+
+    session = MagicMock()
+    session.__aenter__ = AsyncMock(return_value=session)
+    session.__aexit__ = AsyncMock(return_value=False)
+    session.execute = AsyncMock(side_effect=execute_result)
+    monkeypatch.setattr(loader_module, "async_session", MagicMock(return_value=session))
+    return session.execute
+
+
+def fake_cache(entries: dict[int, CacheEntry]) -> MagicMock:
+    cache = MagicMock(set_many=AsyncMock())
+    cache.get_many = AsyncMock(side_effect=lambda keys: [entries.get(int(key.rsplit(":", 1)[1])) for key in keys])
+    return cache
+
+
+async def test_loads_in_the_same_tick_share_one_mget_and_one_query(monkeypatch):
+    execute = fake_database(monkeypatch, 1, 2)
+    cache = fake_cache({})
+    loader = UserBatchLoader()
+
+    first, second, again, unknown = await asyncio.gather(
+        loader.load(1, cache, tracer), loader.load(2, cache, tracer),
+        loader.load(1, cache, tracer), loader.load(3, cache, tracer))
+
+    assert (first["id"], second["id"], again["id"], unknown) == (1, 2, 1, None)
+    cache.get_many.assert_awaited_once()
+    assert execute.await_count == 1
+
+
+async def test_only_cache_misses_are_queried(monkeypatch):
+    execute = fake_database(monkeypatch, 1, 2)
+    cache = fake_cache({1: CacheEntry(value=json.dumps(user(1).to_dict()), stale=False)})
+
+    users = await UserBatchLoader().load_many([1, 2], cache, tracer)
+
+    assert sorted(users) == [1, 2]
+    assert execute.await_args.args[0].compile().params["id_1"] == [2]
+
+
+async def test_concurrent_readers_of_a_stale_user_trigger_one_refresh(monkeypatch):
+    monkeypatch.setattr(settings, "CACHE_LEASE_ENABLED", False)
+    execute = fake_database(monkeypatch, 1, 2)
+    cache = fake_cache({user_id: CacheEntry(value=json.dumps(user(user_id).to_dict()), stale=True)
+                        for user_id in (1, 2)})
+    loader = UserBatchLoader()
+
+    await asyncio.gather(*[loader.load_many([1, 2], cache, tracer) for _ in range(5)])
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+    assert execute.await_count == 1
+    assert execute.await_args.args[0].compile().params["id_1"] == [1, 2]
+
+
+async def test_batch_endpoint_keeps_request_order_and_skips_unknown_ids(monkeypatch):
+    monkeypatch.setattr(protected_user.user_loader, "load_many",
+                        AsyncMock(return_value={1: {"id": 1}, 3: {"id": 3}}))
+
+    users = await protected_user.read_users_batch(UserBatchRequest(ids=[3, 2, 1, 3]), MagicMock(), tracer)
+
+    assert users == [{"id": 3}, {"id": 1}]
+
+
+async def test_batch_endpoints_reject_too_many_or_malformed_ids(monkeypatch):
+    monkeypatch.setattr(settings, "USER_BATCH_MAX_IDS_POST", 2)
+
+    with pytest.raises(HTTPException) as too_many:
+        await protected_user.read_users_batch(UserBatchRequest(ids=[1, 2, 3]), MagicMock(), tracer)
+    with pytest.raises(HTTPException) as malformed:
+        await protected_user.read_users("1,two", MagicMock(), tracer)
+
+    assert too_many.value.status_code == malformed.value.status_code == 422